@@ -1,6 +1,14 @@
 import streamlit as st
 from styles.design_system import DesignSystem as DS
 from styles.components import UIComponents
+from llm.embedding_model import EmbeddingModel
+from core.embedding_worker import EmbeddingWorker
+from core.question_bank import QuestionBank
+from core.quiz_engine import QuizEngine
+from database.db_manager import ensure_migrated
+
+# Bring the schema up to date before anything queries it (once per process)
+ensure_migrated()
 
 st.set_page_config(
     page_title="Adaptive Study Planner",
@@ -12,6 +20,18 @@ st.set_page_config(
 # Inject custom CSS
 UIComponents.render_custom_css()
 
+# Start loading the embedding model in the background so the first chat doesn't wait for it
+EmbeddingModel.warm_up_in_background()
+
+# Pick up any PDFs still waiting for embeddings
+EmbeddingWorker.ensure_started()
+
+# Keep quiz question buckets stocked so quizzes start instantly
+QuestionBank.ensure_started()
+
+# Finish grading quizzes whose AI review timed out, without waiting for a page visit
+QuizEngine.ensure_regrade_sweeper()
+
 # Check if user is logged in
 if 'user_id' in st.session_state:
     from core.auth_manager import AuthManager
@@ -0,0 +1,121 @@
+"""
+Concurrency benchmark: bare SQLite engine (rollback journal, default pool) vs
+the tuned engine from database/connection.py (WAL, synchronous=NORMAL,
+busy_timeout, larger cache, mmap).
+
+Reader threads run the kind of indexed lookups the pages do; writer threads
+insert and update rows in short transactions, like chat messages and task
+ticks. Each configuration runs for the same time on a fresh scratch file and
+reports committed operations per second and "database is locked" failures.
+
+Run from the project root:
+
+    python -m benchmarks.bench_sqlite [--readers 8] [--writers 4] [--seconds 5] [--rows 20000]
+"""
+from database.connection import create_db_engine, SQLITE_PRAGMAS
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+import threading
+import argparse
+import tempfile
+import random
+import time
+import os
+
+
+def bare_engine(url: str):
+    """What db_manager used to build"""
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+def tuned_engine(url: str):
+    return create_db_engine(url)
+
+
+def prepare(engine, rows: int):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE messages (id INTEGER PRIMARY KEY, user_id TEXT, body TEXT, score INTEGER)"
+        ))
+        conn.execute(text("CREATE INDEX ix_messages_user ON messages (user_id)"))
+        conn.execute(
+            text("INSERT INTO messages (user_id, body, score) VALUES (:user_id, :body, 0)"),
+            [{"user_id": f"user{i % 200}", "body": "x" * 200} for i in range(rows)]
+        )
+
+
+def run(engine, readers: int, writers: int, seconds: float):
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def tally(key):
+        with lock:
+            counts[key] += 1
+
+    def reader(seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < stop:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(
+                        text("SELECT COUNT(*), MAX(score) FROM messages WHERE user_id = :user_id"),
+                        {"user_id": f"user{rng.randrange(200)}"}
+                    ).fetchall()
+                tally("reads")
+            except OperationalError:
+                tally("locked")
+
+    def writer(seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < stop:
+            try:
+                with engine.begin() as conn:
+                    user_id = f"user{rng.randrange(200)}"
+                    conn.execute(
+                        text("INSERT INTO messages (user_id, body, score) VALUES (:user_id, :body, 1)"),
+                        {"user_id": user_id, "body": "y" * 200}
+                    )
+                    conn.execute(
+                        text("UPDATE messages SET score = score + 1 WHERE id = :id"),
+                        {"id": rng.randrange(1, 1000)}
+                    )
+                tally("writes")
+            except OperationalError:
+                tally("locked")
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite read/write throughput: bare vs tuned engine")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"🔧 Tuned pragmas: {SQLITE_PRAGMAS}")
+    print(f"{'engine':>6} | {'reads/s':>9} | {'writes/s':>9} | {'locked':>6}")
+    print("-" * 42)
+
+    for name, factory in (("bare", bare_engine), ("tuned", tuned_engine)):
+        with tempfile.TemporaryDirectory() as workdir:
+            engine = factory(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+            prepare(engine, args.rows)
+            counts = run(engine, args.readers, args.writers, args.seconds)
+            engine.dispose()
+
+        print(f"{name:>6} | {counts['reads'] / args.seconds:>9.0f} | "
+              f"{counts['writes'] / args.seconds:>9.0f} | {counts['locked']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark: per-resource argsort (old RAGEngine.search) vs. one similarity
+pass + argpartition top-k over the concatenated matrix (llm.index_backends.top_k_rows).
+
+Run from the project root:
+
+    python -m benchmarks.bench_topk
+"""
+from llm.index_backends import top_k_rows
+import numpy as np
+import time
+
+DIM = 384
+TOP_K = 3
+THRESHOLD = 0.15
+NUM_RESOURCES = 20
+REPEATS = 50
+
+
+def legacy_search(resources, query):
+    """The old loop: normalize per resource, full argsort, dicts, then a global sort"""
+    all_results = []
+
+    for resource_id, embeddings in resources:
+        similarities = np.dot(embeddings, query) / (
+            np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query)
+        )
+
+        top_indices = np.argsort(similarities)[::-1][:TOP_K]
+
+        for idx in top_indices:
+            if similarities[idx] > THRESHOLD:
+                all_results.append({
+                    'chunk_index': int(idx),
+                    'similarity': float(similarities[idx]),
+                    'resource_id': resource_id
+                })
+
+    all_results.sort(key=lambda x: x['similarity'], reverse=True)
+    return all_results[:TOP_K]
+
+
+def vectorized_search(matrix, row_resource, resource_ids, query):
+    """One pass over the pre-normalized matrix, mask, argpartition, then k dicts"""
+    scores, rows = top_k_rows(matrix @ query, TOP_K, min_score=THRESHOLD)
+    return [
+        {'chunk_index': int(row), 'similarity': float(score), 'resource_id': resource_ids[row_resource[row]]}
+        for score, row in zip(scores, rows)
+    ]
+
+
+def time_call(fn, *args):
+    """Median wall time in milliseconds"""
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    rng = np.random.default_rng(42)
+
+    print(f"{'chunks':>8} | {'legacy ms':>10} | {'top-k ms':>10} | {'speedup':>8}")
+    print("-" * 46)
+
+    for num_chunks in (1_000, 10_000, 100_000):
+        embeddings = rng.standard_normal((num_chunks, DIM)).astype(np.float32)
+        query = rng.standard_normal(DIM).astype(np.float32)
+
+        per_resource = np.array_split(embeddings, NUM_RESOURCES)
+        resources = [(f"resource-{i}", block) for i, block in enumerate(per_resource)]
+
+        matrix = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        row_resource = np.concatenate([
+            np.full(len(block), i, dtype=np.int32) for i, block in enumerate(per_resource)
+        ])
+        resource_ids = [resource_id for resource_id, _ in resources]
+        unit_query = query / np.linalg.norm(query)
+
+        legacy_ms = time_call(legacy_search, resources, query)
+        vectorized_ms = time_call(vectorized_search, matrix, row_resource, resource_ids, unit_query)
+
+        print(f"{num_chunks:>8} | {legacy_ms:>10.3f} | {vectorized_ms:>10.3f} | {legacy_ms / vectorized_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
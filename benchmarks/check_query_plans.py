@@ -0,0 +1,168 @@
+"""
+Query-plan regression check for the hot per-user queries.
+
+Builds a scratch SQLite database through the migrations (so it has exactly the
+indexes a deployed database gets), fills it with a few hundred students' worth
+of plans, quizzes, chats and uploads, runs ANALYZE, and asks SQLite for the
+plan of each query the pages issue on every rerun. A query fails the check if
+it scans its table, does not use the expected index, or sorts in a temporary
+B-tree instead of reading the index in order.
+
+Run from the project root:
+
+    python -m benchmarks.check_query_plans [--users 200] [--days 60] [--verbose]
+
+Exits with status 1 when any query regresses, so it can gate CI.
+"""
+from database.connection import create_db_engine
+from database.migrations import upgrade_database
+from database.models import (
+    StudentProfile, StudyPlan, Quiz, ChatSession, ChatMessage,
+    UploadedResource, ProgressAnalytics, QuizResponse
+)
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from datetime import date, datetime, timedelta
+import argparse
+import tempfile
+import random
+import sys
+import os
+
+USER = "user-7"
+
+
+# (name, expected index, query builder); each mirrors a query in core/ or pages/
+HOT_QUERIES = [
+    ("profile by user", "ix_student_profiles_user_id",
+     lambda db: db.query(StudentProfile).filter(StudentProfile.user_id == USER)),
+    ("today's plan", "ix_study_plans_user_day",
+     lambda db: db.query(StudyPlan).filter(StudyPlan.user_id == USER, StudyPlan.day_number == 12)),
+    ("plans by day", "ix_study_plans_user_day",
+     lambda db: db.query(StudyPlan).filter(StudyPlan.user_id == USER).order_by(StudyPlan.day_number)),
+    ("recent completed quizzes", "ix_quizzes_user_status_created",
+     lambda db: db.query(Quiz).filter(Quiz.user_id == USER, Quiz.status == 'completed')
+     .order_by(Quiz.created_at.desc()).limit(10)),
+    ("quiz history", "ix_quizzes_user_status_attempted",
+     lambda db: db.query(Quiz).filter(Quiz.user_id == USER, Quiz.status == 'completed')
+     .order_by(Quiz.attempted_at.desc()).limit(10)),
+    ("open chat session", "ix_chat_sessions_user_open",
+     lambda db: db.query(ChatSession).filter(ChatSession.user_id == USER, ChatSession.ended_at.is_(None))),
+    ("recent chat sessions", "ix_chat_sessions_user_started",
+     lambda db: db.query(ChatSession).filter(ChatSession.user_id == USER)
+     .order_by(ChatSession.started_at.desc()).limit(20)),
+    ("chat history", "ix_chat_messages_session_timestamp",
+     lambda db: db.query(ChatMessage).filter(ChatMessage.session_id == f"{USER}-session-3")
+     .order_by(ChatMessage.timestamp.desc()).limit(10)),
+    ("user's PDFs", "ix_uploaded_resources_user_uploaded",
+     lambda db: db.query(UploadedResource).filter(UploadedResource.user_id == USER, UploadedResource.file_type == 'pdf')
+     .order_by(UploadedResource.uploaded_at.desc())),
+    ("weekly analytics", "ix_progress_analytics_user_date",
+     lambda db: db.query(ProgressAnalytics).filter(
+         ProgressAnalytics.user_id == USER,
+         ProgressAnalytics.date >= date.today() - timedelta(days=7),
+         ProgressAnalytics.date <= date.today())),
+    ("quiz responses", "ix_quiz_responses_quiz_number",
+     lambda db: db.query(QuizResponse).filter(QuizResponse.quiz_id == f"{USER}-quiz-5")
+     .order_by(QuizResponse.question_number)),
+]
+
+
+def seed(engine, users: int, days: int, seed: int = 7):
+    """Plausible data volumes: every student has a full plan, quiz and chat history"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    with Session(engine) as db:
+        for u in range(users):
+            user_id = f"user-{u}"
+            db.add(StudentProfile(user_id=user_id, current_day_number=days // 2))
+
+            for day in range(1, days + 1):
+                db.add(StudyPlan(user_id=user_id, day_number=day, topic=f"Topic {day % 12}",
+                                 status='completed' if day < days // 2 else 'pending'))
+                db.add(ProgressAnalytics(user_id=user_id, date=date.today() - timedelta(days=days - day),
+                                         hours_studied=rng.randint(0, 5)))
+
+            for q in range(days // 2):
+                quiz_id = f"{user_id}-quiz-{q}"
+                created = now - timedelta(days=q, minutes=rng.randint(0, 600))
+                db.add(Quiz(quiz_id=quiz_id, user_id=user_id, day_number=q + 1, topic=f"Topic {q % 12}",
+                            quiz_type=rng.choice(['mcq', 'descriptive', 'coding']), questions=[],
+                            status=rng.choice(['completed', 'completed', 'pending']), score=rng.randint(0, 10),
+                            created_at=created, attempted_at=created + timedelta(minutes=20)))
+                for n in range(5):
+                    db.add(QuizResponse(quiz_id=quiz_id, question_number=n + 1, question_text="Q"))
+
+            for s in range(days // 4):
+                session_id = f"{user_id}-session-{s}"
+                started = now - timedelta(days=s)
+                db.add(ChatSession(session_id=session_id, user_id=user_id, started_at=started,
+                                   ended_at=None if s == 0 else started + timedelta(hours=1)))
+                for m in range(20):
+                    db.add(ChatMessage(session_id=session_id, role='user' if m % 2 == 0 else 'ai',
+                                       content="message", timestamp=started + timedelta(minutes=m)))
+
+            for r in range(5):
+                db.add(UploadedResource(user_id=user_id, filename=f"notes-{r}.pdf", file_path="", file_type='pdf',
+                                        uploaded_at=now - timedelta(days=r)))
+
+            if u % 50 == 49:
+                db.commit()
+        db.commit()
+
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def explain(engine, query) -> list:
+    sql = str(query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def problems(plan: list, index_name: str) -> list:
+    """What's wrong with a plan (empty when it reads the expected index without sorting)"""
+    found = []
+    if not any(index_name in step for step in plan):
+        found.append(f"does not use {index_name}")
+    for step in plan:
+        if step.startswith("SCAN ") and "INDEX" not in step:
+            found.append(f"full table scan ({step})")
+        if "TEMP B-TREE" in step:
+            found.append(f"sorts in memory ({step})")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assert that the hot per-user queries use their indexes")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=60, help="Plan length; sizes the quiz and chat history too")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan, not just failures")
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_db_engine(f"sqlite:///{os.path.join(workdir, 'plans.db')}")
+        upgrade_database(engine)
+        print(f"🌱 Seeding {args.users} students x {args.days} days...")
+        seed(engine, args.users, args.days)
+
+        with Session(engine) as db:
+            for name, index_name, build in HOT_QUERIES:
+                plan = explain(engine, build(db))
+                issues = problems(plan, index_name)
+                failures += bool(issues)
+
+                print(f"{'❌' if issues else '✅'} {name}: {'; '.join(issues) or index_name}")
+                if issues or args.verbose:
+                    for step in plan:
+                        print(f"      {step}")
+        engine.dispose()
+
+    print(f"\n{len(HOT_QUERIES) - failures}/{len(HOT_QUERIES)} queries use their index")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Offline retrieval evaluation: dense vs keyword (BM25) vs hybrid (RRF).
+
+Builds a sample corpus from the PDFs in data/uploads (pages -> token-aware chunks
+-> embeddings, plus a throwaway FTS5 index), generates queries from the corpus
+itself and reports recall@k and per-query latency for each search mode. Dense
+and hybrid go through the same RAGEngine code the app uses.
+
+Run from the project root:
+
+    python -m benchmarks.eval_retrieval [--uploads data/uploads] [--queries 100] [--k 1 3 5 10]
+
+Two query sets are sampled from random chunks:
+
+    terms     the chunk's rarest words (algorithm names, identifiers, jargon)
+    sentence  one sentence of the chunk with every third word dropped
+
+A query is a hit at k when any of the top k chunks is relevant: it contains the
+source sentence, or all of the sampled terms.
+"""
+from core.pdf_extractor import iter_pages
+from database.models import SearchDocument
+from llm.chunker import TokenCounter, iter_chunks
+from llm.embedding_model import EmbeddingModel
+from llm.keyword_index import KeywordIndex
+from llm.rag_engine import RAGEngine, SEARCH_MODES
+from llm.vector_index import UserVectorIndex
+from sqlalchemy import create_engine
+from types import SimpleNamespace
+from collections import Counter
+import numpy as np
+import argparse
+import tempfile
+import random
+import time
+import math
+import glob
+import re
+import os
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9_\-]{3,}")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+
+def build_corpus(uploads_dir: str, max_documents: int):
+    """Extract and chunk every PDF. Returns [(key, filename, chunks)]"""
+    counter = TokenCounter(EmbeddingModel.tokenizer())
+    max_tokens = EmbeddingModel.max_tokens()
+    corpus = []
+
+    for path in sorted(glob.glob(os.path.join(uploads_dir, "*.pdf")))[:max_documents]:
+        try:
+            chunks = list(iter_chunks(iter_pages(path), max_tokens=max_tokens, counter=counter))
+        except Exception as e:
+            print(f"⚠️ Skipping {os.path.basename(path)}: {e}")
+            continue
+
+        if chunks:
+            corpus.append((f"doc{len(corpus)}", os.path.basename(path), chunks))
+
+    return corpus
+
+
+def make_queries(corpus, num_queries: int, seed: int):
+    """Sample (kind, query, relevance test) triples from the corpus"""
+    rng = random.Random(seed)
+    all_chunks = [(key, i, chunk) for key, _, chunks in corpus for i, chunk in enumerate(chunks)]
+
+    document_frequency = Counter()
+    for _, _, chunk in all_chunks:
+        document_frequency.update({word.lower() for word in _WORD.findall(chunk)})
+
+    queries = []
+    for key, index, chunk in rng.sample(all_chunks, min(num_queries, len(all_chunks))):
+        words = sorted({word.lower() for word in _WORD.findall(chunk)}, key=lambda w: (document_frequency[w], w))
+        if len(words) >= 3:
+            terms = words[:3]
+            queries.append(("terms", " ".join(terms), lambda text, terms=terms: all(t in text.lower() for t in terms)))
+
+        sentences = [s for s in _SENTENCE.split(chunk) if len(s.split()) >= 8]
+        if sentences:
+            sentence = rng.choice(sentences)
+            loose = " ".join(word for i, word in enumerate(sentence.split()) if i % 3 != 2)
+            queries.append(("sentence", loose, lambda text, sentence=sentence: sentence in text))
+
+    return queries
+
+
+def build_indexes(corpus, workdir: str):
+    """A resident vector index plus an FTS5 index in a scratch SQLite file"""
+    index = UserVectorIndex("eval")
+    for key, filename, chunks in corpus:
+        embeddings = EmbeddingModel.encode(chunks, batch_size=64)
+        index.add_resource(key, filename, np.asarray(embeddings))
+
+    bind = create_engine(f"sqlite:///{os.path.join(workdir, 'eval.db')}")
+    SearchDocument.__table__.create(bind=bind, checkfirst=True)
+    keywords = KeywordIndex(bind=bind)
+    for key, _, chunks in corpus:
+        keywords.index_chunks(key, chunks)
+
+    return index, keywords
+
+
+def run_mode(engine, index, resources, keys, mode: str, queries, chunk_text, max_k: int):
+    """Returns (hits-at-rank list per query, latencies in ms)"""
+    first_relevant = []
+    latencies = []
+
+    engine.query_embedding_cache.clear()
+
+    for _, query, is_relevant in queries:
+        started = time.perf_counter()
+        if mode == 'dense':
+            hits = engine._dense_search(index, keys, query, max_k)
+        elif mode == 'keyword':
+            hits = engine._keyword_search(resources, keys, query, max_k)
+        else:
+            hits = engine._hybrid_search(index, resources, keys, query, max_k)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        rank = next(
+            (i for i, hit in enumerate(hits, 1) if is_relevant(chunk_text[(hit['key'], hit['chunk_index'])])),
+            math.inf
+        )
+        first_relevant.append(rank)
+
+    return first_relevant, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval recall@k / latency evaluation")
+    parser.add_argument("--uploads", default="data/uploads", help="Directory of sample PDFs")
+    parser.add_argument("--documents", type=int, default=50, help="Maximum PDFs to load")
+    parser.add_argument("--queries", type=int, default=100, help="Chunks to sample queries from")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10], help="Cut-offs for recall@k")
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.uploads, args.documents)
+    if not corpus:
+        print(f"❌ No extractable PDFs in {args.uploads}")
+        return
+
+    num_chunks = sum(len(chunks) for _, _, chunks in corpus)
+    print(f"📚 {len(corpus)} document(s), {num_chunks} chunks")
+
+    queries = make_queries(corpus, args.queries, args.seed)
+    chunk_text = {(key, i): chunk for key, _, chunks in corpus for i, chunk in enumerate(chunks)}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        index, keywords = build_indexes(corpus, workdir)
+
+        engine = RAGEngine(keyword_index=keywords)
+        resources = [SimpleNamespace(resource_id=key, filename=filename, content_hash=key) for key, filename, _ in corpus]
+        keys = {key: key for key, _, _ in corpus}
+
+        max_k = max(args.k)
+        header = f"{'mode':>8} | {'queries':>8} | " + " | ".join(f"{'R@' + str(k):>6}" for k in args.k) + f" | {'p50 ms':>7} | {'p95 ms':>7}"
+        print(header)
+        print("-" * len(header))
+
+        for kind in ("terms", "sentence"):
+            subset = [q for q in queries if q[0] == kind]
+            if not subset:
+                continue
+
+            print(f"[{kind}]")
+            for mode in SEARCH_MODES:
+                ranks, latencies = run_mode(engine, index, resources, keys, mode, subset, chunk_text, max_k)
+                recalls = " | ".join(f"{np.mean([r <= k for r in ranks]):>6.3f}" for k in args.k)
+                print(f"{mode:>8} | {len(subset):>8} | {recalls} | "
+                      f"{np.percentile(latencies, 50):>7.2f} | {np.percentile(latencies, 95):>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Offline load test of the LLM-backed features: chat streaming, quiz generation
+and answer grading, driven by concurrent simulated students.
+
+Runs against any LLM backend; by default the local fake one, so no network or
+HF_TOKEN is needed. Requests go through LLMClient and QuizEngine exactly as in
+the app, so the global concurrency cap, retries, grading fan-out and JSON
+parsing are all exercised. Nothing is written to the database (the response
+cache is bypassed).
+
+Run from the project root:
+
+    python -m benchmarks.load_test [--users 20] [--iterations 5] [--backend fake|replay]
+                                   [--latency 0.3] [--tps 60]
+
+Record real traffic once with LLM_BACKEND=record, then replay it here with
+--backend replay for realistic response sizes and timing.
+"""
+from llm.llm_backends import FakeBackend
+from llm.llm_client import LLMClient
+from core.quiz_engine import QuizEngine
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+import numpy as np
+import argparse
+import random
+import time
+
+TOPICS = [("Linked Lists", "medium"), ("CPU Scheduling", "medium"), ("SQL Queries", "easy"), ("Dynamic Programming", "hard")]
+
+CHAT_PROMPT = """You are a helpful AI study companion.
+
+Student's question: Can you explain {topic} with an example?
+
+Your explanation:"""
+
+
+def chat(rng: random.Random, timings: dict):
+    topic, _ = rng.choice(TOPICS)
+    started = time.perf_counter()
+    first = None
+    text = []
+
+    for delta in LLMClient.stream_llm(CHAT_PROMPT.format(topic=topic), max_tokens=500, temperature=0.7):
+        if first is None:
+            first = time.perf_counter() - started
+        text.append(delta)
+
+    if not text:
+        raise RuntimeError("empty chat reply")
+    timings["chat ttft"].append(first)
+
+
+def quiz(rng: random.Random, timings: dict):
+    topic, difficulty = rng.choice(TOPICS)
+    quiz_type = rng.choice(["mcq", "descriptive", "coding"])
+
+    questions = QuizEngine._generate_questions(quiz_type, topic, difficulty, 5, cache=False)
+    if len(questions) < 5:
+        raise RuntimeError(f"only {len(questions)} {quiz_type} questions")
+
+
+def grading(rng: random.Random, timings: dict):
+    topic, _ = rng.choice(TOPICS)
+    questions = [
+        {"question": f"Explain part {i} of {topic}.", "key_points": ["definition", "example", "complexity"],
+         "sample_answer": f"{topic} is defined by its structure; for example it supports common operations."}
+        for i in range(5)
+    ]
+    answers = {str(i): f"{topic} has a definition and an example of its complexity, answer {i}." for i in range(5)}
+
+    score, feedback = QuizEngine._grade_descriptive(questions, answers, "load-test")
+    if len(feedback) != len(questions):
+        raise RuntimeError("missing grades")
+
+
+SCENARIOS = {"chat": chat, "quiz": quiz, "grading": grading}
+
+
+def simulate_student(student: int, iterations: int, seed: int):
+    """One student's session: iterations rounds of chat, quiz and grading in random order"""
+    rng = random.Random(seed + student)
+    timings = defaultdict(list)
+    errors = defaultdict(int)
+
+    for _ in range(iterations):
+        for name in rng.sample(list(SCENARIOS), len(SCENARIOS)):
+            started = time.perf_counter()
+            try:
+                SCENARIOS[name](rng, timings)
+                timings[name].append(time.perf_counter() - started)
+            except Exception as e:
+                errors[name] += 1
+                print(f"❌ {name}: {e}")
+
+    return timings, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test of chat, quiz generation and grading")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent simulated students")
+    parser.add_argument("--iterations", type=int, default=5, help="Rounds of chat + quiz + grading per student")
+    parser.add_argument("--backend", default="fake", help="LLM backend (fake, replay, remote, ...)")
+    parser.add_argument("--latency", type=float, default=None, help="Fake backend: seconds to first token")
+    parser.add_argument("--tps", type=float, default=None, help="Fake backend: tokens per second per request")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.backend == "fake":
+        LLMClient.use_backend(FakeBackend(latency=args.latency, tokens_per_second=args.tps))
+    else:
+        LLMClient.use_backend(args.backend)
+
+    print(f"🚦 {args.users} students x {args.iterations} rounds on the {LLMClient.backend().name} backend")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        results = list(pool.map(lambda s: simulate_student(s, args.iterations, args.seed), range(args.users)))
+    wall = time.perf_counter() - started
+
+    timings = defaultdict(list)
+    errors = defaultdict(int)
+    for student_timings, student_errors in results:
+        for name, values in student_timings.items():
+            timings[name].extend(values)
+        for name, count in student_errors.items():
+            errors[name] += count
+
+    header = f"{'scenario':>10} | {'ok':>5} | {'errors':>6} | {'p50 s':>7} | {'p95 s':>7} | {'max s':>7}"
+    print(header)
+    print("-" * len(header))
+    for name in list(SCENARIOS) + ["chat ttft"]:
+        values = timings.get(name) or [0.0]
+        print(f"{name:>10} | {len(timings.get(name, [])):>5} | {errors.get(name, 0):>6} | "
+              f"{np.percentile(values, 50):>7.2f} | {np.percentile(values, 95):>7.2f} | {max(values):>7.2f}")
+
+    completed = sum(len(timings[name]) for name in SCENARIOS)
+    print(f"\n⏱️ {completed} operations in {wall:.1f}s ({completed / wall:.1f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+SQL statements per page render.
+
+Replays the database calls the Dashboard, Progress, Chat and Quiz pages make on
+a rerun against a scratch SQLite database seeded like benchmarks/check_query_plans,
+inside a UnitOfWork block that counts every statement run on the thread (the
+core helpers' own sessions included). The Quiz header's lookups go through the
+unit's session, as on the page, so repeated lookups show up as cache hits.
+Each render runs twice so the second pass shows a steady-state rerun.
+
+Run from the project root:
+
+    python -m benchmarks.render_queries [--days 60]
+"""
+import tempfile
+import os
+
+# Point the app at a scratch database before database.db_manager is imported
+_workdir = tempfile.mkdtemp(prefix="render-queries-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'render.db')}"
+
+from database.db_manager import engine, SessionLocal, migrate
+from database.models import User, StudentProfile, StudyPlan
+from database.unit_of_work import UnitOfWork, fetch_one
+from core.auth_manager import AuthManager
+from core.day_manager import DayManager
+from core.chat_engine import ChatEngine
+from core.dashboard_service import DashboardService
+from benchmarks.check_query_plans import seed, USER
+from datetime import date
+import contextlib
+import argparse
+import shutil
+import io
+
+
+def quiz_header(uow):
+    """The Quiz page's current-topic lookup"""
+    profile = fetch_one(uow.session, StudentProfile, user_id=USER)
+    fetch_one(uow.session, StudyPlan, user_id=USER, day_number=profile.current_day_number)
+
+
+# Database calls per page, in the order the page script makes them; each gets the open unit
+RENDERS = {
+    "Dashboard": [
+        lambda uow: DayManager.check_and_update_day(USER),
+        lambda uow: DashboardService.get_snapshot(USER),
+    ],
+    "Progress": [
+        lambda uow: DashboardService.get_snapshot(USER),
+    ],
+    "Chat": [
+        lambda uow: AuthManager.get_user_by_id(USER),
+        lambda uow: ChatEngine.get_or_create_session(USER),
+        lambda uow: ChatEngine.get_chat_history(f"{USER}-session-0"),
+        lambda uow: ChatEngine.get_user_context(USER),
+    ],
+    "Quiz": [
+        quiz_header,
+        quiz_header,
+    ],
+}
+
+
+def count_queries(render, name: str) -> tuple:
+    """(statements executed, entity cache hits) for one render"""
+    # The core methods log every lookup; keep the table readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        with UnitOfWork(name) as uow:
+            for call in render:
+                call(uow)
+
+    return uow.stats["queries"], uow.stats["cache_hits"]
+
+
+def prepare(days: int):
+    migrate()
+    seed(engine, users=20, days=days)
+    db = SessionLocal()
+    try:
+        for u in range(20):
+            db.add(User(user_id=f"user-{u}", username=f"user{u}", email=f"user{u}@example.com",
+                        password_hash="-", full_name=f"Student {u}"))
+        # Already active today, so check_and_update_day has nothing to move
+        db.query(StudyPlan).filter(StudyPlan.day_number == days // 2).update(
+            {"tasks": [{"title": "Read", "completed": True}, {"title": "Practice"}]}
+        )
+        db.query(StudentProfile).update({"last_active_date": date.today(), "onboarding_completed": True})
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL statements per page render")
+    parser.add_argument("--days", type=int, default=60)
+    args = parser.parse_args()
+
+    try:
+        prepare(args.days)
+
+        print(f"{'page':>10} | {'statements':>10} | {'cache hits':>10}")
+        print("-" * 38)
+        for name, render in RENDERS.items():
+            for _ in range(2):
+                queries, hits = count_queries(render, name)
+            print(f"{name:>10} | {queries:>10} | {hits:>10}")
+    finally:
+        engine.dispose()
+        shutil.rmtree(_workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -190,8 +190,8 @@ class ChatEngine:
             db.close()
     
     @staticmethod
-    def generate_ai_response(user_id: str, user_message: str, session_id: str):
-        """Generate AI response with full context awareness"""
+    def _build_response_prompt(user_id: str, user_message: str, session_id: str):
+        """Build the reply prompt with full context awareness (progress, history, documents)"""
         
         # Get comprehensive user context
         context = ChatEngine.get_user_context(user_id)
@@ -382,6 +382,13 @@ class ChatEngine:
 
     Your response:"""
         
+        return prompt
+    
+    @staticmethod
+    def generate_ai_response(user_id: str, user_message: str, session_id: str):
+        """Generate AI response with full context awareness"""
+        prompt = ChatEngine._build_response_prompt(user_id, user_message, session_id)
+        
         # Call LLM
         try: 
             ai_response = LLMClient.call_llm(prompt, max_tokens=500, temperature=0.7)
@@ -395,6 +402,30 @@ class ChatEngine:
             print(f"❌ Error generating AI response: {e}")
             return "I'm having trouble connecting right now. Could you try again in a moment? 🤔"
     
+    @staticmethod
+    def stream_ai_response(user_id: str, user_message: str, session_id: str):
+        """
+        Same reply as generate_ai_response, yielded as text deltas while the model
+        writes it. The full reply is saved to the session once the stream finishes
+        """
+        prompt = ChatEngine._build_response_prompt(user_id, user_message, session_id)
+        
+        parts = []
+        try:
+            for delta in LLMClient.stream_llm(prompt, max_tokens=500, temperature=0.7):
+                parts.append(delta)
+                yield delta
+        except Exception as e:
+            print(f"❌ Error streaming AI response: {e}")
+        
+        ai_response = "".join(parts).strip()
+        
+        if not ai_response:
+            ai_response = "I'm having trouble generating a response right now. Could you try again?  🤔"
+            yield ai_response
+        
+        ChatEngine.add_message(session_id, 'ai', ai_response)
+    
     @staticmethod
     def _detect_intent(message:  str):
         """Detect user intent from message"""
@@ -436,7 +467,8 @@ Create a brief, encouraging greeting (2-3 sentences) that:
 
 Your greeting:"""
         
-        greeting = LLMClient.call_llm(prompt, max_tokens=150, temperature=0.8)
+        # Same day, topic and streak -> same greeting, so reuse it for a day
+        greeting = LLMClient.call_llm(prompt, max_tokens=150, temperature=0.8, cache=True, cache_ttl=24 * 3600)
         
         if greeting:
             ChatEngine.add_message(session_id, 'ai', greeting, 'text')
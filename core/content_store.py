@@ -0,0 +1,312 @@
+import os
+from sqlalchemy.exc import IntegrityError
+from database.models import ContentBlob, UploadedResource, EmbeddingJob
+from database.db_manager import SessionLocal
+from llm.embedding_store import embedding_store
+from llm.vector_index import vector_index_cache
+from core.page_store import page_store
+from llm.keyword_index import keyword_index
+
+
+class ContentStore:
+    """
+    Content-addressed storage for uploads, keyed by the SHA-256 of the file bytes
+    (blobs stored before the switch keep their MD5 keys). Identical uploads share
+    one file on disk, one extracted text and one set of embeddings;
+    UploadedResource rows reference the blob and it is deleted when the last of
+    them goes away. Sharing is invisible to users: an upload reports the same
+    result whether or not the content was already stored
+    """
+
+    UPLOAD_DIR = "data/uploads"
+
+    @staticmethod
+    def blob_path(content_hash: str, file_type: str = 'pdf') -> str:
+        return os.path.join(ContentStore.UPLOAD_DIR, f"{content_hash}.{file_type}")
+
+    @staticmethod
+    def acquire(db, content_hash: str, file_bytes: bytes):
+        """
+        Take a reference on an existing blob
+        Returns: the blob, or None if this content hasn't been stored yet
+        """
+        acquired = db.query(ContentBlob).filter(
+            ContentBlob.content_hash == content_hash
+        ).update(
+            {"ref_count": ContentBlob.ref_count + 1},
+            synchronize_session=False
+        )
+
+        if not acquired:
+            return None
+
+        blob = db.query(ContentBlob).filter(ContentBlob.content_hash == content_hash).first()
+
+        if not os.path.exists(blob.file_path):
+            # Same hash, same bytes: restore a file that went missing from this upload
+            with open(blob.file_path, "wb") as f:
+                f.write(file_bytes)
+
+        return blob
+
+    @staticmethod
+    def create(db, content_hash: str, file_bytes: bytes, file_type: str, extract_pages):
+        """
+        Store a new blob: write the file once, extract its pages once, take the first reference.
+        extract_pages(file_path, key) writes the page store and returns its manifest (None if no text)
+        Returns: (blob or None, error message or None, created: bool). created is False when
+        a concurrent upload stored the same content first and this call took a reference on it
+        """
+        file_path = ContentStore.blob_path(content_hash, file_type)
+        with open(file_path, "wb") as f:
+            f.write(file_bytes)
+
+        manifest = extract_pages(file_path, content_hash)
+
+        if not manifest:
+            os.remove(file_path)
+            return None, "Failed to extract text from PDF.  File might be empty or corrupted.", False
+
+        blob = ContentBlob(
+            content_hash=content_hash,
+            file_path=file_path,
+            file_type=file_type,
+            size_bytes=len(file_bytes),
+            text_chars=manifest['num_chars'],
+            num_pages=manifest['num_pages'],
+            embeddings_generated=False,
+            ref_count=1
+        )
+        db.add(blob)
+
+        try:
+            db.flush()
+        except IntegrityError:
+            # Someone stored the same file concurrently; share theirs
+            db.rollback()
+            return ContentStore.acquire(db, content_hash, file_bytes), None, False
+
+        return blob, None, True
+
+    @staticmethod
+    def index_pages(content_hash: str):
+        """Make a new blob's pages keyword-searchable (call after the upload is committed)"""
+        try:
+            keyword_index.index_pages(content_hash, page_store.iter_pages(content_hash))
+        except Exception as e:
+            print(f"⚠️ Keyword indexing failed for {content_hash}: {e}")
+
+    @staticmethod
+    def read_text(resource, max_chars: int = None) -> str:
+        """Extracted text of a resource (only the first max_chars when given)"""
+        key = resource.content_hash or resource.resource_id
+
+        if page_store.exists(key):
+            return page_store.read_text(key, max_chars=max_chars)
+
+        # Not migrated yet: read the deferred legacy column
+        text = ContentStore._legacy_text(resource)
+        return text[:max_chars] if text and max_chars is not None else text
+
+    @staticmethod
+    def open_text(resource):
+        """
+        Text source for chunking: a lazy page iterator when pages are stored,
+        otherwise the legacy text string
+        Returns: (source, num_chars)
+        """
+        key = resource.content_hash or resource.resource_id
+
+        if page_store.exists(key):
+            return page_store.iter_pages(key), page_store.load_manifest(key)['num_chars']
+
+        text = ContentStore._legacy_text(resource) or ""
+        return text, len(text)
+
+    @staticmethod
+    def iter_text(resource):
+        """
+        read_text() as a stream of pieces (pages with their separators), so callers can
+        walk a whole document, character offsets included, without holding it in memory
+        """
+        key = resource.content_hash or resource.resource_id
+
+        if not page_store.exists(key):
+            text = ContentStore._legacy_text(resource)
+            if text:
+                yield text
+            return
+
+        # Same text as page_store.read_text(): pages joined by blank lines, then stripped.
+        # Trailing whitespace is held back until more text follows it
+        leading = True
+        held = ""
+        for page_num, page in enumerate(page_store.iter_pages(key)):
+            piece = page if page_num == 0 else f"\n\n{page}"
+            if leading:
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+                leading = False
+
+            body = piece.rstrip()
+            if body:
+                yield held + body
+                held = piece[len(body):]
+            else:
+                held += piece
+
+    @staticmethod
+    def _legacy_text(resource):
+        db = SessionLocal()
+        try:
+            if resource.content_hash:
+                return db.query(ContentBlob.extracted_text).filter(
+                    ContentBlob.content_hash == resource.content_hash
+                ).scalar()
+
+            return db.query(UploadedResource.extracted_text).filter(
+                UploadedResource.resource_id == resource.resource_id
+            ).scalar()
+        finally:
+            db.close()
+
+    @staticmethod
+    def migrate_legacy_text():
+        """
+        Move text still stored in SQLite into the compressed page store and clear the columns
+        Returns: number of rows migrated
+        """
+        db = SessionLocal()
+        migrated = 0
+        try:
+            # Ids first, then one text at a time, so a large library never sits in memory at once
+            hashes = [content_hash for (content_hash,) in db.query(ContentBlob.content_hash).filter(
+                ContentBlob.extracted_text.isnot(None)
+            ).all()]
+
+            for content_hash in hashes:
+                if page_store.exists(content_hash):
+                    manifest = page_store.load_manifest(content_hash)
+                else:
+                    text = db.query(ContentBlob.extracted_text).filter(
+                        ContentBlob.content_hash == content_hash
+                    ).scalar()
+                    manifest = page_store.write_text(content_hash, text)
+
+                db.query(ContentBlob).filter(ContentBlob.content_hash == content_hash).update(
+                    {"extracted_text": None, "text_chars": manifest['num_chars'], "num_pages": manifest['num_pages']},
+                    synchronize_session=False
+                )
+                db.commit()
+                migrated += 1
+
+            resource_ids = [resource_id for (resource_id,) in db.query(UploadedResource.resource_id).filter(
+                UploadedResource.extracted_text.isnot(None)
+            ).all()]
+
+            for resource_id in resource_ids:
+                text = db.query(UploadedResource.extracted_text).filter(
+                    UploadedResource.resource_id == resource_id
+                ).scalar()
+                manifest = page_store.write_text(resource_id, text)
+
+                db.query(UploadedResource).filter(UploadedResource.resource_id == resource_id).update(
+                    {"extracted_text": None, "text_chars": manifest['num_chars']},
+                    synchronize_session=False
+                )
+                db.commit()
+                migrated += 1
+
+            if migrated:
+                print(f"📦 Moved extracted text of {migrated} upload(s) into the page store")
+
+            return migrated
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def release(db, resource, commit: bool = True):
+        """
+        Delete a resource row (and its embedding jobs) and drop its reference; the
+        blob's file, embeddings and row are removed once nothing references it.
+        Commits the session unless commit=False, in which case the caller commits
+        (e.g. together with the rest of an account deletion) and then passes the
+        returned cleanup to remove_files()
+        """
+        resource_id = resource.resource_id
+        user_id = resource.user_id
+        content_hash = resource.content_hash
+        legacy_file = resource.file_path if not content_hash else None
+
+        # Its embedding jobs reference the row, so they go first (a job the worker is
+        # still running finds nothing left to update when it finishes)
+        db.query(EmbeddingJob).filter(
+            EmbeddingJob.resource_id == resource_id
+        ).delete(synchronize_session=False)
+
+        db.query(UploadedResource).filter(
+            UploadedResource.resource_id == resource_id
+        ).delete(synchronize_session=False)
+
+        freed = None
+        if content_hash:
+            db.query(ContentBlob).filter(ContentBlob.content_hash == content_hash).update(
+                {"ref_count": ContentBlob.ref_count - 1},
+                synchronize_session=False
+            )
+
+            blob = db.query(ContentBlob).filter(
+                ContentBlob.content_hash == content_hash,
+                ContentBlob.ref_count <= 0
+            ).first()
+
+            if blob:
+                freed = blob.file_path
+                db.delete(blob)
+
+        cleanup = {"user_id": user_id, "resource_id": resource_id, "key": None, "file_path": None}
+        if legacy_file:
+            cleanup.update(key=resource_id, file_path=legacy_file)
+        elif freed:
+            cleanup.update(key=content_hash, file_path=freed)
+
+        if commit:
+            db.commit()
+            ContentStore.remove_files([cleanup])
+
+        return cleanup
+
+    @staticmethod
+    def remove_files(cleanups: list):
+        """Delete what release() freed; call only after its rows are committed"""
+        for cleanup in cleanups:
+            key = cleanup["key"]
+            if key:
+                if os.path.exists(cleanup["file_path"]):
+                    os.remove(cleanup["file_path"])
+                embedding_store.delete(key)
+                page_store.delete(key)
+                keyword_index.remove(key)
+                print(f"🗑️ Freed stored content {key}")
+
+            vector_index_cache.drop_resource(cleanup["user_id"], cleanup["resource_id"])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Content store maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("migrate-text", help="Move extracted text out of SQLite into the compressed page store")
+
+    args = parser.parse_args()
+
+    from database.db_manager import ensure_migrated
+    ensure_migrated()
+
+    if args.command == "migrate-text":
+        ContentStore.migrate_legacy_text()
@@ -0,0 +1,138 @@
+"""
+Read model for the Dashboard and Progress pages.
+
+Both pages used to rebuild their numbers on every rerun from separate sessions:
+the profile and today's plan fetched two or three times, every StudyPlan and
+Quiz row loaded to count statuses and average scores in Python. A snapshot is
+instead a handful of indexed queries in one session, with the counting done by
+the database (GROUP BY / aggregates), so its cost depends on one student's row
+count only through index range sizes, not on rows shipped to Python.
+"""
+from database.models import User, StudentProfile, StudyPlan, Quiz
+from database.db_manager import SessionLocal
+from sqlalchemy import func, case, or_, and_
+
+PLAN_STATUSES = ('completed', 'in_progress', 'pending')
+
+
+class DashboardService:
+
+    UPCOMING_DAYS = 3
+    RECENT_QUIZZES = 10
+
+    @staticmethod
+    def get_snapshot(user_id: str):
+        """
+        Everything the Dashboard and Progress pages show, or None without a profile:
+        user, profile, today_plan, today (summary dict), upcoming_plans,
+        plan_counts, total_plans, topics_completed, quiz_count, avg_quiz_score,
+        perfect_quizzes, provisional_quizzes, recent_quizzes
+        """
+        db = SessionLocal()
+        try:
+            # User and profile in one join
+            row = db.query(User, StudentProfile).join(
+                StudentProfile, StudentProfile.user_id == User.user_id
+            ).filter(User.user_id == user_id).first()
+
+            if not row:
+                return None
+            user, profile = row
+
+            snapshot = {"user": user, "profile": profile}
+            snapshot.update(DashboardService._plans(db, user_id, profile))
+            snapshot.update(DashboardService._quizzes(db, user_id))
+            return snapshot
+        except Exception as e:
+            print(f"❌ Error building dashboard snapshot: {e}")
+            return None
+        finally:
+            db.close()
+
+    @staticmethod
+    def _plans(db, user_id: str, profile) -> dict:
+        current_day = profile.current_day_number
+
+        # Today's plan and the next pending days in one index range read
+        window = db.query(StudyPlan).filter(
+            StudyPlan.user_id == user_id,
+            or_(
+                StudyPlan.day_number == current_day,
+                and_(StudyPlan.day_number > current_day, StudyPlan.status == 'pending')
+            )
+        ).order_by(StudyPlan.day_number).limit(DashboardService.UPCOMING_DAYS + 1).all()
+
+        today_plan = next((plan for plan in window if plan.day_number == current_day), None)
+        upcoming = [plan for plan in window if plan.day_number > current_day][:DashboardService.UPCOMING_DAYS]
+
+        plan_counts = dict.fromkeys(PLAN_STATUSES, 0)
+        plan_counts.update(db.query(StudyPlan.status, func.count()).filter(
+            StudyPlan.user_id == user_id
+        ).group_by(StudyPlan.status).all())
+
+        # Completed days per topic, in plan order
+        topics_completed = db.query(StudyPlan.topic, func.count()).filter(
+            StudyPlan.user_id == user_id,
+            StudyPlan.status == 'completed'
+        ).group_by(StudyPlan.topic).order_by(func.min(StudyPlan.day_number)).all()
+
+        return {
+            "today_plan": today_plan,
+            "today": DashboardService._today_summary(profile, today_plan),
+            "upcoming_plans": upcoming,
+            "plan_counts": plan_counts,
+            "total_plans": sum(plan_counts.values()),
+            "topics_completed": [(topic, count) for topic, count in topics_completed],
+        }
+
+    @staticmethod
+    def _quizzes(db, user_id: str) -> dict:
+        # Quizzes still being graded count with their score so far, flagged provisional
+        submitted = (Quiz.user_id == user_id, Quiz.status.in_(Quiz.SUBMITTED_STATUSES))
+
+        quiz_count, avg_score, perfect, provisional = db.query(
+            func.count(),
+            # Same rule as before: only quizzes with a score and a positive max count towards the average
+            func.avg(case(
+                (and_(Quiz.score.isnot(None), Quiz.max_score > 0), Quiz.score * 100.0 / Quiz.max_score)
+            )),
+            func.coalesce(func.sum(case((Quiz.score == Quiz.max_score, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Quiz.status == 'grading', 1), else_=0)), 0)
+        ).filter(*submitted).one()
+
+        recent = db.query(Quiz).filter(*submitted).order_by(
+            Quiz.created_at.desc()
+        ).limit(DashboardService.RECENT_QUIZZES).all()
+
+        return {
+            "quiz_count": quiz_count,
+            "avg_quiz_score": float(avg_score) if avg_score is not None else None,
+            "perfect_quizzes": int(perfect),
+            "provisional_quizzes": int(provisional),
+            "recent_quizzes": recent,
+        }
+
+    @staticmethod
+    def _today_summary(profile, today_plan) -> dict:
+        """Same shape as DayManager.get_today_summary"""
+        if not today_plan:
+            return {
+                "day_number": profile.current_day_number,
+                "topic": "No plan",
+                "tasks_completed": 0,
+                "total_tasks": 0,
+                "streak": profile.streak_count
+            }
+
+        tasks = today_plan.tasks or []
+        completed_tasks = sum(1 for task in tasks if task.get('completed', False))
+
+        return {
+            "day_number": profile.current_day_number,
+            "topic": today_plan.topic,
+            "tasks_completed": completed_tasks,
+            "total_tasks": len(tasks),
+            "progress_percentage": (completed_tasks / len(tasks) * 100) if tasks else 0,
+            "streak": profile.streak_count,
+            "days_remaining": profile.days_remaining
+        }
@@ -101,7 +101,7 @@ class DayManager:
             day_quizzes = db.query(Quiz).filter(
                 Quiz.user_id == user_id,
                 Quiz.day_number == study_plan.day_number,
-                Quiz.status == 'completed'
+                Quiz.status.in_(Quiz.SUBMITTED_STATUSES)
             ).all()
             
             avg_score = 0
@@ -0,0 +1,420 @@
+from database.models import EmbeddingJob, UploadedResource
+from database.db_manager import SessionLocal
+from llm.rag_engine import rag_engine
+from llm.embedding_model import EmbeddingModel
+from llm.chunker import estimate_chunk_count
+from core.content_store import ContentStore
+from core.page_store import page_store
+from llm.keyword_index import keyword_index
+from sqlalchemy import and_, or_
+from datetime import datetime, timedelta
+import numpy as np
+import threading
+import time
+import os
+
+
+class EmbeddingWorker:
+    """
+    Background embedding generation.
+    Jobs live in the embedding_jobs table; a daemon thread claims pending jobs for
+    several documents, streams their chunks and encodes them in large batches
+    """
+
+    # Sentences per model.encode forward pass
+    BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    # Estimated chunks claimed from several documents per round
+    ROUND_CHUNKS = int(os.getenv("EMBEDDING_ROUND_CHUNKS", "2048"))
+    # Progress is written back after every slice of this many chunks
+    PROGRESS_SLICE = BATCH_SIZE * 8
+    POLL_SECONDS = 2
+    # A running job whose heartbeat is older than this belongs to a worker that died
+    JOB_LEASE_SECONDS = int(os.getenv("EMBEDDING_JOB_LEASE", "600"))
+
+    _thread = None
+    _lock = threading.Lock()
+    _wakeup = threading.Event()
+
+    @staticmethod
+    def enqueue(resource_id: str):
+        """
+        Queue a resource for embedding generation
+        Returns: job_id (an existing active job is reused)
+        """
+        db = SessionLocal()
+        try:
+            job = db.query(EmbeddingJob).filter(
+                EmbeddingJob.resource_id == resource_id,
+                EmbeddingJob.status.in_(['pending', 'running'])
+            ).first()
+
+            if not job:
+                resource = db.query(UploadedResource).filter(
+                    UploadedResource.resource_id == resource_id
+                ).first()
+
+                if not resource:
+                    return None
+
+                job = EmbeddingJob(resource_id=resource_id, user_id=resource.user_id, status='pending')
+                db.add(job)
+                db.commit()
+                db.refresh(job)
+
+            EmbeddingWorker._wakeup.set()
+            return job.job_id
+        finally:
+            db.close()
+
+    @staticmethod
+    def enqueue_pending():
+        """Queue every processed resource that still has no embeddings and no active job"""
+        db = SessionLocal()
+        try:
+            active = db.query(EmbeddingJob.resource_id).filter(
+                EmbeddingJob.status.in_(['pending', 'running'])
+            )
+
+            resources = db.query(UploadedResource.resource_id, UploadedResource.user_id).filter(
+                UploadedResource.processed == True,
+                UploadedResource.embeddings_generated == False,
+                ~UploadedResource.resource_id.in_(active)
+            ).all()
+
+            for resource_id, user_id in resources:
+                db.add(EmbeddingJob(resource_id=resource_id, user_id=user_id, status='pending'))
+
+            db.commit()
+
+            if resources:
+                print(f"📥 Queued {len(resources)} resource(s) for embedding")
+                EmbeddingWorker._wakeup.set()
+
+            return len(resources)
+        finally:
+            db.close()
+
+    @staticmethod
+    def get_progress(resource_id: str):
+        """Latest job status for a resource, or None if it was never queued"""
+        db = SessionLocal()
+        try:
+            job = db.query(EmbeddingJob).filter(
+                EmbeddingJob.resource_id == resource_id
+            ).order_by(EmbeddingJob.created_at.desc()).first()
+
+            if not job:
+                return None
+
+            return {
+                "job_id": job.job_id,
+                "status": job.status,
+                "chunks_done": job.chunks_done or 0,
+                "chunks_total": job.chunks_total or 0,
+                "percentage": (job.chunks_done / job.chunks_total * 100) if job.chunks_total else 0,
+                "error": job.error
+            }
+        finally:
+            db.close()
+
+    @staticmethod
+    def has_active_jobs(user_id: str) -> bool:
+        db = SessionLocal()
+        try:
+            return db.query(EmbeddingJob).filter(
+                EmbeddingJob.user_id == user_id,
+                EmbeddingJob.status.in_(['pending', 'running'])
+            ).count() > 0
+        finally:
+            db.close()
+
+    @classmethod
+    def ensure_started(cls):
+        """Start the worker thread once per process (safe to call on every rerun, returns immediately)"""
+        with cls._lock:
+            if cls._thread is not None and cls._thread.is_alive():
+                return
+
+            cls._thread = threading.Thread(target=cls._run, name="embedding-worker", daemon=True)
+            cls._thread.start()
+            print("🚀 Embedding worker started")
+
+    @classmethod
+    def _recover_interrupted_jobs(cls):
+        """
+        Put jobs left 'running' by a worker that died back in the queue. Only jobs whose
+        heartbeat is older than the lease: another live process may still be running the rest
+        Returns: number of jobs requeued
+        """
+        expired = datetime.utcnow() - timedelta(seconds=cls.JOB_LEASE_SECONDS)
+        db = SessionLocal()
+        try:
+            recovered = db.query(EmbeddingJob).filter(
+                EmbeddingJob.status == 'running',
+                or_(
+                    EmbeddingJob.heartbeat_at < expired,
+                    and_(EmbeddingJob.heartbeat_at.is_(None),
+                         or_(EmbeddingJob.started_at.is_(None), EmbeddingJob.started_at < expired))
+                )
+            ).update(
+                {"status": "pending", "chunks_done": 0},
+                synchronize_session=False
+            )
+            db.commit()
+
+            if recovered:
+                print(f"♻️ Requeued {recovered} embedding job(s) whose worker stopped")
+            return recovered
+        finally:
+            db.close()
+
+    @classmethod
+    def _startup(cls):
+        """
+        One-off maintenance before the first round. Runs on the worker thread so a
+        large legacy database never blocks a page render; each step is independent
+        """
+        steps = [
+            ("recover interrupted jobs", cls._recover_interrupted_jobs),
+            ("move legacy text to the page store", ContentStore.migrate_legacy_text),
+            ("backfill the keyword index", lambda: keyword_index.backfill(page_store, rag_engine.store)),
+            ("queue unembedded resources", cls.enqueue_pending),
+        ]
+
+        for name, step in steps:
+            try:
+                step()
+            except Exception as e:
+                print(f"❌ Embedding worker startup ({name}) failed: {e}")
+
+    @classmethod
+    def _run(cls):
+        cls._startup()
+        last_recovery = time.monotonic()
+
+        while True:
+            # Leases also expire while this process runs (another one may have died)
+            if time.monotonic() - last_recovery >= cls.JOB_LEASE_SECONDS:
+                last_recovery = time.monotonic()
+                try:
+                    cls._recover_interrupted_jobs()
+                except Exception as e:
+                    print(f"❌ Embedding job recovery failed: {e}")
+
+            try:
+                worked = cls._process_round()
+            except Exception as e:
+                print(f"❌ Embedding worker error: {e}")
+                import traceback
+                traceback.print_exc()
+                worked = False
+
+            if not worked:
+                cls._wakeup.wait(cls.POLL_SECONDS)
+                cls._wakeup.clear()
+
+    @staticmethod
+    def _claim_job(db, job_id: str) -> bool:
+        """Atomically move a job from pending to running (safe across processes)"""
+        claimed = db.query(EmbeddingJob).filter(
+            EmbeddingJob.job_id == job_id,
+            EmbeddingJob.status == 'pending'
+        ).update(
+            {"status": "running", "started_at": datetime.utcnow(), "heartbeat_at": datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.commit()
+        return claimed == 1
+
+    @staticmethod
+    def _finish_job(db, job_id: str, status: str, error: str = None):
+        db.query(EmbeddingJob).filter(EmbeddingJob.job_id == job_id).update(
+            {"status": status, "error": error, "finished_at": datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.commit()
+
+    @staticmethod
+    def _fail_unfinished(db, job_ids: list, error: Exception):
+        """Jobs this round claimed but never finished are failed rather than left 'running'"""
+        if not job_ids:
+            return
+
+        try:
+            db.query(EmbeddingJob).filter(
+                EmbeddingJob.job_id.in_(job_ids),
+                EmbeddingJob.status == 'running'
+            ).update(
+                {"status": "failed", "error": f"Worker error: {error}", "finished_at": datetime.utcnow()},
+                synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Could not release claimed embedding jobs: {e}")
+
+    @staticmethod
+    def _iter_slices(batch: list, slice_size: int):
+        """Pull chunks lazily from every document's chunk generator, slice_size at a time"""
+        pending = []
+
+        for entry in batch:
+            for chunk in entry['source']:
+                pending.append((entry, chunk))
+                if len(pending) >= slice_size:
+                    yield pending
+                    pending = []
+
+        if pending:
+            yield pending
+
+    @classmethod
+    def _encode_streaming(cls, db, batch: list):
+        """
+        Encode chunks as the chunker yields them, writing progress after every slice
+        along with a heartbeat for every job of the round (documents waiting their turn included)
+        """
+        round_ids = [job_id for entry in batch for job_id in [entry['job_id']] + entry['followers']]
+
+        for piece in cls._iter_slices(batch, cls.PROGRESS_SLICE):
+            embeddings = rag_engine.model.encode([chunk for _, chunk in piece], batch_size=cls.BATCH_SIZE)
+
+            touched = {}
+            for (entry, chunk), embedding in zip(piece, embeddings):
+                entry['chunks'].append(chunk)
+                entry['embeddings'].append(embedding)
+                touched[entry['job_id']] = entry
+
+            for job_id, entry in touched.items():
+                done = len(entry['chunks'])
+                db.query(EmbeddingJob).filter(EmbeddingJob.job_id == job_id).update(
+                    {"chunks_done": done, "chunks_total": max(entry['estimate'], done)},
+                    synchronize_session=False
+                )
+            db.query(EmbeddingJob).filter(
+                EmbeddingJob.job_id.in_(round_ids),
+                EmbeddingJob.status == 'running'
+            ).update({"heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+
+    @classmethod
+    def _process_round(cls) -> bool:
+        """Claim pending jobs up to ~ROUND_CHUNKS chunks, stream-encode them together, save each"""
+        db = SessionLocal()
+        claimed = []
+        try:
+            pending_ids = [job_id for (job_id,) in db.query(EmbeddingJob.job_id).filter(
+                EmbeddingJob.status == 'pending'
+            ).order_by(EmbeddingJob.created_at).limit(50).all()]
+
+            if not pending_ids:
+                return False
+
+            # Claim several documents for one batch; identical content is encoded once
+            batch = []
+            by_key = {}
+            estimated_chunks = 0
+
+            for job_id in pending_ids:
+                if batch and estimated_chunks >= cls.ROUND_CHUNKS:
+                    break
+
+                if not cls._claim_job(db, job_id):
+                    continue
+                claimed.append(job_id)
+
+                job = db.query(EmbeddingJob).filter(EmbeddingJob.job_id == job_id).first()
+                resource = db.query(UploadedResource).filter(
+                    UploadedResource.resource_id == job.resource_id
+                ).first()
+
+                if not resource:
+                    cls._finish_job(db, job_id, 'failed', "Resource not found or no text extracted")
+                    continue
+
+                key = rag_engine.store_key(resource)
+
+                if key in by_key:
+                    by_key[key]['followers'].append(job_id)
+                    continue
+
+                if rag_engine.store.exists(key):
+                    success, message = rag_engine.link_embeddings(resource.resource_id)
+                    cls._finish_job(db, job_id, 'completed' if success else 'failed', None if success else message)
+                    print(f"{'♻️' if success else '❌'} {resource.resource_id}: {message}")
+                    continue
+
+                # Pages stream from the page store straight into the chunker
+                source, num_chars = ContentStore.open_text(resource)
+
+                if not num_chars:
+                    cls._finish_job(db, job_id, 'failed', "Resource not found or no text extracted")
+                    continue
+
+                estimate = estimate_chunk_count(num_chars, EmbeddingModel.max_tokens())
+                job.chunks_total = estimate
+                job.chunks_done = 0
+                db.commit()
+
+                entry = {
+                    'job_id': job_id,
+                    'resource_id': job.resource_id,
+                    'source': rag_engine.iter_chunks(source),
+                    'estimate': estimate,
+                    'chunks': [],
+                    'embeddings': [],
+                    'followers': []
+                }
+                batch.append(entry)
+                by_key[key] = entry
+                estimated_chunks += estimate
+
+            if not batch:
+                return True
+
+            print(f"🧮 Encoding ~{estimated_chunks} chunks from {len(batch)} document(s)")
+
+            try:
+                cls._encode_streaming(db, batch)
+            except Exception as e:
+                db.rollback()
+                for entry in batch:
+                    for job_id in [entry['job_id']] + entry['followers']:
+                        cls._finish_job(db, job_id, 'failed', f"Error generating embeddings: {str(e)}")
+                print(f"❌ Embedding batch failed: {e}")
+                return True
+
+            # Persist each document
+            for entry in batch:
+                job_ids = [entry['job_id']] + entry['followers']
+
+                if not entry['chunks']:
+                    for job_id in job_ids:
+                        cls._finish_job(db, job_id, 'failed', "No text chunks created")
+                    continue
+
+                success, message = rag_engine.save_embeddings(
+                    entry['resource_id'],
+                    np.vstack(entry['embeddings']),
+                    entry['chunks']
+                )
+
+                # Followers share the leader's embeddings (save_embeddings flags every copy)
+                db.query(EmbeddingJob).filter(EmbeddingJob.job_id.in_(job_ids)).update(
+                    {"chunks_total": len(entry['chunks']), "chunks_done": len(entry['chunks'])},
+                    synchronize_session=False
+                )
+                for job_id in job_ids:
+                    cls._finish_job(db, job_id, 'completed' if success else 'failed', None if success else message)
+                print(f"{'✅' if success else '❌'} {entry['resource_id']}: {message}")
+
+            return True
+
+        except Exception as e:
+            db.rollback()
+            # Failed, not pending: a job that crashes the worker would otherwise be retried forever.
+            # enqueue_pending() queues the resource again on the next start
+            cls._fail_unfinished(db, claimed, e)
+            raise
+        finally:
+            db.close()
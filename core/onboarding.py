@@ -16,7 +16,8 @@ class OnboardingManager:
         
         Your greeting: """
         
-        greeting = LLMClient.call_llm(prompt, max_tokens=100, temperature=0.8)
+        # Fixed prompt: every new student can share one cached greeting
+        greeting = LLMClient.call_llm(prompt, max_tokens=100, temperature=0.8, cache=True)
         return greeting if greeting else "Welcome!  Let's create your personalized study plan.  🎓"
     
     @staticmethod
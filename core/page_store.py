@@ -0,0 +1,161 @@
+"""
+On-disk page store for extracted document text.
+
+Each uploaded file (keyed like the embedding store: content hash, or resource id
+for pre-dedup uploads) gets a directory under data/pages:
+
+    <key>/CURRENT                  name of the live version directory
+    <key>/<version>/offsets.npy    int64 byte offsets into pages.bin (n_pages + 1 entries)
+    <key>/<version>/pages.bin      zlib-compressed UTF-8 pages, one record per page
+    <key>/<version>/manifest.json  page and character counts, compression
+
+Versions are written and published through llm.versioned_store, like the
+embedding store's.
+
+Pages are appended as extraction produces them and can be streamed back one at a
+time, so chunking never needs the whole book as a single string. Each page is
+compressed on its own so single pages stay randomly readable.
+"""
+import numpy as np
+from llm.versioned_store import VersionedStore
+from datetime import datetime
+import shutil
+import zlib
+import json
+import os
+
+
+class PageWriter:
+    """Appends pages to a new version dir; the store only sees them once close() repoints CURRENT"""
+
+    def __init__(self, store, key: str):
+        self.store = store
+        self.key = key
+        self.version, self.tmp_dir = store._new_version(key)
+        self.offsets = [0]
+        self.num_chars = 0
+
+        self._file = open(os.path.join(self.tmp_dir, store.PAGES_FILE), 'wb')
+
+    def append(self, text: str):
+        data = zlib.compress((text or "").encode('utf-8'), self.store.COMPRESSION_LEVEL)
+        self._file.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+        self.num_chars += len(text or "")
+
+    def close(self) -> dict:
+        """Finish writing and publish the pages. Returns the manifest"""
+        self._file.close()
+
+        manifest = {
+            "key": self.key,
+            "num_pages": len(self.offsets) - 1,
+            "num_chars": self.num_chars,
+            "compression": "zlib",
+            "stored_bytes": self.offsets[-1],
+            "created_at": datetime.utcnow().isoformat()
+        }
+
+        np.save(os.path.join(self.tmp_dir, self.store.OFFSETS_FILE), np.asarray(self.offsets, dtype=np.int64))
+        with open(os.path.join(self.tmp_dir, self.store.MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+
+        self.store._publish(self.key, self.version)
+
+        return manifest
+
+    def abort(self):
+        self._file.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class PageStore(VersionedStore):
+
+    MANIFEST_FILE = "manifest.json"
+    OFFSETS_FILE = "offsets.npy"
+    PAGES_FILE = "pages.bin"
+
+    COMPRESSION_LEVEL = 6
+
+    def __init__(self, root: str = "data/pages"):
+        super().__init__(root)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self._data_dir(key), self.MANIFEST_FILE))
+
+    def writer(self, key: str) -> PageWriter:
+        """Start (re)writing the pages for a key; use as a context manager"""
+        return PageWriter(self, key)
+
+    def load_manifest(self, key: str, data_dir: str = None) -> dict:
+        with open(os.path.join(data_dir or self._data_dir(key), self.MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _decoder(self, key: str, data_dir: str):
+        """Page decoder for a key (stores written before compression hold plain UTF-8)"""
+        if self.load_manifest(key, data_dir).get("compression") == "zlib":
+            return lambda data: zlib.decompress(data).decode('utf-8')
+        return lambda data: data.decode('utf-8')
+
+    def read_page(self, key: str, page_num: int) -> str:
+        """Read one page (0-based)"""
+        data_dir = self._data_dir(key)
+        offsets = np.load(os.path.join(data_dir, self.OFFSETS_FILE), mmap_mode='r')
+        decode = self._decoder(key, data_dir)
+
+        with open(os.path.join(data_dir, self.PAGES_FILE), 'rb') as f:
+            start, end = int(offsets[page_num]), int(offsets[page_num + 1])
+            f.seek(start)
+            return decode(f.read(end - start))
+
+    def iter_pages(self, key: str):
+        """Stream pages in order without loading the whole document"""
+        data_dir = self._data_dir(key)
+        offsets = np.load(os.path.join(data_dir, self.OFFSETS_FILE))
+        decode = self._decoder(key, data_dir)
+
+        with open(os.path.join(data_dir, self.PAGES_FILE), 'rb') as f:
+            for start, end in zip(offsets[:-1], offsets[1:]):
+                yield decode(f.read(int(end - start)))
+
+    def read_text(self, key: str, max_chars: int = None) -> str:
+        """
+        Whole-document text, pages joined by blank lines.
+        With max_chars, stops reading pages once that much text is available
+        """
+        parts = []
+        length = 0
+
+        for page in self.iter_pages(key):
+            parts.append(page)
+            length += len(page) + 2
+            if max_chars is not None and length >= max_chars:
+                break
+
+        text = "\n\n".join(parts).strip()
+        return text[:max_chars] if max_chars is not None else text
+
+    def write_text(self, key: str, text: str) -> dict:
+        """Store an already-extracted text as a single page"""
+        with self.writer(key) as writer:
+            writer.append(text)
+        return self.load_manifest(key)
+
+    def delete(self, key: str):
+        resource_dir = self._resource_dir(key)
+        if os.path.exists(resource_dir):
+            shutil.rmtree(resource_dir)
+
+
+# Initialize global page store
+page_store = PageStore()
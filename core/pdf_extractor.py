@@ -0,0 +1,119 @@
+"""
+Parallel, page-streamed PDF text extraction.
+
+Pages are split into ranges that are extracted across a shared process pool and
+yielded back in page order as each range finishes. Pages PyPDF2 returns empty
+for (unusual encodings, odd layouts) are retried with pdfplumber when it is
+installed. Small documents are extracted in-process.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
+import PyPDF2
+import os
+
+# Pages handled by one pool task
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "20"))
+# Worker processes in the shared extraction pool
+MAX_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Below this many pages the pool round-trip isn't worth it
+PARALLEL_MIN_PAGES = PAGES_PER_TASK * 2
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Shared pool, started on first use. Spawned (not forked) since the app runs threads"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=MAX_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _fill_empty_pages(file_path: str, start: int, texts: list, empty: list):
+    """Retry pages PyPDF2 couldn't read with pdfplumber (skipped if it isn't installed)"""
+    try:
+        import pdfplumber
+    except ImportError:
+        return
+
+    try:
+        with pdfplumber.open(file_path) as pdf:
+            for page_num in empty:
+                texts[page_num - start] = pdf.pages[page_num].extract_text() or ""
+    except Exception as e:
+        print(f"⚠️ pdfplumber fallback failed: {e}")
+
+
+def extract_page_range(file_path: str, start: int, end: int) -> list:
+    """Extract pages [start, end) of a PDF. Runs inside pool workers"""
+    reader = PyPDF2.PdfReader(file_path)
+    texts = []
+    empty = []
+
+    for page_num in range(start, end):
+        try:
+            text = reader.pages[page_num].extract_text() or ""
+        except Exception:
+            text = ""
+
+        texts.append(text)
+        if not text.strip():
+            empty.append(page_num)
+
+    if empty:
+        _fill_empty_pages(file_path, start, texts, empty)
+
+    return texts
+
+
+def count_pages(file_path: str) -> int:
+    return len(PyPDF2.PdfReader(file_path).pages)
+
+
+def iter_pages(file_path: str):
+    """Yield the text of every page in order, extracting ranges in parallel"""
+    num_pages = count_pages(file_path)
+
+    if num_pages < PARALLEL_MIN_PAGES or MAX_WORKERS <= 1:
+        yield from extract_page_range(file_path, 0, num_pages)
+        return
+
+    ranges = [(start, min(start + PAGES_PER_TASK, num_pages)) for start in range(0, num_pages, PAGES_PER_TASK)]
+    pool = _get_pool()
+    futures = [pool.submit(extract_page_range, file_path, start, end) for start, end in ranges]
+
+    broken = False
+    try:
+        for (start, end), future in zip(ranges, futures):
+            if not broken:
+                try:
+                    texts = future.result()
+                except BrokenProcessPool as e:
+                    # A worker died; finish this document in-process and start a fresh pool next time
+                    print(f"⚠️ PDF extraction pool failed ({e}), continuing in-process")
+                    _reset_pool()
+                    broken = True
+
+            if broken:
+                texts = extract_page_range(file_path, start, end)
+
+            yield from texts
+    finally:
+        for future in futures:
+            future.cancel()
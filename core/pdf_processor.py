@@ -1,14 +1,21 @@
 import os
 from datetime import datetime
-import PyPDF2
 from database.models import UploadedResource
 from database.db_manager import SessionLocal
+from core.content_store import ContentStore
+from core.page_store import page_store
+from core.pdf_extractor import iter_pages
+from llm.keyword_index import keyword_index, query_terms
 import hashlib
+import heapq
+import re
+
+_WORD = re.compile(r"\w+", re.UNICODE)
 
 
 class PDFProcessor:
     
-    UPLOAD_DIR = "data/uploads"
+    UPLOAD_DIR = ContentStore.UPLOAD_DIR
     
     @staticmethod
     def ensure_upload_dir():
@@ -19,54 +26,57 @@ class PDFProcessor:
     @staticmethod
     def upload_pdf(user_id:  str, uploaded_file, topic: str = None):
         """
-        Upload and process PDF file
+        Upload and process PDF file (identical files are stored and extracted once)
         Returns: (success:  bool, message: str, resource_id: str or None)
         """
         try:
             PDFProcessor.ensure_upload_dir()
             
-            # Generate unique filename
-            file_hash = hashlib.md5(uploaded_file.read()).hexdigest()
+            # Content hash identifies the shared blob
+            file_bytes = uploaded_file.read()
+            file_hash = hashlib.sha256(file_bytes).hexdigest()
             uploaded_file.seek(0)  # Reset file pointer
             
             filename = uploaded_file.name
-            safe_filename = f"{user_id}_{file_hash}_{filename}"
-            file_path = os.path.join(PDFProcessor.UPLOAD_DIR, safe_filename)
-            
-            # Save file
-            with open(file_path, "wb") as f:
-                f. write(uploaded_file.getbuffer())
-            
-            # Extract text
-            extracted_text = PDFProcessor._extract_text_from_pdf(file_path)
             
-            if not extracted_text:
-                os.remove(file_path)
-                return False, "Failed to extract text from PDF.  File might be empty or corrupted.", None
-            
-            # Save to database
             db = SessionLocal()
             try:
+                blob = ContentStore.acquire(db, file_hash, file_bytes)
+                created = False
+                
+                if not blob:
+                    blob, error, created = ContentStore.create(
+                        db, file_hash, file_bytes, 'pdf', PDFProcessor._extract_pages_from_pdf
+                    )
+                    if not blob:
+                        db.rollback()
+                        return False, error, None
+                
                 resource = UploadedResource(
                     user_id=user_id,
                     filename=filename,
-                    file_path=file_path,
+                    file_path=blob.file_path,
                     file_type='pdf',
                     topic=topic,
+                    content_hash=file_hash,
+                    text_chars=blob.text_chars,
                     processed=True,
-                    extracted_text=extracted_text,
-                    embeddings_generated=False
+                    embeddings_generated=blob.embeddings_generated
                 )
                 
                 db.add(resource)
                 db.commit()
                 db.refresh(resource)
                 
-                return True, f"✅ PDF uploaded successfully!  Extracted {len(extracted_text)} characters.", resource.resource_id
+                # Only the upload that stored the content indexes it
+                if created:
+                    ContentStore.index_pages(file_hash)
+                
+                # Same message either way, so an upload never reveals what other users have stored
+                return True, f"✅ PDF uploaded successfully!  Extracted {blob.text_chars} characters.", resource.resource_id
                 
             except Exception as e:
                 db.rollback()
-                os.remove(file_path)
                 return False, f"Database error: {str(e)}", None
             finally:
                 db.close()
@@ -75,23 +85,34 @@ class PDFProcessor:
             return False, f"Upload failed: {str(e)}", None
     
     @staticmethod
-    def _extract_text_from_pdf(file_path:  str) -> str:
-        """Extract text from PDF file"""
+    def _extract_pages_from_pdf(file_path:  str, page_key: str):
+        """
+        Extract text from PDF file, pages in parallel, streaming them into the page store
+        Returns: page store manifest, or None if no text was found
+        """
+        writer = page_store.writer(page_key)
         try:
-            text = ""
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                num_pages = len(pdf_reader.pages)
-                
-                for page_num in range(num_pages):
-                    page = pdf_reader.pages[page_num]
-                    text += page. extract_text() + "\n\n"
+            has_text = False
+            
+            for page_text in iter_pages(file_path):
+                writer.append(page_text)
+                has_text = has_text or bool(page_text.strip())
+            
+            if not has_text:
+                writer.abort()
+                return None
             
-            return text.strip()
+            return writer.close()
         
         except Exception as e:
+            writer.abort()
             print(f"Error extracting text:  {e}")
-            return ""
+            return None
+    
+    @staticmethod
+    def get_text(resource, max_chars: int = None) -> str:
+        """Extracted text of a PDF, read from the compressed page store"""
+        return ContentStore.read_text(resource, max_chars=max_chars)
     
     @staticmethod
     def get_user_pdfs(user_id: str):
@@ -130,13 +151,8 @@ class PDFProcessor:
             if not resource:
                 return False, "PDF not found"
             
-            # Delete file
-            if os.path.exists(resource. file_path):
-                os. remove(resource.file_path)
-            
-            # Delete from database
-            db.delete(resource)
-            db.commit()
+            # Shared file and embeddings are only removed with the last reference
+            ContentStore.release(db, resource)
             
             return True, "PDF deleted successfully"
         
@@ -147,46 +163,150 @@ class PDFProcessor:
             db.close()
     
     @staticmethod
-    def search_in_pdf(resource_id: str, query: str, context_chars: int = 500):
-        """Simple keyword search in PDF"""
+    def search_in_pdf(resource_id: str, query: str, context_chars: int = 500, limit: int = 5):
+        """
+        Case-insensitive phrase search in one PDF, in document order
+        Returns: [{position (char offset into get_text()), context, filename}]
+        """
         resource = PDFProcessor.get_pdf_by_id(resource_id)
+        needle = (query or "").lower()
         
-        if not resource or not resource.extracted_text:
+        if not resource or not needle:
             return []
         
-        text = resource.extracted_text. lower()
-        query_lower = query.lower()
-        
+        half = context_chars // 2
         results = []
-        start = 0
+        waiting = []       # hits whose trailing context hasn't been read yet
+        buffer = ""        # document text from offset base on
+        base = 0
+        search_from = 0
         
-        while True:
-            pos = text.find(query_lower, start)
-            if pos == -1:
-                break
+        def close(hit, text_end):
+            start = max(0, hit["position"] - half)
+            end = min(text_end, hit["position"] + len(needle) + half)
+            context = buffer[start - base:end - base]
+            hit["context"] = ("..." if start > 0 else "") + context + ("..." if end < text_end else "")
+        
+        # Pages stream in; only the text around open hits and the last few characters are kept
+        for piece in ContentStore.iter_text(resource):
+            buffer += piece
+            buffer_end = base + len(buffer)
+            lowered = buffer.lower()
             
-            # Get context around match
-            context_start = max(0, pos - context_chars // 2)
-            context_end = min(len(text), pos + len(query_lower) + context_chars // 2)
+            while len(results) < limit:
+                pos = lowered.find(needle, search_from - base)
+                if pos == -1:
+                    break
+                hit = {"position": base + pos, "context": None, "filename": resource.filename}
+                results.append(hit)
+                waiting.append(hit)
+                search_from = base + pos + 1
             
-            context = resource.extracted_text[context_start:context_end]
+            if len(results) < limit:
+                # A match may still start in the last len(needle) - 1 characters
+                search_from = max(search_from, buffer_end - len(needle) + 1)
             
-            # Add ellipsis if needed
-            if context_start > 0:
-                context = "..." + context
-            if context_end < len(text):
-                context = context + "..."
+            # More text follows, so a hit whose context ends before buffer_end gets its "..."
+            for hit in [hit for hit in waiting if hit["position"] + len(needle) + half < buffer_end]:
+                close(hit, buffer_end + 1)
+                waiting.remove(hit)
             
-            results.append({
-                "position": pos,
-                "context": context,
-                "filename": resource.filename
-            })
+            if len(results) >= limit and not waiting:
+                break
             
-            start = pos + 1
+            keep_from = min([hit["position"] - half for hit in waiting] + [search_from - half])
+            keep_from = max(base, keep_from)
+            buffer = buffer[keep_from - base:]
+            base = keep_from
+        
+        for hit in waiting:
+            close(hit, base + len(buffer))
+        
+        return results
+    
+    @staticmethod
+    def search_pages(resource_id: str, query: str, context_chars: int = 500, limit: int = 5):
+        """
+        Ranked keyword search in one PDF, best pages first
+        Returns: [{page (1-based), context (highlighted snippet), score, filename}]
+        """
+        resource = PDFProcessor.get_pdf_by_id(resource_id)
+        
+        if not resource:
+            return []
+        
+        hits = PDFProcessor._rank_pages(resource.user_id, query, limit, resource_id=resource_id,
+                                        context_chars=context_chars)
+        
+        return [
+            {
+                "page": hit["position"] + 1,
+                "context": hit["snippet"],
+                "score": hit["score"],
+                "filename": hit["filename"]
+            }
+            for hit in hits
+        ]
+    
+    @staticmethod
+    def search_documents(user_id: str, query: str, limit: int = 10):
+        """
+        Keyword search across all of a user's PDFs, best pages first
+        Returns: [{resource_id, filename, position (0-based page), score, snippet}]
+        """
+        return PDFProcessor._rank_pages(user_id, query, limit)
+    
+    @staticmethod
+    def _rank_pages(user_id: str, query: str, limit: int, resource_id: str = None, context_chars: int = 100):
+        if keyword_index.available:
+            return keyword_index.search(user_id, query, kind="page", limit=limit,
+                                        resource_id=resource_id, snippet_tokens=context_chars // 6)
+        
+        # No FTS5 (e.g. PostgreSQL): rank pages by query term counts, one page in memory at a time
+        terms = set(query_terms(query))
+        if not terms:
+            return []
+        
+        resources = PDFProcessor.get_user_pdfs(user_id)
+        if resource_id:
+            resources = [resource for resource in resources if resource.resource_id == resource_id]
+        
+        best = []  # min-heap of (score, -order, hit); earlier pages win ties
+        order = 0
+        seen_keys = set()
+        for resource in resources:
+            key = resource.content_hash or resource.resource_id
+            if key in seen_keys or not page_store.exists(key):
+                continue
+            seen_keys.add(key)
             
-            # Limit results
-            if len(results) >= 5:
-                break
+            for page_num, page in enumerate(page_store.iter_pages(key)):
+                words = _WORD.findall(page.lower())
+                score = sum(1 for word in words if word in terms)
+                if not score:
+                    continue
+                
+                order += 1
+                entry = (score, -order, {
+                    "resource_id": resource.resource_id,
+                    "filename": resource.filename,
+                    "position": page_num,
+                    "score": float(score),
+                    "snippet": PDFProcessor._snippet(page, terms, context_chars)
+                })
+                if len(best) < limit:
+                    heapq.heappush(best, entry)
+                elif entry[:2] > best[0][:2]:
+                    heapq.heapreplace(best, entry)
         
-        return results
\ No newline at end of file
+        return [hit for _, _, hit in sorted(best, key=lambda entry: entry[:2], reverse=True)]
+    
+    @staticmethod
+    def _snippet(page: str, terms: set, context_chars: int) -> str:
+        """Text around the first query term on a page"""
+        match = next((m for m in _WORD.finditer(page) if m.group().lower() in terms), None)
+        if not match:
+            return page[:context_chars]
+        start = max(0, match.start() - context_chars // 2)
+        end = min(len(page), match.end() + context_chars // 2)
+        return ("…" if start > 0 else "") + page[start:end] + ("…" if end < len(page) else "")
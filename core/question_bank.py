@@ -0,0 +1,266 @@
+"""
+Pre-generated quiz questions.
+
+Validated questions are stored in the question_bank table, bucketed by
+(subtopic, difficulty, quiz type) and deduplicated on a fingerprint of their
+normalized text. QuizEngine samples a quiz straight from the bank when a bucket
+has enough stock, preferring questions the student hasn't seen in recent quizzes
+and those served least often. A background thread tops up buckets that fall
+below QUESTION_BANK_MIN_STOCK. At startup it also pre-fills the curriculum
+subtopics (PlanGenerator.TOPIC_CURRICULUM) of the subjects students are
+learning.
+"""
+from database.models import BankQuestion, Quiz, StudentProfile
+from database.db_manager import SessionLocal
+from core.plan_generator import PlanGenerator
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+import threading
+import hashlib
+import random
+import re
+import os
+
+QUIZ_TYPES = ('mcq', 'descriptive', 'coding')
+
+_WORDS = re.compile(r"\w+", re.UNICODE)
+
+
+def topic_key(topic: str) -> str:
+    """Bucket key for a topic: case and spacing don't start a new bucket"""
+    return " ".join(topic.lower().split())
+
+
+def fingerprint(question: dict) -> str:
+    """Questions that differ only in case, punctuation or spacing share a fingerprint"""
+    words = _WORDS.findall(str(question.get('question', '')).lower())
+    return hashlib.sha1(" ".join(words).encode('utf-8')).hexdigest()
+
+
+class QuestionBank:
+
+    # Buckets below this many questions are queued for a refill
+    MIN_STOCK = int(os.getenv("QUESTION_BANK_MIN_STOCK", "15"))
+    # A refill generates until the bucket holds this many
+    TARGET_STOCK = int(os.getenv("QUESTION_BANK_TARGET", "30"))
+    # Questions requested per LLM call while refilling
+    GENERATION_BATCH = 10
+    # Quiz types pre-filled for every curriculum subtopic at startup (others fill on demand)
+    WARM_TYPES = [t.strip() for t in os.getenv("QUESTION_BANK_WARM_TYPES", "mcq").split(",") if t.strip() in QUIZ_TYPES]
+    # Recent quizzes whose questions a student shouldn't get again
+    RECENT_QUIZZES = 5
+    # Failed generation attempts per bucket before a refill gives up
+    MAX_FAILED_BATCHES = 2
+
+    _thread = None
+    _lock = threading.Lock()
+    _wakeup = threading.Event()
+    _queue = []
+    _queued = set()
+
+    @staticmethod
+    def stock(topic: str, difficulty: str, quiz_type: str) -> int:
+        db = SessionLocal()
+        try:
+            return db.query(BankQuestion).filter(
+                BankQuestion.topic_key == topic_key(topic),
+                BankQuestion.difficulty == difficulty,
+                BankQuestion.quiz_type == quiz_type
+            ).count()
+        finally:
+            db.close()
+
+    @staticmethod
+    def add_questions(topic: str, difficulty: str, quiz_type: str, questions: list) -> int:
+        """
+        Store validated questions, skipping any already in the bucket
+        Returns: number of questions added
+        """
+        key = topic_key(topic)
+
+        db = SessionLocal()
+        try:
+            existing = {
+                fp for (fp,) in db.query(BankQuestion.fingerprint).filter(
+                    BankQuestion.topic_key == key,
+                    BankQuestion.difficulty == difficulty,
+                    BankQuestion.quiz_type == quiz_type
+                ).all()
+            }
+
+            added = 0
+            for question in questions or []:
+                fp = fingerprint(question)
+                if fp in existing:
+                    continue
+                existing.add(fp)
+
+                try:
+                    # Savepoint per row: another process may have added the same question
+                    with db.begin_nested():
+                        db.add(BankQuestion(
+                            topic_key=key,
+                            topic=topic.strip(),
+                            difficulty=difficulty,
+                            quiz_type=quiz_type,
+                            question=question,
+                            fingerprint=fp
+                        ))
+                    added += 1
+                except IntegrityError:
+                    pass
+
+            db.commit()
+            return added
+        finally:
+            db.close()
+
+    @staticmethod
+    def _recently_seen(db, user_id: str, topic: str, quiz_type: str) -> set:
+        """Fingerprints of questions in the student's last few quizzes on this topic"""
+        recent = db.query(Quiz.questions).filter(
+            Quiz.user_id == user_id,
+            Quiz.topic == topic,
+            Quiz.quiz_type == quiz_type
+        ).order_by(Quiz.created_at.desc()).limit(QuestionBank.RECENT_QUIZZES).all()
+
+        return {fingerprint(question) for (questions,) in recent for question in (questions or [])}
+
+    @staticmethod
+    def sample(user_id: str, topic: str, difficulty: str, quiz_type: str, num_questions: int):
+        """
+        Pick a quiz from the bank
+        Returns: list of questions, or None when the bucket has fewer than num_questions
+        """
+        db = SessionLocal()
+        try:
+            candidates = db.query(
+                BankQuestion.question_id, BankQuestion.fingerprint, BankQuestion.times_served
+            ).filter(
+                BankQuestion.topic_key == topic_key(topic),
+                BankQuestion.difficulty == difficulty,
+                BankQuestion.quiz_type == quiz_type
+            ).all()
+
+            if len(candidates) < num_questions:
+                return None
+
+            seen = QuestionBank._recently_seen(db, user_id, topic, quiz_type)
+
+            # Unseen first, then least served; random among equals
+            ranked = sorted(candidates, key=lambda c: (c.fingerprint in seen, c.times_served or 0, random.random()))
+            chosen_ids = [c.question_id for c in ranked[:num_questions]]
+
+            rows = db.query(BankQuestion).filter(BankQuestion.question_id.in_(chosen_ids)).all()
+            now = datetime.utcnow()
+            for row in rows:
+                row.times_served = (row.times_served or 0) + 1
+                row.last_served_at = now
+
+            questions = [row.question for row in rows]
+            db.commit()
+
+            random.shuffle(questions)
+            return questions
+        finally:
+            db.close()
+
+    # ==================== BACKGROUND REFILL ====================
+
+    @classmethod
+    def request_refill(cls, topic: str, difficulty: str, quiz_type: str):
+        """Queue a bucket for topping up (no-op if it is already queued)"""
+        key = (topic_key(topic), difficulty, quiz_type)
+        if not key[0]:
+            return
+
+        with cls._lock:
+            if key not in cls._queued:
+                cls._queued.add(key)
+                cls._queue.append((topic.strip(), difficulty, quiz_type))
+        cls._wakeup.set()
+
+    @staticmethod
+    def curriculum_buckets():
+        """(subtopic, difficulty, quiz type) for every subject a student is learning"""
+        db = SessionLocal()
+        try:
+            subjects = set()
+            for (topics,) in db.query(StudentProfile.topics_to_learn).all():
+                subjects.update(topics or [])
+        finally:
+            db.close()
+
+        return [
+            (subtopic["topic"], subtopic["difficulty"], quiz_type)
+            for subject in sorted(subjects) if subject in PlanGenerator.TOPIC_CURRICULUM
+            for subtopic in PlanGenerator.TOPIC_CURRICULUM[subject]
+            for quiz_type in QuestionBank.WARM_TYPES
+        ]
+
+    @classmethod
+    def ensure_started(cls):
+        """Start the refill thread once per process (safe to call on every rerun)"""
+        with cls._lock:
+            if cls._thread is not None and cls._thread.is_alive():
+                return
+
+            cls._thread = threading.Thread(target=cls._run, name="question-bank-refill", daemon=True)
+            cls._thread.start()
+            print("🚀 Question bank refiller started")
+
+        for topic, difficulty, quiz_type in cls.curriculum_buckets():
+            cls.request_refill(topic, difficulty, quiz_type)
+
+    @classmethod
+    def _next_bucket(cls):
+        with cls._lock:
+            if not cls._queue:
+                return None
+            topic, difficulty, quiz_type = cls._queue.pop(0)
+            cls._queued.discard((topic_key(topic), difficulty, quiz_type))
+            return topic, difficulty, quiz_type
+
+    @classmethod
+    def _run(cls):
+        while True:
+            bucket = cls._next_bucket()
+
+            if bucket is None:
+                cls._wakeup.wait()
+                cls._wakeup.clear()
+                continue
+
+            try:
+                cls._refill(*bucket)
+            except Exception as e:
+                print(f"❌ Question bank refill error for {bucket}: {e}")
+
+    @classmethod
+    def _refill(cls, topic: str, difficulty: str, quiz_type: str) -> int:
+        """Generate questions until the bucket reaches TARGET_STOCK"""
+        stock = cls.stock(topic, difficulty, quiz_type)
+        if stock >= cls.MIN_STOCK:
+            return 0
+
+        # Generation lives on QuizEngine, which samples from this module
+        from core.quiz_engine import QuizEngine
+
+        added = 0
+        failed = 0
+        while stock < cls.TARGET_STOCK and failed < cls.MAX_FAILED_BATCHES:
+            # Bypass the response cache: a replayed reply would add nothing new
+            questions = QuizEngine._generate_questions(
+                quiz_type, topic, difficulty, cls.GENERATION_BATCH, cache=False
+            )
+            new = cls.add_questions(topic, difficulty, quiz_type, questions)
+
+            if not new:
+                failed += 1
+            added += new
+            stock += new
+
+        if added:
+            print(f"🏦 Question bank: +{added} {quiz_type} ({difficulty}) for '{topic}', {stock} in stock")
+
+        return added
@@ -1,31 +1,72 @@
 from database.models import Quiz, QuizResponse, StudentProfile, StudyPlan
 from database.db_manager import SessionLocal
 from llm.llm_client import LLMClient
+from llm.json_stream import JSONObjectStream, parse_json_objects
+from core.question_bank import QuestionBank
 from datetime import datetime
-import json
+import threading
+import asyncio
+import time
 import re
+import os
 
 
 class QuizEngine:
     
+    # Generated question sets are reused for identical (topic, difficulty, type, count) prompts for a day
+    GENERATION_CACHE_TTL = 24 * 3600
+    
+    # AI grading: 'parallel' sends one request per answer, 'batch' grades all answers in one request
+    GRADING_MODE = os.getenv("QUIZ_GRADING_MODE", "parallel")
+    GRADING_CONCURRENCY = int(os.getenv("QUIZ_GRADING_CONCURRENCY", "5"))
+    # Seconds per answer (twice that for a batch); answers not reviewed in time stay ungraded and are retried
+    GRADING_TIMEOUT = float(os.getenv("QUIZ_GRADING_TIMEOUT", "30"))
+    # Seconds between background re-grading attempts for a quiz with ungraded answers
+    REGRADE_DELAYS = (15, 60, 300)
+    # Seconds between sweeps over every quiz still in 'grading' (also picks them up after a restart)
+    REGRADE_SWEEP_SECONDS = int(os.getenv("QUIZ_REGRADE_SWEEP", "300"))
+    
+    AI_GRADED_TYPES = ('descriptive', 'coding')
+    
+    _regrading = set()
+    _regrade_lock = threading.Lock()
+    _sweeper = None
+    
     @staticmethod
-    def generate_quiz(user_id:  str, topic: str, quiz_type: str = 'mcq', difficulty: str = 'medium', num_questions: int = 5):
-        """Generate AI-powered quiz for a topic"""
+    def generate_quiz(user_id:  str, topic: str, quiz_type: str = 'mcq', difficulty: str = 'medium', num_questions: int = 5,
+                      on_question=None):
+        """
+        Generate AI-powered quiz for a topic
+        on_question(question, count) is called for each question as it becomes ready
+        """
         db = SessionLocal()
         try:
             # Get user's current level for adaptive difficulty
             profile = db.query(StudentProfile).filter(StudentProfile.user_id == user_id).first()
             current_level = profile.current_levels.get(topic, 'beginner') if profile and profile.current_levels else 'beginner'
             
-            # Generate questions using LLM
-            if quiz_type == 'mcq':
-                questions = QuizEngine._generate_mcq_questions(topic, difficulty, num_questions)
-            elif quiz_type == 'descriptive':
-                questions = QuizEngine._generate_descriptive_questions(topic, difficulty, num_questions)
-            elif quiz_type == 'coding':
-                questions = QuizEngine._generate_coding_questions(topic, difficulty, num_questions)
-            else:
-                questions = []
+            # Sample from the question bank; generate with the LLM only when it is short
+            questions = QuestionBank.sample(user_id, topic, difficulty, quiz_type, num_questions)
+            
+            if questions is None:
+                if on_question:
+                    questions = []
+                    for question in QuizEngine.stream_questions(quiz_type, topic, difficulty, num_questions):
+                        questions.append(question)
+                        on_question(question, len(questions))
+                    
+                    # Malformed items only cost a request for the missing ones
+                    missing = num_questions - len(questions)
+                    if missing > 0:
+                        for question in QuizEngine._generate_questions(quiz_type, topic, difficulty, missing, cache=False):
+                            questions.append(question)
+                            on_question(question, len(questions))
+                else:
+                    questions = QuizEngine._generate_questions(quiz_type, topic, difficulty, num_questions)
+                
+                QuestionBank.add_questions(topic, difficulty, quiz_type, questions)
+            
+            QuestionBank.request_refill(topic, difficulty, quiz_type)
             
             if not questions:
                 return None, "Failed to generate quiz questions"
@@ -56,9 +97,109 @@ class QuizEngine:
             db.close()
     
     @staticmethod
-    def _generate_mcq_questions(topic: str, difficulty: str, num_questions: int):
-        """Generate MCQ questions using AI"""
-        prompt = f"""You are a quiz generator. Generate {num_questions} multiple choice questions about {topic} at {difficulty} level.
+    def _question_spec(quiz_type: str):
+        """(prompt builder, validator, max_tokens) for a quiz type, or None"""
+        return {
+            'mcq': (QuizEngine._mcq_prompt, QuizEngine._is_valid_mcq, 3000),
+            'descriptive': (QuizEngine._descriptive_prompt, QuizEngine._is_valid_descriptive, 2500),
+            'coding': (QuizEngine._coding_prompt, QuizEngine._is_valid_coding, 3500)
+        }.get(quiz_type)
+    
+    @staticmethod
+    def _generate_questions(quiz_type: str, topic: str, difficulty: str, num_questions: int, cache: bool = True):
+        """
+        Generate validated questions of one type using AI.
+        Malformed items are dropped one by one; if that leaves the quiz short,
+        only the missing questions are requested again
+        """
+        spec = QuizEngine._question_spec(quiz_type)
+        if not spec:
+            return []
+        
+        build_prompt, is_valid, max_tokens = spec
+        prompt = build_prompt(topic, difficulty, num_questions)
+        
+        response = LLMClient.call_llm(prompt, max_tokens=max_tokens, temperature=0.7,
+                                      cache=cache, cache_ttl=QuizEngine.GENERATION_CACHE_TTL)
+        questions = QuizEngine._parse_questions(response, is_valid)
+        
+        if cache and response and not questions:
+            # Don't keep serving a reply that didn't parse
+            LLMClient.discard_cached(prompt, max_tokens=max_tokens, temperature=0.7)
+        
+        missing = num_questions - len(questions)
+        if questions and missing > 0:
+            print(f"⚠️ {missing} {quiz_type} question(s) unusable, requesting just those")
+            extra = LLMClient.call_llm(build_prompt(topic, difficulty, missing), max_tokens=max_tokens, temperature=0.7)
+            questions += QuizEngine._parse_questions(extra, is_valid)[:missing]
+        
+        print(f"✅ Generated {len(questions)} {quiz_type} questions")
+        return questions[:num_questions]
+    
+    @staticmethod
+    def stream_questions(quiz_type: str, topic: str, difficulty: str, num_questions: int, cache: bool = True):
+        """
+        Yield validated questions one at a time, each as soon as the model
+        finishes writing it (a cached reply yields them all at once)
+        """
+        spec = QuizEngine._question_spec(quiz_type)
+        if not spec:
+            return
+        
+        build_prompt, is_valid, max_tokens = spec
+        parser = JSONObjectStream()
+        produced = 0
+        
+        deltas = LLMClient.stream_llm(build_prompt(topic, difficulty, num_questions), max_tokens=max_tokens,
+                                      temperature=0.7, cache=cache, cache_ttl=QuizEngine.GENERATION_CACHE_TTL)
+        for item in parser.iter_objects(deltas):
+            if not is_valid(item):
+                parser.skipped += 1
+                continue
+            
+            yield item
+            produced += 1
+            if produced >= num_questions:
+                break
+        
+        if parser.skipped:
+            print(f"⚠️ Skipped {parser.skipped} malformed {quiz_type} question(s)")
+    
+    @staticmethod
+    def _parse_questions(response: str, is_valid):
+        """Every valid question object in a reply (malformed or truncated items are skipped)"""
+        if not response:
+            return []
+        
+        items = parse_json_objects(response)
+        questions = [item for item in items if is_valid(item)]
+        
+        if len(questions) < len(items):
+            print(f"⚠️ Skipped {len(items) - len(questions)} invalid question object(s)")
+        if not items:
+            print("❌ No JSON objects found in response")
+            print(f"Response preview: {response[:300]}")
+        
+        return questions
+    
+    @staticmethod
+    def _is_valid_mcq(q: dict):
+        return (all(key in q for key in ['question', 'options', 'correct_answer', 'explanation'])
+                and isinstance(q['options'], list) and len(q['options']) == 4)
+    
+    @staticmethod
+    def _is_valid_descriptive(q: dict):
+        return all(key in q for key in ['question', 'key_points', 'sample_answer'])
+    
+    @staticmethod
+    def _is_valid_coding(q: dict):
+        required_keys = ['question', 'requirements', 'sample_input', 'sample_output', 'sample_solution']
+        return all(key in q for key in required_keys)
+    
+    @staticmethod
+    def _mcq_prompt(topic: str, difficulty: str, num_questions: int):
+        """Prompt for multiple choice questions"""
+        return f"""You are a quiz generator. Generate {num_questions} multiple choice questions about {topic} at {difficulty} level.
 
     IMPORTANT: Return ONLY a valid JSON array. No extra text before or after.
 
@@ -82,62 +223,10 @@ class QuizEngine:
 
     Generate {num_questions} questions now:"""
 
-        # ✅ INCREASED TOKEN LIMIT
-        response = LLMClient.call_llm(prompt, max_tokens=3000, temperature=0.7)
-        
-        if not response:
-            return []
-        
-        try:
-            # Clean response
-            response = response.strip()
-            
-            # Extract JSON array
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                questions = json.loads(json_str)
-                
-                # ✅ VALIDATE PARSED QUESTIONS
-                validated_questions = []
-                for q in questions:
-                    if all(key in q for key in ['question', 'options', 'correct_answer', 'explanation']):
-                        if len(q['options']) == 4:
-                            validated_questions.append(q)
-                
-                print(f"✅ Successfully generated {len(validated_questions)} MCQ questions")
-                return validated_questions
-            else:
-                print("❌ No JSON array found in response")
-                print(f"Response preview: {response[:300]}")
-                return []
-                
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON parsing error: {e}")
-            print(f"Response was: {response[:500]}")
-            
-            # ✅ FALLBACK: Try to salvage partial response
-            try:
-                # Find the last complete question object
-                last_complete = response.rfind('}')
-                if last_complete != -1:
-                    truncated = response[:last_complete + 1] + ']'
-                    questions = json.loads(truncated)
-                    print(f"⚠️ Recovered {len(questions)} questions from partial response")
-                    return questions
-            except:
-                pass
-            
-            return []
-        except Exception as e:
-            print(f"❌ Error parsing MCQ questions: {e}")
-            return []
-
-
     @staticmethod
-    def _generate_descriptive_questions(topic: str, difficulty: str, num_questions: int):
-        """Generate descriptive questions using AI"""
-        prompt = f"""You are a quiz generator. Generate {num_questions} descriptive questions about {topic} at {difficulty} level.
+    def _descriptive_prompt(topic: str, difficulty: str, num_questions: int):
+        """Prompt for descriptive questions"""
+        return f"""You are a quiz generator. Generate {num_questions} descriptive questions about {topic} at {difficulty} level.
 
     IMPORTANT: Return ONLY a valid JSON array. No extra text.
 
@@ -158,41 +247,10 @@ class QuizEngine:
 
     Generate {num_questions} questions now:"""
 
-        # ✅ INCREASED TOKEN LIMIT
-        response = LLMClient.call_llm(prompt, max_tokens=2500, temperature=0.7)
-        
-        if not response:
-            return []
-        
-        try:
-            response = response.strip()
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
-            
-            if json_match:
-                questions = json.loads(json_match.group())
-                
-                # ✅ VALIDATE
-                validated = []
-                for q in questions:
-                    if all(key in q for key in ['question', 'key_points', 'sample_answer']):
-                        validated.append(q)
-                
-                print(f"✅ Generated {len(validated)} descriptive questions")
-                return validated
-            else:
-                print("❌ No JSON found in response")
-                return []
-                
-        except Exception as e:
-            print(f"❌ Error parsing descriptive questions: {e}")
-            print(f"Response: {response[:300]}")
-            return []
-
-
     @staticmethod
-    def _generate_coding_questions(topic: str, difficulty: str, num_questions: int):
-        """Generate coding questions using AI"""
-        prompt = f"""You are a coding quiz generator. Generate {num_questions} coding problems about {topic} at {difficulty} level.
+    def _coding_prompt(topic: str, difficulty: str, num_questions: int):
+        """Prompt for coding problems"""
+        return f"""You are a coding quiz generator. Generate {num_questions} coding problems about {topic} at {difficulty} level.
 
     IMPORTANT: Return ONLY a valid JSON array. No extra text.
 
@@ -214,37 +272,6 @@ class QuizEngine:
     - Escape all special characters properly
 
     Generate {num_questions} problems now:"""
-
-        # ✅ INCREASED TOKEN LIMIT
-        response = LLMClient.call_llm(prompt, max_tokens=3500, temperature=0.7)
-        
-        if not response:
-            return []
-        
-        try:
-            response = response.strip()
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
-            
-            if json_match:
-                questions = json.loads(json_match.group())
-                
-                # ✅ VALIDATE
-                validated = []
-                for q in questions:
-                    required_keys = ['question', 'requirements', 'sample_input', 'sample_output', 'sample_solution']
-                    if all(key in q for key in required_keys):
-                        validated.append(q)
-                
-                print(f"✅ Generated {len(validated)} coding questions")
-                return validated
-            else:
-                print("❌ No JSON found")
-                return []
-                
-        except Exception as e:
-            print(f"❌ Error parsing coding questions: {e}")
-            print(f"Response: {response[:300]}")
-            return []
     
     @staticmethod
     def submit_quiz(quiz_id: str, answers: dict):
@@ -256,7 +283,7 @@ class QuizEngine:
             if not quiz:
                 return False, "Quiz not found"
             
-            if quiz.status == 'completed':
+            if quiz.status in ('completed', 'grading'):
                 return False, "Quiz already completed"
             
             # Grade based on quiz type
@@ -270,9 +297,12 @@ class QuizEngine:
                 score = 0
                 feedback = {}
             
+            # Answers the AI couldn't review yet keep the quiz in 'grading' until they are
+            ungraded = [key for key, entry in feedback.items() if entry.get('pending')]
+            
             # Update quiz
             quiz.score = score
-            quiz.status = 'completed'
+            quiz.status = 'grading' if ungraded else 'completed'
             quiz.attempted_at = datetime.utcnow()
             
             # Save individual responses
@@ -286,19 +316,24 @@ class QuizEngine:
                     question_text=question.get('question', ''),
                     student_answer=answer,
                     correct_answer=question.get('correct_answer', '') if quiz.quiz_type == 'mcq' else '',
+                    # is_correct None marks an answer still waiting for its AI review
                     is_correct=feedback.get(str(i), {}).get('is_correct', False),
-                    points_earned=feedback.get(str(i), {}).get('points', 0),
+                    points_earned=feedback.get(str(i), {}).get('points') or 0,
                     ai_feedback=feedback.get(str(i), {}).get('feedback', '')
                 )
                 db.add(response)
             
             db.commit()
             
+            if ungraded:
+                QuizEngine.schedule_regrade(quiz_id)
+            
             return True, {
                 'score': score,
                 'max_score': quiz.max_score,
                 'percentage': round((score / quiz.max_score) * 100, 1) if quiz.max_score > 0 else 0,
-                'feedback': feedback
+                'feedback': feedback,
+                'ungraded': len(ungraded)
             }
             
         except Exception as e:
@@ -337,24 +372,39 @@ class QuizEngine:
     @staticmethod
     def _grade_descriptive(questions: list, answers: dict, user_id: str):
         """Grade descriptive quiz using AI"""
-        score = 0
-        feedback = {}
+        return QuizEngine._grade_with_ai(questions, answers, **QuizEngine._ai_grading('descriptive'))
+    
+    @staticmethod
+    def _grade_coding(questions: list, answers:  dict, user_id: str):
+        """Grade coding quiz using AI"""
+        return QuizEngine._grade_with_ai(questions, answers, **QuizEngine._ai_grading('coding'))
+    
+    @staticmethod
+    def _ai_grading(quiz_type: str) -> dict:
+        """Prompt pieces and defaults for an AI-graded quiz type"""
+        if quiz_type == 'coding':
+            return {
+                'describe': QuizEngine._describe_coding_answer,
+                'instructions': "Evaluate the code on:\n1. Correctness (does it solve the problem?)\n"
+                                "2. Code quality (is it readable and efficient?)\n3. Meeting requirements",
+                'prompt': QuizEngine._coding_grading_prompt,
+                'max_tokens': 400,
+                'empty_feedback': '❌ No code submitted or too short',
+                'default_feedback': 'Code reviewed.'
+            }
         
-        for i, question in enumerate(questions):
-            student_answer = answers.get(str(i), '')
-            
-            if not student_answer or len(student_answer. strip()) < 10:
-                feedback[str(i)] = {
-                    'is_correct': False,
-                    'points': 0,
-                    'feedback': '❌ Answer too short or empty'
-                }
-                continue
-            
-            # Use AI to grade descriptive answer
-            prompt = f"""Grade this student's answer: 
-
-Question:  {question. get('question', '')}
+        return {
+            'describe': QuizEngine._describe_descriptive_answer,
+            'instructions': "Be fair but constructive. Award partial credit for partially correct answers.",
+            'prompt': QuizEngine._descriptive_grading_prompt,
+            'max_tokens': 300,
+            'empty_feedback': '❌ Answer too short or empty',
+            'default_feedback': 'Good effort!'
+        }
+    
+    @staticmethod
+    def _describe_descriptive_answer(question: dict, student_answer: str):
+        return f"""Question:  {question. get('question', '')}
 
 Key points to cover:  {', '.join(question.get('key_points', []))}
 
@@ -362,60 +412,11 @@ Student's answer:
 {student_answer}
 
 Sample answer:
-{question.get('sample_answer', '')}
-
-Provide feedback in this format:
-Score: [0-10]
-Feedback: [Brief feedback on what was good and what could be improved]
-
-Be fair but constructive. Award partial credit for partially correct answers."""
-
-            ai_response = LLMClient. call_llm(prompt, max_tokens=300, temperature=0.3)
-            
-            # Parse AI response
-            try: 
-                score_match = re.search(r'Score:\s*(\d+)', ai_response)
-                points = int(score_match.group(1)) if score_match else 5
-                points = min(max(points, 0), 10)  # Clamp between 0-10
-                
-                feedback_match = re.search(r'Feedback:\s*(.*)', ai_response, re.DOTALL)
-                ai_feedback = feedback_match.group(1).strip() if feedback_match else 'Good effort!'
-                
-            except: 
-                points = 5
-                ai_feedback = 'Answer received and reviewed.'
-            
-            score += points
-            
-            feedback[str(i)] = {
-                'is_correct':  points >= 7,
-                'points': points,
-                'feedback': ai_feedback
-            }
-        
-        return score, feedback
+{question.get('sample_answer', '')}"""
     
     @staticmethod
-    def _grade_coding(questions: list, answers:  dict, user_id: str):
-        """Grade coding quiz using AI"""
-        score = 0
-        feedback = {}
-        
-        for i, question in enumerate(questions):
-            student_code = answers.get(str(i), '')
-            
-            if not student_code or len(student_code.strip()) < 10:
-                feedback[str(i)] = {
-                    'is_correct': False,
-                    'points': 0,
-                    'feedback': '❌ No code submitted or too short'
-                }
-                continue
-            
-            # Use AI to grade code
-            prompt = f"""Review this student's code:
-
-Problem: {question.get('question', '')}
+    def _describe_coding_answer(question: dict, student_code: str):
+        return f"""Problem: {question.get('question', '')}
 
 Requirements: 
 {chr(10).join('- ' + req for req in question.get('requirements', []))}
@@ -428,7 +429,25 @@ Student's code:
 Sample solution:
 ```
 {question.get('sample_solution', '')}
-```
+```"""
+    
+    @staticmethod
+    def _descriptive_grading_prompt(question: dict, student_answer: str):
+        return f"""Grade this student's answer: 
+
+{QuizEngine._describe_descriptive_answer(question, student_answer)}
+
+Provide feedback in this format:
+Score: [0-10]
+Feedback: [Brief feedback on what was good and what could be improved]
+
+Be fair but constructive. Award partial credit for partially correct answers."""
+    
+    @staticmethod
+    def _coding_grading_prompt(question: dict, student_code: str):
+        return f"""Review this student's code:
+
+{QuizEngine._describe_coding_answer(question, student_code)}
 
 Evaluate the code on:
 1. Correctness (does it solve the problem?)
@@ -438,31 +457,271 @@ Evaluate the code on:
 Provide feedback in this format:
 Score: [0-10]
 Feedback: [Brief feedback on correctness, quality, and improvements]"""
-
-            ai_response = LLMClient.call_llm(prompt, max_tokens=400, temperature=0.3)
+    
+    @staticmethod
+    def _grade_with_ai(questions: list, answers: dict, describe, instructions: str, prompt, max_tokens: int,
+                       empty_feedback: str, default_feedback: str):
+        """
+        Grade every answered question with the LLM, either one request per answer
+        (fanned out concurrently) or all answers in one batched request.
+        Answers whose review fails or times out are marked pending (points None)
+        rather than given a made-up score; regrade_pending() grades them later
+        Returns: (score of the graded answers, feedback)
+        """
+        feedback = {}
+        pending = {}
+        
+        for i, question in enumerate(questions):
+            student_answer = answers.get(str(i), '')
             
-            # Parse AI response
+            if not student_answer or len(student_answer.strip()) < 10:
+                feedback[str(i)] = {
+                    'is_correct': False,
+                    'points': 0,
+                    'feedback': empty_feedback
+                }
+            else:
+                pending[str(i)] = (question, student_answer)
+        
+        if pending:
+            graded = QuizEngine._grade_pending(pending, describe, instructions, prompt, max_tokens, default_feedback)
+            
+            for key in pending:
+                if key in graded:
+                    points, ai_feedback = graded[key]
+                    feedback[key] = {
+                        'is_correct': points >= 7,
+                        'points': points,
+                        'feedback': ai_feedback
+                    }
+                else:
+                    feedback[key] = QuizEngine._ungraded_entry()
+        
+        score = sum(entry['points'] for entry in feedback.values() if entry['points'] is not None)
+        return score, dict(sorted(feedback.items(), key=lambda item: int(item[0])))
+    
+    @staticmethod
+    def _grade_pending(pending: dict, describe, instructions: str, prompt, max_tokens: int, default_feedback: str):
+        """{key: (points, feedback)} for the answers the AI reviewed in time"""
+        graded = {}
+        if QuizEngine.GRADING_MODE == 'batch':
+            graded = QuizEngine._grade_batch(pending, describe, instructions, max_tokens)
+            pending = {key: answer for key, answer in pending.items() if key not in graded}
+            if not pending:
+                return graded
+        
+        graded.update(QuizEngine._grade_concurrently(pending, prompt, max_tokens, default_feedback))
+        return graded
+    
+    @staticmethod
+    def _ungraded_entry():
+        return {
+            'is_correct': None,
+            'points': None,
+            'pending': True,
+            'feedback': "⏳ The AI review wasn't available in time. This answer will be graded shortly."
+        }
+    
+    @staticmethod
+    def _parse_grade(ai_response: str, default_feedback: str):
+        """(points, feedback) from a 'Score: n / Feedback: ...' reply"""
+        score_match = re.search(r'Score:\s*(\d+)', ai_response)
+        points = int(score_match.group(1)) if score_match else 5
+        points = min(max(points, 0), 10)  # Clamp between 0-10
+        
+        feedback_match = re.search(r'Feedback:\s*(.*)', ai_response, re.DOTALL)
+        ai_feedback = feedback_match.group(1).strip() if feedback_match else default_feedback
+        
+        return points, ai_feedback
+    
+    @staticmethod
+    def _grade_concurrently(pending: dict, prompt, max_tokens: int, default_feedback: str):
+        """One grading request per answer, at most GRADING_CONCURRENCY at a time, each with its own timeout"""
+        limit = asyncio.Semaphore(QuizEngine.GRADING_CONCURRENCY)
+        
+        async def grade_one(key, question, student_answer):
+            async with limit:
+                # The timeout reaches the HTTP request itself, which gives up its LLM slot when it expires
+                ai_response = await LLMClient.acall_llm(prompt(question, student_answer), max_tokens=max_tokens,
+                                                        temperature=0.3, timeout=QuizEngine.GRADING_TIMEOUT)
+                if not ai_response:
+                    print(f"⏱️ Grading question {key} failed or timed out")
+                    return key, None
+            
+            return key, QuizEngine._parse_grade(ai_response, default_feedback) if ai_response else None
+        
+        async def grade_all():
+            return await asyncio.gather(*(
+                grade_one(key, question, student_answer)
+                for key, (question, student_answer) in pending.items()
+            ))
+        
+        return {key: grade for key, grade in LLMClient.run_sync(grade_all()) if grade}
+    
+    @staticmethod
+    def _grade_batch(pending: dict, describe, instructions: str, max_tokens: int):
+        """All answers in one request; the reply is a JSON array with one entry per question"""
+        blocks = "\n\n".join(
+            f"### Question {key}\n{describe(question, student_answer)}"
+            for key, (question, student_answer) in pending.items()
+        )
+        
+        prompt = f"""Grade each of these student answers.
+
+{blocks}
+
+{instructions}
+
+IMPORTANT: Return ONLY a valid JSON array, one object per question. No extra text.
+
+Format:
+[
+{{"question": <question number>, "score": <0-10>, "feedback": "Brief feedback on what was good and what could be improved"}}
+]
+
+Be fair but constructive. Award partial credit for partially correct answers."""
+        
+        ai_response = LLMClient.call_llm(prompt, max_tokens=max_tokens * len(pending), temperature=0.3,
+                                         timeout=QuizEngine.GRADING_TIMEOUT * 2)
+        if not ai_response:
+            print("⏱️ Batched grading failed or timed out")
+            return {}
+        
+        # Each entry is parsed on its own: questions missing from a partial or
+        # malformed reply are left out and graded individually by _grade_pending
+        graded = {}
+        for entry in parse_json_objects(ai_response):
+            key = str(entry.get('question'))
+            if key in pending and key not in graded and str(entry.get('score', '')).strip().isdigit():
+                points = min(max(int(entry['score']), 0), 10)
+                graded[key] = (points, str(entry.get('feedback', '')).strip() or 'Answer reviewed.')
+        
+        if len(graded) < len(pending):
+            print(f"⚠️ Batched grading covered {len(graded)}/{len(pending)} answers")
+        
+        return graded
+    
+    @staticmethod
+    def schedule_regrade(quiz_id: str):
+        """Retry a quiz's ungraded answers on a background thread (once per quiz at a time)"""
+        with QuizEngine._regrade_lock:
+            if quiz_id in QuizEngine._regrading:
+                return
+            QuizEngine._regrading.add(quiz_id)
+        
+        def run():
             try:
-                score_match = re.search(r'Score:\s*(\d+)', ai_response)
-                points = int(score_match.group(1)) if score_match else 5
-                points = min(max(points, 0), 10)
-                
-                feedback_match = re.search(r'Feedback:\s*(.*)', ai_response, re.DOTALL)
-                ai_feedback = feedback_match. group(1).strip() if feedback_match else 'Code reviewed.'
+                for delay in QuizEngine.REGRADE_DELAYS:
+                    time.sleep(delay)
+                    try:
+                        if QuizEngine.regrade_pending(quiz_id) == 0:
+                            return
+                    except Exception as e:
+                        print(f"❌ Re-grading quiz {quiz_id} failed: {e}")
+                print(f"⚠️ Quiz {quiz_id} still has ungraded answers; left to the re-grading sweep")
+            finally:
+                with QuizEngine._regrade_lock:
+                    QuizEngine._regrading.discard(quiz_id)
+        
+        threading.Thread(target=run, name="quiz-regrade", daemon=True).start()
+    
+    @staticmethod
+    def regrade_pending(quiz_id: str) -> int:
+        """
+        Grade the answers a quiz was submitted with but the AI couldn't review in time;
+        the quiz is completed once none are left
+        Returns: number of answers still ungraded
+        """
+        db = SessionLocal()
+        try:
+            quiz = db.query(Quiz).filter(Quiz.quiz_id == quiz_id).first()
+            if not quiz or quiz.status != 'grading':
+                return 0
+            
+            responses = db.query(QuizResponse).filter(QuizResponse.quiz_id == quiz_id).all()
+            ungraded = {str(r.question_number): r for r in responses if r.is_correct is None}
+            
+            if ungraded and quiz.quiz_type in QuizEngine.AI_GRADED_TYPES:
+                spec = QuizEngine._ai_grading(quiz.quiz_type)
+                pending = {
+                    key: (quiz.questions[int(key)], response.student_answer)
+                    for key, response in ungraded.items() if int(key) < len(quiz.questions)
+                }
+                graded = QuizEngine._grade_pending(pending, spec['describe'], spec['instructions'], spec['prompt'],
+                                                   spec['max_tokens'], spec['default_feedback'])
                 
-            except:
-                points = 5
-                ai_feedback = 'Code received and reviewed.'
+                for key, (points, ai_feedback) in graded.items():
+                    response = ungraded.pop(key)
+                    response.points_earned = points
+                    response.is_correct = points >= 7
+                    response.ai_feedback = ai_feedback
             
-            score += points
+            quiz.score = sum(r.points_earned or 0 for r in responses)
+            if not ungraded:
+                quiz.status = 'completed'
+                print(f"✅ Quiz {quiz_id} fully graded: {quiz.score}/{quiz.max_score}")
             
-            feedback[str(i)] = {
-                'is_correct': points >= 7,
-                'points': points,
-                'feedback': ai_feedback
-            }
+            db.commit()
+            return len(ungraded)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    @staticmethod
+    def regrade_all() -> int:
+        """
+        Retry every quiz still in 'grading' that this process isn't already re-grading
+        Returns: number of quizzes left in 'grading'
+        """
+        db = SessionLocal()
+        try:
+            quiz_ids = [quiz_id for (quiz_id,) in db.query(Quiz.quiz_id).filter(Quiz.status == 'grading')]
+        finally:
+            db.close()
         
-        return score, feedback
+        remaining = 0
+        for quiz_id in quiz_ids:
+            with QuizEngine._regrade_lock:
+                if quiz_id in QuizEngine._regrading:
+                    remaining += 1
+                    continue
+                QuizEngine._regrading.add(quiz_id)
+            
+            try:
+                if QuizEngine.regrade_pending(quiz_id):
+                    remaining += 1
+            except Exception as e:
+                print(f"❌ Re-grading quiz {quiz_id} failed: {e}")
+                remaining += 1
+            finally:
+                with QuizEngine._regrade_lock:
+                    QuizEngine._regrading.discard(quiz_id)
+        
+        return remaining
+    
+    @staticmethod
+    def ensure_regrade_sweeper():
+        """Start the thread that sweeps quizzes stuck in 'grading' (safe to call on every rerun)"""
+        with QuizEngine._regrade_lock:
+            if QuizEngine._sweeper is not None and QuizEngine._sweeper.is_alive():
+                return
+            
+            QuizEngine._sweeper = threading.Thread(target=QuizEngine._sweep, name="quiz-regrade-sweep", daemon=True)
+            QuizEngine._sweeper.start()
+            print("🚀 Quiz re-grading sweeper started")
+    
+    @staticmethod
+    def _sweep():
+        while True:
+            try:
+                remaining = QuizEngine.regrade_all()
+                if remaining:
+                    print(f"⏳ {remaining} quiz(zes) still waiting for AI grading")
+            except Exception as e:
+                print(f"❌ Quiz re-grading sweep failed: {e}")
+            time.sleep(QuizEngine.REGRADE_SWEEP_SECONDS)
     
     @staticmethod
     def get_quiz_history(user_id: str, limit: int = 10):
@@ -0,0 +1,94 @@
+"""
+Engine construction for any SQLAlchemy URL: connection pool settings and, for
+SQLite, the pragmas applied to every new connection.
+
+SQLite defaults suit a single writer. With many Streamlit sessions sharing one
+file, the rollback journal makes writers block readers, and the 5 s lock wait
+surfaces as "database is locked". Each connection is therefore set up with:
+
+    journal_mode=WAL        readers no longer wait for the writer (and vice versa)
+    synchronous=NORMAL      fsync at checkpoints only; safe with WAL
+    busy_timeout            wait this long for a lock instead of failing
+    cache_size / mmap_size  larger page cache, memory-mapped reads
+
+Server databases (PostgreSQL) take the pool settings only, with pre-ping on by
+default: connections idle in the pool can be closed by the server or a proxy.
+
+Every setting can be overridden from the environment (see README).
+"""
+from sqlalchemy import create_engine, event
+import os
+
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "15000")),
+    # Negative = KiB: 64 MiB of page cache per connection
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+POOL_SETTINGS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    # Seconds before a pooled connection is replaced
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    # Unset = off for SQLite (nothing to drop the connection), on for server databases
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING"),
+}
+
+
+def _flag(value, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    return str(value).lower() in ("1", "true", "yes")
+
+
+def pool_settings(url: str, pool: dict = None) -> dict:
+    """Pool keyword arguments for url's dialect"""
+    settings = dict(POOL_SETTINGS if pool is None else pool)
+    if "pool_pre_ping" in settings:
+        settings["pool_pre_ping"] = _flag(settings["pool_pre_ping"], default=not url.startswith("sqlite"))
+    return settings
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: dict):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            if value is not None and value != "":
+                cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def create_db_engine(url: str, pragmas: dict = None, pool: dict = None, echo: bool = False):
+    """
+    Engine for url with the pool settings above; SQLite file databases also get
+    the pragmas on every connect (pragmas={} gives a bare SQLite connection)
+    """
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    pool = pool_settings(url, pool)
+
+    if not url.startswith("sqlite"):
+        return create_engine(url, echo=echo, **pool)
+
+    in_memory = url in ("sqlite://", "sqlite:///:memory:")
+    busy_seconds = pragmas.get("busy_timeout", 5000) / 1000
+
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": busy_seconds},
+        echo=echo,
+        # An in-memory database lives in a single connection, so it can't be pooled
+        **({} if in_memory else pool)
+    )
+
+    if pragmas and not in_memory:
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+    return engine
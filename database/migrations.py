@@ -0,0 +1,77 @@
+"""
+Schema migrations with Alembic (scripts in migrations/versions).
+
+upgrade_database() runs at startup and brings any database to the latest
+revision: an empty one gets every table from the migrations, and a database.db
+created before migrations existed (tables but no alembic_version) is first
+patched the old way (create_all + missing columns) and stamped as the baseline,
+so its data is kept. With several app replicas, set DB_AUTO_MIGRATE=0 and run
+`alembic upgrade head` once per deploy instead.
+
+Run from the project root:
+
+    python -m database.migrations upgrade|current|history
+"""
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic import command
+from sqlalchemy import inspect
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_REVISION = "0001"
+AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "1").lower() in ("1", "true", "yes")
+
+
+def alembic_config(connection=None) -> Config:
+    """alembic.ini with absolute paths; connection (if given) is used instead of DATABASE_URL"""
+    config = Config(os.path.join(PROJECT_ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(PROJECT_ROOT, "migrations"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def current_revision(engine):
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def upgrade_database(engine, legacy_upgrade=None):
+    """
+    Apply pending migrations. legacy_upgrade() patches an unversioned,
+    pre-migrations database up to the baseline before it is stamped
+    """
+    tables = set(inspect(engine).get_table_names())
+
+    if tables and "alembic_version" not in tables:
+        print("🛠️ Existing database without migration history; stamping it as the baseline")
+        if legacy_upgrade:
+            legacy_upgrade()
+        with engine.begin() as conn:
+            command.stamp(alembic_config(conn), BASELINE_REVISION)
+
+    before = current_revision(engine)
+    with engine.begin() as conn:
+        command.upgrade(alembic_config(conn), "head")
+    after = current_revision(engine)
+
+    if after != before:
+        print(f"✅ Database migrated: {before or 'empty'} → {after}")
+
+
+if __name__ == "__main__":
+    import argparse
+    from database.db_manager import engine, ensure_schema
+
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    parser.add_argument("action", choices=["upgrade", "current", "history"])
+    args = parser.parse_args()
+
+    print(f"🗄️ {engine.url.render_as_string(hide_password=True)}")
+    if args.action == "upgrade":
+        upgrade_database(engine, legacy_upgrade=ensure_schema)
+    elif args.action == "current":
+        print(f"Revision: {current_revision(engine) or 'none'}")
+    else:
+        command.history(alembic_config())
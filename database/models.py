@@ -1,11 +1,15 @@
-from sqlalchemy import Column, String, Integer, JSON, Boolean, Date, DateTime, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, JSON, Boolean, Date, DateTime, ForeignKey, Text, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 import uuid
 
 Base = declarative_base()
 
+# JSON on SQLite, JSONB (binary, indexable) on PostgreSQL
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 
 class User(Base):
     __tablename__ = 'users'
@@ -29,8 +33,8 @@ class StudentProfile(Base):
     profile_id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey('users.user_id'), nullable=False)
     
-    topics_to_learn = Column(JSON, default=list)
-    current_levels = Column(JSON, default=dict)
+    topics_to_learn = Column(JSONType, default=list)
+    current_levels = Column(JSONType, default=dict)
     
     hours_per_day = Column(Integer, default=4)
     
@@ -53,6 +57,10 @@ class StudentProfile(Base):
     # Timestamps
     created_at = Column(DateTime, nullable=True)
     updated_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index('ix_student_profiles_user_id', 'user_id'),
+    )
 
 
 class StudyPlan(Base):
@@ -64,8 +72,8 @@ class StudyPlan(Base):
     day_number = Column(Integer, nullable=False)
     plan_date = Column(Date, nullable=True)  # ← Added this
     topic = Column(String, nullable=False)
-    subtopics = Column(JSON, default=list)
-    tasks = Column(JSON, default=list)  # ← Added this
+    subtopics = Column(JSONType, default=list)
+    tasks = Column(JSONType, default=list)  # ← Added this
     
     estimated_hours = Column(Integer, default=4)
     actual_hours = Column(Integer, nullable=True)  # ← Added this
@@ -74,6 +82,11 @@ class StudyPlan(Base):
     completed_at = Column(DateTime, nullable=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Today's plan (user + day), plan lists ordered by day
+        Index('ix_study_plans_user_day', 'user_id', 'day_number'),
+    )
 
 
 class Quiz(Base):
@@ -86,7 +99,7 @@ class Quiz(Base):
     topic = Column(String, nullable=False)
     quiz_type = Column(String, nullable=False)
     
-    questions = Column(JSON, nullable=False)
+    questions = Column(JSONType, nullable=False)
     
     score = Column(Integer, nullable=True)
     max_score = Column(Integer, nullable=True)  # ← Added this
@@ -95,6 +108,39 @@ class Quiz(Base):
     status = Column(String, default='pending')
     created_at = Column(DateTime, default=datetime.utcnow)
     attempted_at = Column(DateTime, nullable=True)  # ← Added this
+    
+    # Submitted quizzes count in stats; a 'grading' one has answers still waiting
+    # for their AI review, so its score is provisional until it is 'completed'
+    SUBMITTED_STATUSES = ('completed', 'grading')
+    
+    __table_args__ = (
+        # Completed quizzes, newest first (Progress, Dashboard, quiz history)
+        Index('ix_quizzes_user_status_created', 'user_id', 'status', 'created_at'),
+        Index('ix_quizzes_user_status_attempted', 'user_id', 'status', 'attempted_at'),
+    )
+
+
+class BankQuestion(Base):
+    __tablename__ = 'question_bank'
+    
+    question_id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    
+    # Bucket: curriculum subtopic (normalized), difficulty, quiz type
+    topic_key = Column(String, nullable=False)
+    topic = Column(String, nullable=False)
+    difficulty = Column(String, nullable=False)
+    quiz_type = Column(String, nullable=False)
+    
+    question = Column(JSONType, nullable=False)  # same shape as an entry of Quiz.questions
+    fingerprint = Column(String, nullable=False)  # hash of the normalized question text
+    
+    times_served = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_served_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index('ix_question_bank_bucket_fingerprint', 'topic_key', 'difficulty', 'quiz_type', 'fingerprint', unique=True),
+    )
 
 
 class ChatSession(Base):
@@ -106,7 +152,14 @@ class ChatSession(Base):
     started_at = Column(DateTime, default=datetime.utcnow)
     ended_at = Column(DateTime, nullable=True)
     message_count = Column(Integer, default=0)
-    context = Column(JSON, nullable=True, default=dict)  # ← CHANGED # ← CHANGED from Text to JSON# ← Added this
+    context = Column(JSONType, nullable=True, default=dict)  # ← CHANGED # ← CHANGED from Text to JSON# ← Added this
+    
+    __table_args__ = (
+        # The open session (at most one per user); partial, so ended sessions don't bloat it
+        Index('ix_chat_sessions_user_open', 'user_id',
+              sqlite_where=text('ended_at IS NULL'), postgresql_where=text('ended_at IS NULL')),
+        Index('ix_chat_sessions_user_started', 'user_id', 'started_at'),
+    )
 
 
 class ChatMessage(Base):
@@ -120,6 +173,10 @@ class ChatMessage(Base):
     
     timestamp = Column(DateTime, default=datetime.utcnow)  # ← Changed from created_at
     message_type = Column(String, nullable=True)  # ← Added this
+    
+    __table_args__ = (
+        Index('ix_chat_messages_session_timestamp', 'session_id', 'timestamp'),
+    )
 
 
 class UploadedResource(Base):
@@ -134,11 +191,85 @@ class UploadedResource(Base):
     
     topic = Column(String, nullable=True)
     
-    extracted_text = Column(Text, nullable=True)
+    # Shared blob holding the file, text and embeddings (NULL for pre-dedup uploads)
+    content_hash = Column(String, ForeignKey('content_blobs.content_hash'), nullable=True, index=True)
+    blob = relationship('ContentBlob', lazy='joined')
+    
+    # Text lives compressed in the page store; the column only holds not-yet-migrated legacy text
+    extracted_text = deferred(Column(Text, nullable=True))
+    text_chars = Column(Integer, nullable=True)
     processed = Column(Boolean, default=False)
     embeddings_generated = Column(Boolean, default=False)
     
     uploaded_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_uploaded_resources_user_uploaded', 'user_id', 'uploaded_at'),
+    )
+
+
+class ContentBlob(Base):
+    __tablename__ = 'content_blobs'
+    
+    content_hash = Column(String, primary_key=True)  # SHA-256 of the uploaded bytes (MD5 for older blobs)
+    
+    file_path = Column(String, nullable=False)
+    file_type = Column(String, nullable=False)
+    size_bytes = Column(Integer, default=0)
+    
+    extracted_text = deferred(Column(Text, nullable=True))  # legacy, see UploadedResource
+    text_chars = Column(Integer, default=0)
+    num_pages = Column(Integer, default=0)
+    embeddings_generated = Column(Boolean, default=False)
+    
+    ref_count = Column(Integer, default=0)  # UploadedResource rows pointing here
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class EmbeddingJob(Base):
+    __tablename__ = 'embedding_jobs'
+    
+    job_id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    resource_id = Column(String, ForeignKey('uploaded_resources.resource_id'), nullable=False, index=True)
+    user_id = Column(String, ForeignKey('users.user_id'), nullable=False)
+    
+    status = Column(String, default='pending', index=True)  # pending, running, completed, failed
+    chunks_total = Column(Integer, default=0)
+    chunks_done = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    # Refreshed while a worker holds the job; a stale one means the worker is gone
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class SearchDocument(Base):
+    __tablename__ = 'search_documents'
+    
+    # rowid of the matching entry in the search_pages_fts / search_chunks_fts FTS5 tables
+    doc_id = Column(Integer, primary_key=True, autoincrement=True)
+    content_key = Column(String, nullable=False, index=True)  # content hash (or resource id for pre-dedup uploads)
+    kind = Column(String, nullable=False)  # page, chunk
+    position = Column(Integer, nullable=False)  # page number or chunk index
+
+
+class LLMCacheEntry(Base):
+    __tablename__ = 'llm_cache'
+
+    # sha256 of (model, prompt, params)
+    cache_key = Column(String, primary_key=True)
+    model = Column(String, nullable=False)
+    prompt_hash = Column(String, nullable=False)
+    params = Column(JSONType, nullable=True)  # max_tokens, temperature, system prompt hash
+    response = Column(Text, nullable=False)
+    size_bytes = Column(Integer, default=0)
+
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=True, index=True)  # None = never
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True)  # LRU order
 
 
 class ProgressAnalytics(Base):
@@ -148,12 +279,16 @@ class ProgressAnalytics(Base):
     user_id = Column(String, ForeignKey('users.user_id'), nullable=False)
     
     date = Column(Date, nullable=False)
-    topics_covered = Column(JSON, default=list)
+    topics_covered = Column(JSONType, default=list)
     quizzes_attempted = Column(Integer, default=0)
     avg_quiz_score = Column(Integer, nullable=True)
     hours_studied = Column(Integer, default=0)
     tasks_completed = Column(Integer, default=0)
     streak_maintained = Column(Boolean, default=False)
+    
+    __table_args__ = (
+        Index('ix_progress_analytics_user_date', 'user_id', 'date'),
+    )
 
 
 class Notification(Base):
@@ -185,4 +320,8 @@ class QuizResponse(Base):
     points_earned = Column(Integer, default=0)
     ai_feedback = Column(Text, nullable=True)
     
-    submitted_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    submitted_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_quiz_responses_quiz_number', 'quiz_id', 'question_number'),
+    )
\ No newline at end of file
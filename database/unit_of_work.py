@@ -0,0 +1,153 @@
+"""
+Explicit unit of work: one session and an entity cache for a block of page code.
+
+    with UnitOfWork("Quiz") as uow:
+        profile = fetch_one(uow.session, StudentProfile, user_id=user_id)
+        plan = fetch_one(uow.session, StudyPlan, user_id=user_id, day_number=profile.current_day_number)
+
+The session belongs to the block. Code that should share it is handed it
+explicitly, and it is closed when the block ends (rolled back first if the
+block raised), so nothing cached outlives the block. SessionLocal() stays a
+plain factory: helpers called inside the block open their own sessions and
+transactions and can never commit or roll back the block's work.
+
+fetch_one() serves repeated single-row lookups on a unit's session from a cache
+keyed by model and criteria; primary-key lookups go through the session's
+identity map. Writes on the session invalidate the cache for the written model:
+ORM flushes (add, change, delete) and bulk query(...).update()/delete() alike.
+
+Every SQL statement run on the thread while a block is open is counted, the
+helpers' own sessions included. DB_QUERY_LOG=1 prints each unit's count and
+cache hits, and units over DB_QUERY_WARN statements are always reported.
+"""
+from sqlalchemy import event, inspect
+from sqlalchemy.orm.util import identity_key
+import threading
+import time
+import os
+
+QUERY_LOG = os.getenv("DB_QUERY_LOG", "0").lower() in ("1", "true", "yes")
+QUERY_WARN = int(os.getenv("DB_QUERY_WARN", "40"))
+
+_session_factory = None
+_local = threading.local()
+_MISSING = object()
+
+
+def configure(engine, session_factory):
+    """Called by db_manager: session factory for units of work and the per-thread query counter"""
+    global _session_factory
+    _session_factory = session_factory
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_query(conn, cursor, statement, parameters, context, executemany):
+        for uow in _open_units():
+            uow.stats["queries"] += 1
+
+
+def _open_units() -> list:
+    """Units whose with-block is open on this thread, outermost first"""
+    units = getattr(_local, "units", None)
+    if units is None:
+        units = _local.units = []
+    return units
+
+
+def _invalidate(entities: dict, model=None):
+    if model is None:
+        entities.clear()
+        return
+    for key in [key for key in entities if key[0] is model]:
+        del entities[key]
+
+
+class UnitOfWork:
+
+    def __init__(self, name: str = "render"):
+        if _session_factory is None:
+            import database.db_manager  # noqa: F401  (configures the factory and query counter)
+
+        self.session = None
+        self.entities = {}  # (model, criteria) -> entity or None
+        self.stats = {"name": name, "queries": 0, "cache_hits": 0, "started": None}
+
+    def __enter__(self):
+        # Loaded objects stay usable after the block closes the session
+        self.session = _session_factory(expire_on_commit=False)
+        self.session.info["unit_of_work"] = self
+        entities = self.entities
+
+        @event.listens_for(self.session, "after_flush")
+        def _after_flush(session, flush_context):
+            for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+                _invalidate(entities, type(instance))
+
+        @event.listens_for(self.session, "do_orm_execute")
+        def _on_execute(orm_execute_state):
+            if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+                mapper = orm_execute_state.bind_mapper
+                _invalidate(entities, mapper.class_ if mapper is not None else None)
+
+        self.stats["started"] = time.perf_counter()
+        _open_units().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _open_units().remove(self)
+        try:
+            if exc_type is not None:
+                self.session.rollback()
+        finally:
+            self.session.info.pop("unit_of_work", None)
+            self.session.close()
+            self.entities.clear()
+            self._report()
+        return False
+
+    @staticmethod
+    def current():
+        """The innermost unit of work open on this thread, or None"""
+        units = _open_units()
+        return units[-1] if units else None
+
+    def invalidate(self, model=None):
+        """Drop cached lookups for model (or all of them)"""
+        _invalidate(self.entities, model)
+
+    def fetch_one(self, model, criteria: dict):
+        primary_key = [column.key for column in inspect(model).primary_key]
+        if list(criteria) == primary_key:
+            # Identity map: no SQL once the row is loaded
+            if identity_key(model, tuple(criteria.values())) in self.session.identity_map:
+                self.stats["cache_hits"] += 1
+            return self.session.get(model, tuple(criteria.values()))
+
+        key = (model, tuple(sorted(criteria.items())))
+        entity = self.entities.get(key, _MISSING)
+        if entity is not _MISSING:
+            self.stats["cache_hits"] += 1
+            return entity
+
+        entity = self.session.query(model).filter_by(**criteria).first()
+        self.entities[key] = entity
+        return entity
+
+    def _report(self):
+        stats = self.stats
+        elapsed_ms = (time.perf_counter() - stats["started"]) * 1000
+        summary = f"{stats['name']}: {stats['queries']} queries, {stats['cache_hits']} cache hits, {elapsed_ms:.0f} ms"
+        if stats["queries"] > QUERY_WARN:
+            print(f"⚠️ Query-heavy render {summary}")
+        elif QUERY_LOG:
+            print(f"🧮 {summary}")
+
+
+def fetch_one(db, model, **criteria):
+    """
+    db.query(model).filter_by(**criteria).first(), served from the unit of work's
+    cache when db is the session of an open unit
+    """
+    uow = db.info.get("unit_of_work")
+    if uow is not None:
+        return uow.fetch_one(model, criteria)
+    return db.query(model).filter_by(**criteria).first()
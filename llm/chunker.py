@@ -0,0 +1,128 @@
+"""
+Token-aware streaming chunker for RAG.
+
+Text is walked sentence by sentence (sentence ends and blank lines are boundaries)
+without materializing a word list for the whole document. Sentences are packed into
+chunks that fit the embedding model's max sequence length, with a configurable
+token overlap between consecutive chunks. Input can be one string or an iterable
+of page texts, and chunks are yielded lazily.
+"""
+from collections import deque
+import re
+
+# A sentence ends after . ! ? followed by whitespace; a blank line ends a paragraph
+_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+
+# Rough characters-per-token ratio for English WordPiece, used for estimates only
+CHARS_PER_TOKEN = 4
+
+
+class TokenCounter:
+    """Counts and splits text with the model's tokenizer (or a word-based estimate without one)"""
+
+    def __init__(self, tokenizer=None):
+        self.tokenizer = tokenizer
+
+    def count(self, text: str) -> int:
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False))
+        return int(len(text.split()) * 1.3) + 1
+
+    def split(self, text: str, max_tokens: int):
+        """Cut one over-long sentence into pieces of at most max_tokens. Returns [(piece, tokens)]"""
+        if self.tokenizer is not None and getattr(self.tokenizer, "is_fast", False):
+            encoding = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+            offsets = encoding["offset_mapping"]
+
+            pieces = []
+            for start in range(0, len(offsets), max_tokens):
+                window = offsets[start:start + max_tokens]
+                piece = text[window[0][0]:window[-1][1]].strip()
+                if piece:
+                    pieces.append((piece, len(window)))
+            return pieces
+
+        words = text.split()
+        words_per_piece = max(1, int(max_tokens / 1.3))
+        return [
+            (' '.join(words[i:i + words_per_piece]), max_tokens)
+            for i in range(0, len(words), words_per_piece)
+        ]
+
+
+def iter_sentences(source, max_chars: int = None):
+    """
+    Yield whitespace-normalized sentences from a string or an iterable of page strings.
+    With max_chars, an unterminated sentence carried across pages is cut (at a space
+    where possible) once it grows past max_chars, so text without boundaries
+    (tables, OCR output, code) is not rescanned and buffered without limit
+    """
+    pages = [source] if isinstance(source, str) else source
+    carry = ""
+
+    for page in pages:
+        if not page:
+            continue
+
+        # A sentence may continue across a page break
+        text = f"{carry} {page}" if carry else page
+        start = 0
+
+        for match in _BOUNDARY.finditer(text):
+            sentence = ' '.join(text[start:match.start()].split())
+            if sentence:
+                yield sentence
+            start = match.end()
+
+        while max_chars and len(text) - start > max_chars:
+            cut = text.rfind(' ', start, start + max_chars)
+            if cut <= start:
+                cut = start + max_chars
+            sentence = ' '.join(text[start:cut].split())
+            if sentence:
+                yield sentence
+            start = cut
+
+        carry = text[start:]
+
+    sentence = ' '.join(carry.split())
+    if sentence:
+        yield sentence
+
+
+def iter_chunks(source, max_tokens: int = 254, overlap_tokens: int = 32, counter: TokenCounter = None):
+    """
+    Lazily pack sentences into chunks of at most max_tokens tokens.
+    Consecutive chunks share up to overlap_tokens tokens of trailing sentences
+    """
+    counter = counter or TokenCounter()
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+    buffer = deque()        # (sentence, tokens)
+    buffer_tokens = 0
+
+    # Forced splits stay near one chunk's worth of text; split() below trims what is still too long
+    for sentence in iter_sentences(source, max_chars=max_tokens * CHARS_PER_TOKEN):
+        tokens = counter.count(sentence)
+        pieces = counter.split(sentence, max_tokens) if tokens > max_tokens else [(sentence, tokens)]
+
+        for piece, piece_tokens in pieces:
+            if buffer and buffer_tokens + piece_tokens > max_tokens:
+                yield ' '.join(text for text, _ in buffer)
+
+                # Keep a tail of sentences as overlap, as long as the next piece still fits
+                while buffer and (buffer_tokens > overlap_tokens or buffer_tokens + piece_tokens > max_tokens):
+                    _, dropped = buffer.popleft()
+                    buffer_tokens -= dropped
+
+            buffer.append((piece, piece_tokens))
+            buffer_tokens += piece_tokens
+
+    if buffer:
+        yield ' '.join(text for text, _ in buffer)
+
+
+def estimate_chunk_count(num_chars: int, max_tokens: int = 254, overlap_tokens: int = 32) -> int:
+    """Rough number of chunks a text will produce, for progress reporting"""
+    step_chars = max(1, (max_tokens - min(overlap_tokens, max_tokens // 2)) * CHARS_PER_TOKEN)
+    return max(1, -(-num_chars // step_chars))
@@ -0,0 +1,85 @@
+import threading
+import time
+import os
+
+
+class EmbeddingModel:
+    """
+    Process-wide SentenceTransformer, loaded on first use.
+    Importing this module is cheap; the model (and sentence_transformers itself)
+    is only loaded when something needs to encode
+    """
+
+    MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+    _model = None
+    _lock = threading.Lock()
+    _warmup_thread = None
+
+    load_seconds = None
+
+    @classmethod
+    def get(cls):
+        """Return the shared model, loading it exactly once across threads"""
+        if cls._model is None:
+            with cls._lock:
+                if cls._model is None:
+                    started = time.perf_counter()
+
+                    from sentence_transformers import SentenceTransformer
+                    model = SentenceTransformer(cls.MODEL_NAME)
+
+                    cls.load_seconds = time.perf_counter() - started
+                    cls._model = model
+                    print(f"🧠 Loaded embedding model {cls.MODEL_NAME} in {cls.load_seconds:.2f}s")
+
+        return cls._model
+
+    @classmethod
+    def encode(cls, texts, **kwargs):
+        return cls.get().encode(texts, **kwargs)
+
+    @classmethod
+    def tokenizer(cls):
+        """The model's tokenizer (None if the model doesn't expose one)"""
+        return getattr(cls.get(), "tokenizer", None)
+
+    @classmethod
+    def max_tokens(cls) -> int:
+        """Tokens the model actually reads per input, excluding [CLS] and [SEP]"""
+        return (getattr(cls.get(), "max_seq_length", None) or 256) - 2
+
+    @classmethod
+    def is_loaded(cls) -> bool:
+        return cls._model is not None
+
+    @classmethod
+    def warm_up_in_background(cls):
+        """
+        Load the model on a daemon thread so the first chat message doesn't pay for it.
+        Safe to call on every rerun; only the first call starts a thread.
+        Set EMBEDDING_WARMUP=0 to disable
+        """
+        if os.getenv("EMBEDDING_WARMUP", "1") == "0":
+            return
+
+        with cls._lock:
+            if cls._model is not None or cls._warmup_thread is not None:
+                return
+
+            def _warm_up():
+                try:
+                    cls.encode(["warm up"])
+                except Exception as e:
+                    print(f"⚠️ Embedding model warm-up failed: {e}")
+
+            cls._warmup_thread = threading.Thread(target=_warm_up, name="embedding-warmup", daemon=True)
+            cls._warmup_thread.start()
+
+    @classmethod
+    def metrics(cls) -> dict:
+        return {
+            "model": cls.MODEL_NAME,
+            "loaded": cls.is_loaded(),
+            "load_seconds": round(cls.load_seconds, 3) if cls.load_seconds is not None else None
+        }
@@ -0,0 +1,182 @@
+"""
+On-disk embedding store.
+
+Each resource lives in its own directory under data/embeddings, one
+subdirectory per write plus a pointer to the live one:
+
+    <key>/CURRENT                     name of the live version directory
+    <key>/<version>/embeddings.npy    float16 matrix of L2-normalized vectors (opened with mmap)
+    <key>/<version>/offsets.npy       int64 byte offsets into chunks.bin (n_chunks + 1 entries)
+    <key>/<version>/chunks.bin        UTF-8 chunk text, concatenated
+    <key>/<version>/manifest.json     small metadata record
+
+Versions are written and published through llm.versioned_store, so readers
+see either the old store or the new one, never neither.
+
+Searches map the matrix read-only and only read chunk text for the final hits.
+Legacy <key>.pkl files can be converted with:
+
+    python -m llm.embedding_store migrate [--delete-pickles]
+"""
+import numpy as np
+from llm.versioned_store import VersionedStore
+from datetime import datetime
+import argparse
+import shutil
+import pickle
+import json
+import os
+
+
+class EmbeddingStore(VersionedStore):
+
+    FORMAT_VERSION = 1
+
+    MANIFEST_FILE = "manifest.json"
+    EMBEDDINGS_FILE = "embeddings.npy"
+    OFFSETS_FILE = "offsets.npy"
+    CHUNKS_FILE = "chunks.bin"
+
+    def __init__(self, root: str = "data/embeddings"):
+        super().__init__(root)
+
+    def _legacy_path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.pkl")
+
+    def exists(self, key: str) -> bool:
+        """True if the key has been written in the current format"""
+        return os.path.exists(os.path.join(self._data_dir(key), self.MANIFEST_FILE))
+
+    def has_legacy(self, key: str) -> bool:
+        """True if only an old pickle exists for the key"""
+        return os.path.exists(self._legacy_path(key))
+
+    def write(self, key: str, embeddings, chunks: list, filename: str = None) -> dict:
+        """Write embeddings + chunks atomically and return the manifest"""
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(chunks):
+            raise ValueError("Embeddings must be a 2-D array with one row per chunk")
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = (matrix / norms).astype(np.float16)
+
+        encoded = [chunk.encode('utf-8') for chunk in chunks]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(blob) for blob in encoded])
+
+        manifest = {
+            "format_version": self.FORMAT_VERSION,
+            "key": key,
+            "filename": filename,
+            "num_chunks": int(matrix.shape[0]),
+            "dim": int(matrix.shape[1]),
+            "dtype": "float16",
+            "normalized": True,
+            "created_at": datetime.utcnow().isoformat()
+        }
+
+        # Fill a fresh version directory, then atomically repoint CURRENT at it
+        version, version_dir = self._new_version(key)
+
+        np.save(os.path.join(version_dir, self.EMBEDDINGS_FILE), matrix)
+        np.save(os.path.join(version_dir, self.OFFSETS_FILE), offsets)
+        with open(os.path.join(version_dir, self.CHUNKS_FILE), 'wb') as f:
+            for blob in encoded:
+                f.write(blob)
+        with open(os.path.join(version_dir, self.MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+
+        self._publish(key, version)
+
+        return manifest
+
+    def load_manifest(self, key: str) -> dict:
+        with open(os.path.join(self._data_dir(key), self.MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def open_embeddings(self, key: str) -> np.memmap:
+        """Memory-map the (normalized, float16) embedding matrix read-only"""
+        return np.load(os.path.join(self._data_dir(key), self.EMBEDDINGS_FILE), mmap_mode='r')
+
+    def read_chunks(self, key: str, indices) -> list:
+        """Read only the requested chunk texts"""
+        data_dir = self._data_dir(key)
+        offsets = np.load(os.path.join(data_dir, self.OFFSETS_FILE), mmap_mode='r')
+
+        chunks = []
+        with open(os.path.join(data_dir, self.CHUNKS_FILE), 'rb') as f:
+            for idx in indices:
+                start, end = int(offsets[idx]), int(offsets[idx + 1])
+                f.seek(start)
+                chunks.append(f.read(end - start).decode('utf-8'))
+
+        return chunks
+
+    def read_all_chunks(self, key: str) -> list:
+        """Read every chunk text for a key"""
+        manifest = self.load_manifest(key)
+        return self.read_chunks(key, range(manifest["num_chunks"]))
+
+    def delete(self, key: str):
+        """Remove a key in either format"""
+        resource_dir = self._resource_dir(key)
+        if os.path.exists(resource_dir):
+            shutil.rmtree(resource_dir)
+        if os.path.exists(self._legacy_path(key)):
+            os.remove(self._legacy_path(key))
+
+    def migrate_pickle(self, key: str, delete_pickle: bool = False) -> bool:
+        """Convert one legacy <key>.pkl file into the current format"""
+        legacy_path = self._legacy_path(key)
+        if not os.path.exists(legacy_path):
+            return False
+
+        with open(legacy_path, 'rb') as f:
+            data = pickle.load(f)
+
+        self.write(key, data['embeddings'], data['chunks'], data.get('filename'))
+
+        if delete_pickle:
+            os.remove(legacy_path)
+
+        return True
+
+    def migrate_all(self, delete_pickles: bool = False):
+        """Convert every legacy pickle in the store. Returns (migrated, failed)"""
+        migrated, failed = 0, 0
+
+        for name in sorted(os.listdir(self.root)):
+            if not name.endswith('.pkl'):
+                continue
+
+            key = name[:-len('.pkl')]
+            try:
+                self.migrate_pickle(key, delete_pickle=delete_pickles)
+                migrated += 1
+                print(f"✅ Migrated {name}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ Failed to migrate {name}: {e}")
+
+        return migrated, failed
+
+
+# Initialize global embedding store
+embedding_store = EmbeddingStore()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding store maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Convert legacy .pkl embeddings to the mmap format")
+    migrate_parser.add_argument("--root", default="data/embeddings", help="Embeddings directory")
+    migrate_parser.add_argument("--delete-pickles", action="store_true", help="Remove .pkl files after converting them")
+
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        store = EmbeddingStore(args.root)
+        migrated, failed = store.migrate_all(delete_pickles=args.delete_pickles)
+        print(f"📦 Migrated {migrated} file(s), {failed} failed")
@@ -0,0 +1,27 @@
+"""
+Rank fusion for hybrid retrieval.
+
+Reciprocal Rank Fusion scores every candidate by sum(weight / (k + rank)) over the
+rankings it appears in. Only ranks matter, so BM25 scores and cosine similarities
+can be combined without calibrating one against the other.
+"""
+
+# The constant from the original RRF paper; larger values flatten the head of each ranking
+DEFAULT_RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings, k: int = DEFAULT_RRF_K, weights=None, limit: int = None):
+    """
+    Fuse ranked lists of ids (best first)
+    Returns: [(id, fused_score)] best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores = {}
+
+    for ranking, weight in zip(rankings, weights):
+        # An id listed twice in one ranking only counts at its best rank
+        for rank, item in enumerate(dict.fromkeys(ranking), 1):
+            scores[item] = scores.get(item, 0.0) + weight / (k + rank)
+
+    fused = sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+    return fused[:limit] if limit is not None else fused
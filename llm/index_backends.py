@@ -0,0 +1,289 @@
+"""
+Nearest-neighbour backends for the per-user vector index.
+
+Every backend searches an L2-normalized float32 matrix by inner product
+(= cosine similarity) and returns (scores, rows) arrays:
+
+    numpy       exact brute force (default)
+    faiss_flat  exact FAISS IndexFlatIP
+    faiss_hnsw  approximate FAISS HNSW graph
+    faiss_ivf   approximate FAISS inverted lists, for very large libraries
+
+FAISS is optional; if it is not installed the FAISS backends fall back to numpy.
+"""
+import numpy as np
+from collections import deque
+import json
+import os
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+
+def top_k_rows(similarities: np.ndarray, k: int, min_score: float = None):
+    """
+    O(n) top-k selection: mask out scores <= min_score, argpartition the rest,
+    then sort only the k survivors. Returns (scores, rows), best first
+    """
+    if k <= 0:
+        # argpartition(..., -0)[-0:] would select every candidate
+        return np.zeros(0, dtype=similarities.dtype), np.zeros(0, dtype=np.int64)
+
+    if min_score is not None:
+        candidates = np.flatnonzero(similarities > min_score)
+    else:
+        candidates = np.arange(len(similarities))
+
+    if len(candidates) > k:
+        partitioned = np.argpartition(similarities[candidates], -k)[-k:]
+        candidates = candidates[partitioned]
+
+    rows = candidates[np.argsort(similarities[candidates])[::-1]]
+    return similarities[rows], rows
+
+
+class IndexBackend:
+    """Base class for index backends"""
+
+    name = "base"
+    exact = True
+
+    def __init__(self):
+        self.num_rows = 0
+        self.dim = 0
+
+    def build(self, matrix: np.ndarray):
+        raise NotImplementedError
+
+    def add(self, matrix: np.ndarray):
+        """Append rows; backends that cannot grow in place rebuild instead"""
+        raise NotImplementedError
+
+    def search(self, query: np.ndarray, k: int, min_score: float = None):
+        """Return (scores, rows) of the k best rows scoring above min_score, best first"""
+        raise NotImplementedError
+
+    def save(self, path: str) -> bool:
+        """Persist the backend to path; returns False if there is nothing worth saving"""
+        return False
+
+    def load(self, path: str) -> bool:
+        """Load a persisted backend from path; returns False if unavailable"""
+        return False
+
+
+class NumpyBackend(IndexBackend):
+    """
+    Exact brute-force search with a single matrix product.
+    Nothing is persisted: it rebuilds instantly from the embedding store
+    """
+
+    name = "numpy"
+    exact = True
+
+    def __init__(self):
+        super().__init__()
+        self.matrix = None
+
+    def build(self, matrix: np.ndarray):
+        self.matrix = matrix
+        self.num_rows, self.dim = matrix.shape
+
+    def add(self, matrix: np.ndarray):
+        self.build(matrix if self.matrix is None else np.vstack([self.matrix, matrix]))
+
+    def search(self, query: np.ndarray, k: int, min_score: float = None):
+        if self.matrix is None or self.num_rows == 0:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+
+        return top_k_rows(self.matrix @ query, k, min_score)
+
+
+class FaissBackend(IndexBackend):
+    """Shared plumbing for FAISS indexes"""
+
+    def __init__(self):
+        super().__init__()
+        self.index = None
+
+    def _create_index(self, matrix: np.ndarray):
+        raise NotImplementedError
+
+    def build(self, matrix: np.ndarray):
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.num_rows, self.dim = matrix.shape
+        self.index = self._create_index(matrix)
+        self.index.add(matrix)
+
+    def add(self, matrix: np.ndarray):
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.index.add(matrix)
+        self.num_rows += matrix.shape[0]
+
+    def search(self, query: np.ndarray, k: int, min_score: float = None):
+        if self.index is None or self.num_rows == 0 or k <= 0:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+
+        query = np.ascontiguousarray(query.reshape(1, -1), dtype=np.float32)
+        scores, rows = self.index.search(query, min(k, self.num_rows))
+
+        keep = rows[0] >= 0
+        if min_score is not None:
+            keep &= scores[0] > min_score
+        return scores[0][keep], rows[0][keep]
+
+    def save(self, path: str) -> bool:
+        if self.index is None:
+            return False
+        faiss.write_index(self.index, path)
+        return True
+
+    def load(self, path: str) -> bool:
+        if not os.path.exists(path):
+            return False
+        self.index = faiss.read_index(path)
+        self.num_rows, self.dim = self.index.ntotal, self.index.d
+        self._configure()
+        return True
+
+    def _configure(self):
+        """Re-apply search-time parameters (they are not stored in the index file)"""
+        pass
+
+
+class FaissFlatBackend(FaissBackend):
+    """Exact inner-product search in FAISS"""
+
+    name = "faiss_flat"
+    exact = True
+
+    def _create_index(self, matrix: np.ndarray):
+        return faiss.IndexFlatIP(matrix.shape[1])
+
+
+class FaissHNSWBackend(FaissBackend):
+    """Approximate search over an HNSW graph"""
+
+    name = "faiss_hnsw"
+    exact = False
+
+    M = int(os.getenv("RAG_HNSW_M", "32"))
+    EF_CONSTRUCTION = int(os.getenv("RAG_HNSW_EF_CONSTRUCTION", "80"))
+    EF_SEARCH = int(os.getenv("RAG_HNSW_EF_SEARCH", "64"))
+
+    def _create_index(self, matrix: np.ndarray):
+        index = faiss.IndexHNSWFlat(matrix.shape[1], self.M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = self.EF_CONSTRUCTION
+        index.hnsw.efSearch = self.EF_SEARCH
+        return index
+
+    def _configure(self):
+        self.index.hnsw.efSearch = self.EF_SEARCH
+
+
+class FaissIVFBackend(FaissBackend):
+    """Approximate search over inverted lists; needs enough rows to train the coarse quantizer"""
+
+    name = "faiss_ivf"
+    exact = False
+
+    NPROBE = int(os.getenv("RAG_IVF_NPROBE", "8"))
+
+    def _create_index(self, matrix: np.ndarray):
+        num_rows, dim = matrix.shape
+        nlist = max(1, min(int(np.sqrt(num_rows)), num_rows // 39))
+
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(matrix)
+        index.nprobe = min(self.NPROBE, nlist)
+        return index
+
+    def _configure(self):
+        self.index.nprobe = min(self.NPROBE, self.index.nlist)
+
+
+INDEX_BACKENDS = {
+    NumpyBackend.name: NumpyBackend,
+    FaissFlatBackend.name: FaissFlatBackend,
+    FaissHNSWBackend.name: FaissHNSWBackend,
+    FaissIVFBackend.name: FaissIVFBackend,
+}
+
+
+def create_backend(name: str) -> IndexBackend:
+    """Instantiate a backend by name, falling back to exact numpy search"""
+    backend_cls = INDEX_BACKENDS.get(name)
+
+    if backend_cls is None:
+        print(f"⚠️ Unknown index backend '{name}', using numpy")
+        return NumpyBackend()
+
+    if issubclass(backend_cls, FaissBackend) and faiss is None:
+        print(f"⚠️ faiss is not installed, using numpy instead of {name}")
+        return NumpyBackend()
+
+    return backend_cls()
+
+
+class SearchStats:
+    """Rolling latency and sampled recall@k for one index"""
+
+    def __init__(self, backend_name: str, window: int = 1000):
+        self.backend_name = backend_name
+        self.queries = 0
+        self.latencies_ms = deque(maxlen=window)
+        self.recall_samples = deque(maxlen=window)
+
+    def record_latency(self, elapsed_ms: float):
+        self.queries += 1
+        self.latencies_ms.append(elapsed_ms)
+
+    def record_recall(self, recall: float):
+        self.recall_samples.append(recall)
+
+    def summary(self) -> dict:
+        latencies = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        return {
+            "backend": self.backend_name,
+            "queries": self.queries,
+            "mean_ms": round(float(latencies.mean()), 3),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            "recall_at_k": round(float(np.mean(self.recall_samples)), 4) if self.recall_samples else None,
+            "recall_samples": len(self.recall_samples),
+        }
+
+
+def save_backend(backend: IndexBackend, directory: str, signature: str):
+    """Persist a backend next to a small JSON record of what it was built from"""
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    index_path = os.path.join(directory, f"{backend.name}.index")
+    if not backend.save(index_path):
+        return
+
+    with open(os.path.join(directory, f"{backend.name}.json"), 'w', encoding='utf-8') as f:
+        json.dump({"signature": signature, "num_rows": backend.num_rows, "dim": backend.dim}, f)
+
+
+def load_backend(backend: IndexBackend, directory: str, signature: str) -> bool:
+    """Load a persisted backend if it was built from exactly the same rows"""
+    meta_path = os.path.join(directory, f"{backend.name}.json")
+    if not os.path.exists(meta_path):
+        return False
+
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        if meta.get("signature") != signature:
+            return False
+
+        return backend.load(os.path.join(directory, f"{backend.name}.index"))
+    except Exception as e:
+        print(f"⚠️ Could not load persisted {backend.name} index: {e}")
+        return False
@@ -0,0 +1,162 @@
+"""
+Incremental, tolerant extraction of JSON objects from LLM output.
+
+Models asked for "a JSON array of objects" wrap it in prose or code fences,
+leave raw newlines inside strings, add trailing commas, or stop mid-object when
+they run out of tokens. JSONObjectStream scans text as it arrives (a whole
+reply or streamed deltas) and emits each top-level object, whether it sits
+inside an array or stands alone, as soon as its closing brace arrives. Each
+object is parsed on its own, so one malformed item is skipped rather than
+losing the whole batch, and a truncated tail simply never completes.
+
+A reply wrapped in a single key ({"questions": [...]}) yields the objects of
+that array instead of the wrapper. Whether an object is such a wrapper is only
+known once it closes ({"options": [...], "question": ...} is not one), so its
+items are held back until then; flush() releases the items of a wrapper the
+reply never finished.
+"""
+import json
+import re
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+# An object whose first key so far is followed by an array: {"questions": [
+_WRAPPER_KEY = re.compile(r'\{\s*"[^"\\]*"\s*:\s*$')
+
+
+def _loads_tolerant(text: str):
+    """json.loads, retried without trailing commas. None if the object is unusable"""
+    for candidate in (text, _TRAILING_COMMA.sub(r"\1", text)):
+        try:
+            value = json.loads(candidate)
+            return value if isinstance(value, dict) else None
+        except ValueError:
+            continue
+    return None
+
+
+class JSONObjectStream:
+    """Feed text chunks, get back every complete top-level JSON object"""
+
+    def __init__(self):
+        self.depth = 0            # brace depth inside the current object (0 = between objects)
+        self.in_string = False
+        self.escaped = False
+        self.buffer = []          # characters of the object being read
+        self.skipped = 0          # complete objects that failed to parse
+        self.in_array = False     # between the elements of a top-level array (never unwrapped)
+        self._reset_wrapper()
+
+    def _reset_wrapper(self):
+        self.wrapped = None       # items of the current object's first-key array, if it has one
+        self.wrapped_skipped = 0  # of those, items that failed to parse
+        self.array_depth = 0      # bracket depth inside that array
+        self.extra_key = False    # the object has a key after the array: not a wrapper
+        self.item_start = None    # buffer offset of the wrapped item being read
+
+    def feed(self, chunk: str) -> list:
+        """Consume more text. Returns the objects completed by it, in order"""
+        completed = []
+
+        for char in chunk:
+            if self.depth == 0:
+                # Between objects: commas, prose and fences are ignored
+                if char == "{":
+                    self.depth = 1
+                    self.buffer = [char]
+                elif char in "[]":
+                    self.in_array = char == "["
+                continue
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                elif char in _CONTROL_ESCAPES:
+                    # Raw newlines/tabs inside strings are invalid JSON; models emit them anyway
+                    char = _CONTROL_ESCAPES[char]
+                self.buffer.append(char)
+                continue
+
+            if self.depth == 1:
+                self._track_wrapper(char)
+
+            self.buffer.append(char)
+
+            if char == '"':
+                self.in_string = True
+            elif char == "{":
+                self.depth += 1
+                if self.depth == 2 and self.array_depth == 1 and not self.extra_key:
+                    self.item_start = len(self.buffer) - 1
+            elif char == "}":
+                self.depth -= 1
+                if self.depth == 1 and self.item_start is not None:
+                    value = _loads_tolerant("".join(self.buffer[self.item_start:]))
+                    if value is None:
+                        self.wrapped_skipped += 1
+                    else:
+                        self.wrapped.append(value)
+                    self.item_start = None
+                elif self.depth == 0:
+                    self._close(completed)
+
+        return completed
+
+    def _track_wrapper(self, char: str):
+        """Follow the structure of the current object at its top level"""
+        if char == "[":
+            if self.array_depth:
+                self.array_depth += 1
+            elif self.wrapped is None and not self.in_array and _WRAPPER_KEY.match("".join(self.buffer)):
+                self.wrapped = []
+                self.array_depth = 1
+        elif char == "]" and self.array_depth:
+            self.array_depth -= 1
+        elif char == "," and not self.array_depth and self.wrapped is not None:
+            self.extra_key = True
+
+    def _is_wrapper(self) -> bool:
+        return self.wrapped is not None and not self.extra_key and bool(self.wrapped or self.wrapped_skipped)
+
+    def _close(self, completed: list):
+        if self._is_wrapper():
+            completed.extend(self.wrapped)
+            self.skipped += self.wrapped_skipped
+        else:
+            value = _loads_tolerant("".join(self.buffer))
+            if value is None:
+                self.skipped += 1
+            else:
+                completed.append(value)
+
+        self.buffer = []
+        self._reset_wrapper()
+
+    def flush(self) -> list:
+        """End of input: the complete items of a single-key wrapper that was cut off"""
+        completed = []
+        if self.depth and self._is_wrapper():
+            completed.extend(self.wrapped)
+            self.skipped += self.wrapped_skipped
+
+        self.depth = 0
+        self.in_string = self.escaped = False
+        self.buffer = []
+        self._reset_wrapper()
+        return completed
+
+    def iter_objects(self, chunks):
+        """Yield objects from an iterable of text chunks as each one completes"""
+        for chunk in chunks:
+            yield from self.feed(chunk)
+        yield from self.flush()
+
+
+def parse_json_objects(text: str) -> list:
+    """Every complete, parseable top-level object in a full reply"""
+    stream = JSONObjectStream()
+    return stream.feed(text or "") + stream.flush()
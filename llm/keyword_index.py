@@ -0,0 +1,271 @@
+"""
+Keyword (BM25) index over uploaded documents, backed by SQLite FTS5.
+
+Page text and chunk text go into two FTS5 tables (search_pages_fts and
+search_chunks_fts) whose rowids point at search_documents rows. Those rows
+record which content key and page/chunk each entry came from. Entries are keyed
+like the embedding store, so a file uploaded by many users is indexed once.
+Searches are scoped to a user's documents and return BM25-ranked hits with
+highlighted snippets.
+"""
+from database.db_manager import engine, SessionLocal
+from database.models import SearchDocument, UploadedResource
+from sqlalchemy import text
+import threading
+import re
+
+KINDS = {
+    "page": "search_pages_fts",
+    "chunk": "search_chunks_fts"
+}
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Function words that match nearly every page; an OR query over them ranks noise
+STOPWORDS = frozenset("""
+a about above after again all am an and any are as at be because been before being below between both but
+by can could did do does doing down during each few for from further had has have having he her here hers
+him his how i if in into is it its itself just me more most my no nor not now of off on once only or other
+our ours out over own same she should so some such than that the their theirs them then there these they
+this those through to too under until up very was we were what when where which while who whom why will
+with would you your yours yourself thanks thank please ok okay yes hi hello hey
+""".split())
+
+
+def query_terms(query: str) -> list:
+    """Searchable tokens of free text: lowercased, without stopwords and single characters, in order"""
+    return list(dict.fromkeys(
+        token for token in _TOKEN.findall((query or "").lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ))
+
+
+def to_match_query(query: str, match_all: bool = False):
+    """
+    Turn free text into a safe FTS5 query: every search term quoted, joined with OR
+    (or AND with match_all). None when the query has no searchable terms, so small
+    talk ("thanks, that is helpful") never produces keyword hits
+    """
+    tokens = query_terms(query)
+    if not tokens:
+        return None
+    return (" AND " if match_all else " OR ").join(f'"{token}"' for token in tokens)
+
+
+class KeywordIndex:
+
+    def __init__(self, bind=None):
+        # Any SQLite engine works (the evaluation harness uses an in-memory one)
+        self.engine = bind if bind is not None else engine
+        self._ready = None
+        self._lock = threading.Lock()
+        # Bumped on every write, so results memoized against the index can tell they are stale
+        self.generation = 0
+
+    @property
+    def available(self) -> bool:
+        """True once the FTS5 tables exist (SQLite with FTS5 compiled in)"""
+        if self._ready is None:
+            with self._lock:
+                if self._ready is None:
+                    self._ready = self._ensure_tables()
+        return self._ready
+
+    def _ensure_tables(self) -> bool:
+        if self.engine.dialect.name != "sqlite":
+            print("⚠️ Keyword search needs SQLite FTS5; it is disabled for this database")
+            return False
+
+        try:
+            with self.engine.begin() as conn:
+                for table in KINDS.values():
+                    conn.execute(text(
+                        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+                        f"body, tokenize = 'porter unicode61 remove_diacritics 2')"
+                    ))
+            return True
+        except Exception as e:
+            print(f"⚠️ Keyword search unavailable: {e}")
+            return False
+
+    def has(self, key: str, kind: str) -> bool:
+        if not self.available:
+            return False
+
+        with self.engine.connect() as conn:
+            return conn.execute(
+                text("SELECT 1 FROM search_documents WHERE content_key = :key AND kind = :kind LIMIT 1"),
+                {"key": key, "kind": kind}
+            ).first() is not None
+
+    def index(self, key: str, kind: str, texts):
+        """(Re)index the pages or chunks of one content key"""
+        if not self.available:
+            return 0
+
+        table = KINDS[kind]
+        count = 0
+
+        with self.engine.begin() as conn:
+            self._delete(conn, key, kind)
+
+            for position, body in enumerate(texts):
+                if not body or not body.strip():
+                    continue
+
+                doc_id = conn.execute(
+                    text("INSERT INTO search_documents (content_key, kind, position) VALUES (:key, :kind, :position)"),
+                    {"key": key, "kind": kind, "position": position}
+                ).lastrowid
+                conn.execute(
+                    text(f"INSERT INTO {table} (rowid, body) VALUES (:doc_id, :body)"),
+                    {"doc_id": doc_id, "body": body}
+                )
+                count += 1
+
+        self._bump()
+        return count
+
+    def index_pages(self, key: str, pages):
+        return self.index(key, "page", pages)
+
+    def index_chunks(self, key: str, chunks):
+        return self.index(key, "chunk", chunks)
+
+    def _delete(self, conn, key: str, kind: str):
+        conn.execute(
+            text(f"DELETE FROM {KINDS[kind]} WHERE rowid IN "
+                 f"(SELECT doc_id FROM search_documents WHERE content_key = :key AND kind = :kind)"),
+            {"key": key, "kind": kind}
+        )
+        conn.execute(
+            text("DELETE FROM search_documents WHERE content_key = :key AND kind = :kind"),
+            {"key": key, "kind": kind}
+        )
+
+    def remove(self, key: str):
+        """Drop every page and chunk entry of a content key"""
+        if not self.available:
+            return
+
+        with self.engine.begin() as conn:
+            for kind in KINDS:
+                self._delete(conn, key, kind)
+
+        self._bump()
+
+    def _bump(self):
+        with self._lock:
+            self.generation += 1
+
+    def search_keys(self, keys, query: str, kind: str = "chunk", limit: int = 10,
+                    match_all: bool = False, snippet_tokens: int = 16):
+        """
+        BM25 search restricted to the given content keys
+        Returns: [{content_key, position, score, snippet}] best first (higher score is better)
+        """
+        keys = list(keys)
+        match = to_match_query(query, match_all=match_all)
+
+        if not keys or not match or not self.available:
+            return []
+
+        table = KINDS[kind]
+        params = {"match": match, "kind": kind, "limit": limit, "tokens": min(max(snippet_tokens, 1), 64)}
+        placeholders = []
+        for i, key in enumerate(keys):
+            params[f"k{i}"] = key
+            placeholders.append(f":k{i}")
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(
+                f"SELECT d.content_key, d.position, bm25({table}) AS rank, "
+                f"snippet({table}, 0, '**', '**', '…', :tokens) AS snippet "
+                f"FROM {table} JOIN search_documents d ON d.doc_id = {table}.rowid "
+                f"WHERE {table} MATCH :match AND d.kind = :kind "
+                f"AND d.content_key IN ({', '.join(placeholders)}) "
+                f"ORDER BY rank LIMIT :limit"
+            ), params).fetchall()
+
+        # FTS5's bm25() is negative, lower is better
+        return [
+            {"content_key": key, "position": position, "score": -rank, "snippet": snippet}
+            for key, position, rank, snippet in rows
+        ]
+
+    def search(self, user_id: str, query: str, kind: str = "chunk", limit: int = 10,
+               resource_id: str = None, match_all: bool = False, snippet_tokens: int = 16):
+        """
+        Ranked keyword search across a user's documents (or one of them)
+        Returns: [{resource_id, filename, position, score, snippet}]
+        """
+        db = SessionLocal()
+        try:
+            resources = db.query(
+                UploadedResource.resource_id,
+                UploadedResource.filename,
+                UploadedResource.content_hash
+            ).filter(UploadedResource.user_id == user_id)
+
+            if resource_id:
+                resources = resources.filter(UploadedResource.resource_id == resource_id)
+
+            resources = resources.all()
+        finally:
+            db.close()
+
+        # The same file uploaded twice by one user is reported once
+        by_key = {}
+        for resource in resources:
+            by_key.setdefault(resource.content_hash or resource.resource_id, resource)
+
+        hits = self.search_keys(by_key.keys(), query, kind=kind, limit=limit,
+                                match_all=match_all, snippet_tokens=snippet_tokens)
+
+        for hit in hits:
+            resource = by_key[hit.pop("content_key")]
+            hit["resource_id"] = resource.resource_id
+            hit["filename"] = resource.filename
+
+        return hits
+
+    def backfill(self, page_store, embedding_store):
+        """Index stored pages/chunks of uploads that predate the keyword index"""
+        if not self.available:
+            return 0
+
+        db = SessionLocal()
+        try:
+            keys = {
+                content_hash or resource_id
+                for resource_id, content_hash in db.query(
+                    UploadedResource.resource_id, UploadedResource.content_hash
+                ).all()
+            }
+            indexed = {
+                (key, kind) for key, kind in db.query(
+                    SearchDocument.content_key, SearchDocument.kind
+                ).distinct().all()
+            }
+        finally:
+            db.close()
+
+        backfilled = 0
+        for key in keys:
+            if (key, "page") not in indexed and page_store.exists(key):
+                self.index_pages(key, page_store.iter_pages(key))
+                backfilled += 1
+            if (key, "chunk") not in indexed and (embedding_store.exists(key) or embedding_store.has_legacy(key)):
+                if not embedding_store.exists(key):
+                    embedding_store.migrate_pickle(key)
+                self.index_chunks(key, embedding_store.read_all_chunks(key))
+                backfilled += 1
+
+        if backfilled:
+            print(f"🔎 Keyword-indexed {backfilled} stored document part(s)")
+
+        return backfilled
+
+
+# Initialize global keyword index
+keyword_index = KeywordIndex()
@@ -0,0 +1,362 @@
+"""
+Completion backends for LLMClient.
+
+Every backend turns chat messages into a completion (complete) or a stream of
+text deltas (stream):
+
+    remote   Hugging Face Inference API (default; needs HF_TOKEN)
+    fake     local and deterministic: canned chat text, quiz JSON and grades,
+             with configurable latency and token throughput, no network
+    replay   serves responses recorded by the record backend, with their
+             original timing (falls back to fake for prompts never recorded)
+    record   remote, but every response is appended to the recording file
+
+LLM_BACKEND picks the backend. register_backend() adds new ones.
+
+complete() takes an optional timeout in seconds: the backend gives up and raises
+TimeoutError (or its HTTP client's timeout error) once it passes, so a caller's
+deadline bounds the work actually done on its behalf, not just its wait.
+"""
+from llm.response_cache import ResponseCache
+from collections import defaultdict
+from requests.adapters import HTTPAdapter
+import threading
+import requests
+import hashlib
+import random
+import math
+import json
+import time
+import re
+import os
+
+MODEL_NAME = "meta-llama/Llama-3.2-3B-Instruct"
+
+# Rough characters per token, used to pace fake and replayed output
+CHARS_PER_TOKEN = 4
+
+
+class BackendUnavailable(RuntimeError):
+    """The backend can't serve requests at all (e.g. missing credentials); not worth retrying"""
+
+
+class LLMBackend:
+    """Base class for completion backends"""
+
+    name = "base"
+    model = MODEL_NAME
+
+    def complete(self, messages: list, max_tokens: int, temperature: float, timeout: float = None) -> str:
+        raise NotImplementedError
+
+    def stream(self, messages: list, max_tokens: int, temperature: float):
+        """Yield text deltas; backends without streaming return the whole completion at once"""
+        yield self.complete(messages, max_tokens, temperature)
+
+    def model_for(self, messages: list, max_tokens: int, temperature: float) -> str:
+        """Model that answers this request, which is what its responses are cached under"""
+        return self.model
+
+
+class RemoteHFBackend(LLMBackend):
+    """Hugging Face Inference API with pooled keep-alive sessions"""
+
+    name = "remote"
+
+    def __init__(self, token: str = None, timeout: float = None, pool_size: int = None):
+        self.token = token or os.getenv("HF_TOKEN")
+        self.timeout = timeout if timeout is not None else float(os.getenv("LLM_TIMEOUT", "60"))
+        self.pool_size = pool_size or int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self._client = None
+        self._timed_clients = {}
+        self._lock = threading.Lock()
+
+    def _pooled_session(self) -> requests.Session:
+        """
+        huggingface_hub keeps one Session per thread; give each a keep-alive pool
+        big enough that concurrent calls don't reconnect
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def client(self):
+        """InferenceClient, created on first use so importing the app never needs a token"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    if not self.token:
+                        raise BackendUnavailable("HF_TOKEN not found in .env file (set LLM_BACKEND=fake to run offline)")
+
+                    from huggingface_hub import InferenceClient, configure_http_backend
+                    configure_http_backend(backend_factory=self._pooled_session)
+                    self._client = InferenceClient(token=self.token, timeout=self.timeout)
+        return self._client
+
+    def _client_for(self, timeout: float = None):
+        """A client whose HTTP timeout is at most timeout (rounded up to whole seconds, one client per value)"""
+        client = self.client()
+        if timeout is None or timeout >= self.timeout:
+            return client
+
+        seconds = max(1, math.ceil(timeout))
+        timed = self._timed_clients.get(seconds)
+        if timed is None:
+            from huggingface_hub import InferenceClient
+            # Shares the pooled keep-alive sessions configured in client()
+            timed = self._timed_clients.setdefault(seconds, InferenceClient(token=self.token, timeout=seconds))
+        return timed
+
+    def complete(self, messages: list, max_tokens: int, temperature: float, timeout: float = None) -> str:
+        response = self._client_for(timeout).chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        return response.choices[0].message.content or ""
+
+    def stream(self, messages: list, max_tokens: int, temperature: float):
+        stream = self.client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+def _paced(text: str, latency: float, tokens_per_second: float):
+    """Yield text token by token on a schedule: first token after latency, then tokens_per_second"""
+    started = time.perf_counter()
+    pieces = [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+    sent = 0
+
+    while sent < len(pieces):
+        elapsed = time.perf_counter() - started
+        due = len(pieces) if tokens_per_second <= 0 else int((elapsed - latency) * tokens_per_second) + 1
+
+        if elapsed >= latency and due > sent:
+            yield "".join(pieces[sent:due])
+            sent = due
+        else:
+            next_at = latency + (sent / tokens_per_second if tokens_per_second > 0 else 0)
+            time.sleep(max(next_at - elapsed, 0.001))
+
+
+def _wait(seconds: float, timeout: float = None):
+    """Simulated request time, cut short like a real request would be by its timeout"""
+    if timeout is not None and seconds > timeout:
+        time.sleep(max(timeout, 0))
+        raise TimeoutError(f"Request timed out after {timeout:.1f}s")
+    time.sleep(seconds)
+
+
+class FakeBackend(LLMBackend):
+    """
+    Deterministic offline stand-in. The reply depends only on the prompt, the
+    sampling parameters and how many times this process has seen that prompt,
+    so runs are reproducible while repeated quiz requests still get new
+    questions. Recognizes the app's quiz generation and grading prompts and
+    answers them in the expected format
+    """
+
+    name = "fake"
+    model = f"fake/{MODEL_NAME}"
+
+    WORDS = ("study practice concept example algorithm structure memory process network "
+             "function value result method pattern review focus progress topic detail").split()
+
+    def __init__(self, latency: float = None, tokens_per_second: float = None):
+        # Seconds to the first token, then generation speed
+        self.latency = latency if latency is not None else float(os.getenv("LLM_FAKE_LATENCY", "0.3"))
+        self.tokens_per_second = (tokens_per_second if tokens_per_second is not None
+                                  else float(os.getenv("LLM_FAKE_TOKENS_PER_SEC", "60")))
+        self._calls = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _rng(self, messages: list, max_tokens: int, temperature: float) -> random.Random:
+        key, _, _ = ResponseCache.make_key(self.model, messages, max_tokens, temperature)
+        with self._lock:
+            self._calls[key] += 1
+            call = self._calls[key]
+        return random.Random(int(hashlib.sha256(f"{key}:{call}".encode()).hexdigest()[:16], 16))
+
+    def _sentence(self, rng: random.Random, words: int = 12) -> str:
+        return " ".join(rng.choice(self.WORDS) for _ in range(words)).capitalize() + "."
+
+    def respond(self, messages: list, max_tokens: int, temperature: float) -> str:
+        rng = self._rng(messages, max_tokens, temperature)
+        prompt = messages[-1]["content"]
+
+        count_match = re.search(r"Generate (\d+)", prompt)
+        count = int(count_match.group(1)) if count_match else 5
+        topic_match = re.search(r"about (.+?) at (\w+) level", prompt)
+        topic = topic_match.group(1) if topic_match else "the topic"
+        tag = lambda: f"{topic} #{rng.randrange(10 ** 6)}"
+
+        if "JSON array" in prompt and "### Question" in prompt:
+            items = [
+                {"question": key if not key.isdigit() else int(key), "score": rng.randint(4, 10),
+                 "feedback": self._sentence(rng)}
+                for key in re.findall(r"### Question (\S+)", prompt)
+            ]
+        elif "multiple choice questions" in prompt:
+            items = []
+            for _ in range(count):
+                options = [f"Option {letter}: {self._sentence(rng, 4)}" for letter in "ABCD"]
+                items.append({"question": f"Which statement about {tag()} is correct?", "options": options,
+                              "correct_answer": rng.choice(options), "explanation": self._sentence(rng)})
+        elif "descriptive questions" in prompt:
+            items = [{"question": f"Explain {tag()} in your own words.",
+                      "key_points": [self._sentence(rng, 4) for _ in range(3)],
+                      "sample_answer": self._sentence(rng, 30)} for _ in range(count)]
+        elif "coding problems" in prompt:
+            items = [{"question": f"Write a function for {tag()}.",
+                      "requirements": [self._sentence(rng, 5) for _ in range(2)],
+                      "sample_input": "[1, 2, 3]", "sample_output": "6",
+                      "sample_solution": "def solve(values):\n    return sum(values)"} for _ in range(count)]
+        elif "Score: [0-10]" in prompt:
+            return f"Score: {rng.randint(4, 10)}\nFeedback: {self._sentence(rng, 20)}"
+        else:
+            words = min(max_tokens * 3 // 4, rng.randint(40, 160))
+            return " ".join(self._sentence(rng) for _ in range(max(words // 12, 1)))
+
+        return json.dumps(items, indent=2)
+
+    def complete(self, messages: list, max_tokens: int, temperature: float, timeout: float = None) -> str:
+        text = self.respond(messages, max_tokens, temperature)
+        _wait(self.latency + (len(text) / CHARS_PER_TOKEN / self.tokens_per_second if self.tokens_per_second > 0 else 0),
+              timeout)
+        return text
+
+    def stream(self, messages: list, max_tokens: int, temperature: float):
+        yield from _paced(self.respond(messages, max_tokens, temperature), self.latency, self.tokens_per_second)
+
+
+class ReplayBackend(LLMBackend):
+    """
+    Recorded responses, one JSON object per line of LLM_REPLAY_PATH:
+    {"key", "model", "response", "latency"}. With recorder set, calls go to that
+    backend and are appended to the file; otherwise recordings are replayed,
+    paced at their recorded latency divided by LLM_REPLAY_SPEED (0 = instant)
+    """
+
+    name = "replay"
+
+    def __init__(self, path: str = None, recorder: LLMBackend = None, speed: float = None):
+        self.path = path or os.getenv("LLM_REPLAY_PATH", "data/llm_recordings.jsonl")
+        self.recorder = recorder
+        self.speed = speed if speed is not None else float(os.getenv("LLM_REPLAY_SPEED", "1"))
+        self.model = recorder.model if recorder else MODEL_NAME
+        self._recordings = None
+        self._fallback = None
+        self._lock = threading.Lock()
+
+    def _key(self, messages: list, max_tokens: int, temperature: float) -> str:
+        # Keyed on the app's model whatever recorded it, so any recording can be replayed
+        return ResponseCache.make_key(MODEL_NAME, messages, max_tokens, temperature)[0]
+
+    def _load(self) -> dict:
+        with self._lock:
+            if self._recordings is None:
+                self._recordings = {}
+                if os.path.exists(self.path):
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        for line in f:
+                            if line.strip():
+                                entry = json.loads(line)
+                                self._recordings[entry["key"]] = entry
+                    print(f"📼 Loaded {len(self._recordings)} recorded LLM responses from {self.path}")
+        return self._recordings
+
+    def _record(self, key: str, response: str, latency: float):
+        entry = {"key": key, "model": self.model, "response": response, "latency": round(latency, 3)}
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            if self._recordings is not None:
+                self._recordings[key] = entry
+
+    def _lookup(self, messages: list, max_tokens: int, temperature: float):
+        entry = self._load().get(self._key(messages, max_tokens, temperature))
+        if entry is None and self._fallback is None:
+            print("⚠️ Prompt not in the recording, answering with the fake backend")
+            self._fallback = FakeBackend()
+        return entry
+
+    def model_for(self, messages: list, max_tokens: int, temperature: float) -> str:
+        # A prompt missing from the recording is answered by the fake backend; keep its
+        # output out of the real model's cache entries
+        if self.recorder or self._key(messages, max_tokens, temperature) in self._load():
+            return self.model
+        return FakeBackend.model
+
+    def _delay(self, entry: dict) -> float:
+        return entry.get("latency", 0) / self.speed if self.speed > 0 else 0
+
+    def complete(self, messages: list, max_tokens: int, temperature: float, timeout: float = None) -> str:
+        if self.recorder:
+            started = time.perf_counter()
+            response = self.recorder.complete(messages, max_tokens, temperature, timeout=timeout)
+            self._record(self._key(messages, max_tokens, temperature), response, time.perf_counter() - started)
+            return response
+
+        entry = self._lookup(messages, max_tokens, temperature)
+        if entry is None:
+            return self._fallback.complete(messages, max_tokens, temperature, timeout=timeout)
+
+        _wait(self._delay(entry), timeout)
+        return entry["response"]
+
+    def stream(self, messages: list, max_tokens: int, temperature: float):
+        if self.recorder:
+            started = time.perf_counter()
+            parts = []
+            for delta in self.recorder.stream(messages, max_tokens, temperature):
+                parts.append(delta)
+                yield delta
+            self._record(self._key(messages, max_tokens, temperature), "".join(parts), time.perf_counter() - started)
+            return
+
+        entry = self._lookup(messages, max_tokens, temperature)
+        if entry is None:
+            yield from self._fallback.stream(messages, max_tokens, temperature)
+            return
+
+        # Spread the recorded duration over the text: a fifth to the first token, the rest streaming
+        delay = self._delay(entry)
+        tokens = max(len(entry["response"]) / CHARS_PER_TOKEN, 1)
+        rate = tokens / (delay * 0.8) if delay > 0 else 0
+        yield from _paced(entry["response"], delay * 0.2, rate)
+
+
+LLM_BACKENDS = {
+    RemoteHFBackend.name: RemoteHFBackend,
+    FakeBackend.name: FakeBackend,
+    ReplayBackend.name: ReplayBackend,
+    "record": lambda: ReplayBackend(recorder=RemoteHFBackend()),
+}
+
+
+def register_backend(name: str, factory):
+    """Make a backend selectable by name (factory: a no-argument callable returning an LLMBackend)"""
+    LLM_BACKENDS[name] = factory
+
+
+def create_backend(name: str) -> LLMBackend:
+    """Instantiate a backend by name, falling back to the remote API"""
+    factory = LLM_BACKENDS.get(name)
+
+    if factory is None:
+        print(f"⚠️ Unknown LLM backend '{name}', using remote")
+        return RemoteHFBackend()
+
+    return factory()
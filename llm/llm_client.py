@@ -1,75 +1,324 @@
 import os
+import time
+import random
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from huggingface_hub import InferenceClient
+from llm.llm_backends import BackendUnavailable, LLMBackend, create_backend
+from llm.response_cache import response_cache
 
 load_dotenv()
 
-HF_TOKEN = os.getenv("HF_TOKEN")
-if not HF_TOKEN:
-    raise RuntimeError("HF_TOKEN not found in . env file")
+# remote (Hugging Face, needs HF_TOKEN), fake, replay or record; see llm.llm_backends
+BACKEND_NAME = os.getenv("LLM_BACKEND", "remote")
 
-client = InferenceClient(token=HF_TOKEN)
+# In-flight requests across the whole process (sync and async callers share it)
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Exponential backoff with full jitter: sleep uniform(0, min(MAX, BASE * 2 ** attempt))
+BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+
+_backend = None
+_backend_lock = threading.Lock()
+
+_semaphore = threading.BoundedSemaphore(MAX_CONCURRENCY)
+
+# Async calls run the blocking HTTP request on these threads (each reuses its pooled session)
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="llm-http")
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop on a daemon thread, used to run coroutines from synchronous code"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True).start()
+    return _loop
+
+
+def _remaining(deadline: float = None):
+    """Seconds left until a time.monotonic() deadline (None without one, never negative)"""
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Seconds to wait before retry number attempt + 1 (full jitter)"""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def is_retryable(error: Exception) -> bool:
+    """Network errors, timeouts, 429 and 5xx are worth retrying; other 4xx are not"""
+    if isinstance(error, BackendUnavailable):
+        return False
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status is None or status == 429 or status >= 500
 
 
 class LLMClient:
-    
+
+    @staticmethod
+    def backend() -> LLMBackend:
+        """The active completion backend (created from LLM_BACKEND on first use)"""
+        global _backend
+        if _backend is None:
+            with _backend_lock:
+                if _backend is None:
+                    _backend = create_backend(BACKEND_NAME)
+                    print(f"🤖 LLM backend: {_backend.name}")
+        return _backend
+
+    @staticmethod
+    def use_backend(backend):
+        """Switch backends at runtime: a registered name or an LLMBackend instance"""
+        global _backend
+        with _backend_lock:
+            _backend = create_backend(backend) if isinstance(backend, str) else backend
+
     @staticmethod
-    def call_llm(prompt: str, max_tokens: int = 500, temperature: float = 0.7, retries: int = 2) -> str:
+    def _complete(messages: list, max_tokens: int, temperature: float, deadline: float = None) -> str:
         """
-        Call LLM with prompt and return response (with retry logic)
+        One chat completion request, holding a slot of the global concurrency limit.
+        With a deadline (time.monotonic()), waiting for the slot and the request itself
+        both stop there, so an abandoned call never holds a slot past it
         """
+        if not _semaphore.acquire(timeout=_remaining(deadline)):
+            raise TimeoutError("No LLM slot became free before the deadline")
+
+        try:
+            timeout = _remaining(deadline)
+            if timeout == 0:
+                raise TimeoutError("LLM deadline passed before the request started")
+
+            if timeout is None:
+                response = LLMClient.backend().complete(messages, max_tokens, temperature)
+            else:
+                response = LLMClient.backend().complete(messages, max_tokens, temperature, timeout=timeout)
+        finally:
+            _semaphore.release()
+
+        return (response or "").strip()
+
+    @staticmethod
+    def _complete_with_retries(messages: list, max_tokens: int, temperature: float, retries: int,
+                               cache: bool = False, cache_ttl: int = None, timeout: float = None) -> str:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        model = LLMClient.backend().model_for(messages, max_tokens, temperature)
+
+        if cache:
+            cached = response_cache.get(model, messages, max_tokens, temperature)
+            if cached:
+                return cached
+
         for attempt in range(retries):
             try:
-                response = client.chat.completions.create(
-                    model="meta-llama/Llama-3.2-3B-Instruct",
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    max_tokens=max_tokens,
-                    temperature=temperature
+                result = LLMClient._complete(messages, max_tokens, temperature, deadline)
+
+                if result:
+                    if cache:
+                        response_cache.put(model, messages, max_tokens, temperature, result, ttl=cache_ttl)
+                    return result
+                else:
+                    print(f"⚠️ Empty response on attempt {attempt + 1}")
+
+            except Exception as e:
+                print(f"❌ LLM Error (attempt {attempt + 1}/{retries}): {e}")
+                if not is_retryable(e):
+                    break
+
+            if attempt < retries - 1:
+                delay = backoff_delay(attempt)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    break
+                time.sleep(delay)
+
+        return None
+
+    @staticmethod
+    async def _acomplete_with_retries(messages: list, max_tokens: int, temperature: float, retries: int,
+                                      cache: bool = False, cache_ttl: int = None, timeout: float = None) -> str:
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        model = LLMClient.backend().model_for(messages, max_tokens, temperature)
+
+        if cache:
+            cached = await loop.run_in_executor(
+                _executor, response_cache.get, model, messages, max_tokens, temperature
+            )
+            if cached:
+                return cached
+
+        for attempt in range(retries):
+            try:
+                # The deadline travels with the call, so the HTTP thread stops (and frees its slot) with it
+                result = await loop.run_in_executor(
+                    _executor, LLMClient._complete, messages, max_tokens, temperature, deadline
                 )
-                
-                result = response.choices[0].message.content.strip()
-                
+
                 if result:
+                    if cache:
+                        await loop.run_in_executor(
+                            _executor, lambda: response_cache.put(
+                                model, messages, max_tokens, temperature, result, ttl=cache_ttl
+                            )
+                        )
                     return result
                 else:
                     print(f"⚠️ Empty response on attempt {attempt + 1}")
-                    
+
             except Exception as e:
                 print(f"❌ LLM Error (attempt {attempt + 1}/{retries}): {e}")
-                if attempt < retries - 1:
-                    import time
-                    time.sleep(1)  # Wait before retry
-        
+                if not is_retryable(e):
+                    break
+
+            if attempt < retries - 1:
+                delay = backoff_delay(attempt)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    break
+                await asyncio.sleep(delay)
+
         return None
-    
+
+    @staticmethod
+    def call_llm(prompt: str, max_tokens: int = 500, temperature: float = 0.7, retries: int = 2,
+                 cache: bool = False, cache_ttl: int = None, timeout: float = None) -> str:
+        """
+        Call LLM with prompt and return response (with retry logic)
+        cache=True serves repeated prompts from the response cache (cache_ttl in seconds)
+        timeout bounds the whole call, retries included, in seconds (None on failure)
+        """
+        messages = [{"role": "user", "content": prompt}]
+        return LLMClient._complete_with_retries(messages, max_tokens, temperature, retries, cache, cache_ttl, timeout)
+
     @staticmethod
-    def call_llm_with_context(system_prompt: str, user_message: str, max_tokens: int = 500, temperature: float = 0.7) -> str:
+    def call_llm_with_context(system_prompt: str, user_message: str, max_tokens: int = 500, temperature: float = 0.7, retries: int = 1,
+                              cache: bool = False, cache_ttl: int = None) -> str:
         """
         Call LLM with system prompt and user message
         """
-        try:
-            full_prompt = f"{system_prompt}\n\nUser: {user_message}\n\nAssistant:"
-            response = client.chat.completions.create(
-                model="meta-llama/Llama-3.2-3B-Instruct",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role":  "user",
-                        "content": user_message
-                    }
-                ],
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
-            return response. choices[0].message.content. strip()
-        except Exception as e:
-            print(f"❌ LLM Error: {e}")
-            return None
\ No newline at end of file
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ]
+        return LLMClient._complete_with_retries(messages, max_tokens, temperature, retries, cache, cache_ttl)
+
+    @staticmethod
+    def discard_cached(prompt: str, max_tokens: int = 500, temperature: float = 0.7):
+        """Drop call_llm's cached response for this prompt and parameters"""
+        messages = [{"role": "user", "content": prompt}]
+        model = LLMClient.backend().model_for(messages, max_tokens, temperature)
+        response_cache.discard(model, messages, max_tokens, temperature)
+
+    @staticmethod
+    async def acall_llm(prompt: str, max_tokens: int = 500, temperature: float = 0.7, retries: int = 2,
+                        cache: bool = False, cache_ttl: int = None, timeout: float = None) -> str:
+        """
+        Async call_llm: awaits without blocking the event loop, so calls can overlap.
+        Unlike asyncio.wait_for, timeout also stops the request running on the HTTP thread
+        """
+        messages = [{"role": "user", "content": prompt}]
+        return await LLMClient._acomplete_with_retries(messages, max_tokens, temperature, retries, cache, cache_ttl,
+                                                       timeout)
+
+    @staticmethod
+    async def acall_llm_with_context(system_prompt: str, user_message: str, max_tokens: int = 500, temperature: float = 0.7, retries: int = 1,
+                                     cache: bool = False, cache_ttl: int = None) -> str:
+        """Async call_llm_with_context"""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ]
+        return await LLMClient._acomplete_with_retries(messages, max_tokens, temperature, retries, cache, cache_ttl)
+
+    @staticmethod
+    def _stream(messages: list, max_tokens: int, temperature: float):
+        """One streamed chat completion, holding a concurrency slot until it ends or is closed"""
+        with _semaphore:
+            yield from LLMClient.backend().stream(messages, max_tokens, temperature)
+
+    @staticmethod
+    def _stream_with_retries(messages: list, max_tokens: int, temperature: float, retries: int,
+                             cache: bool = False, cache_ttl: int = None):
+        model = LLMClient.backend().model_for(messages, max_tokens, temperature)
+
+        # A cached reply is replayed as a single delta
+        if cache:
+            cached = response_cache.get(model, messages, max_tokens, temperature)
+            if cached:
+                yield cached
+                return
+
+        # Only a failure before the first token is retried; after that the
+        # caller has already shown part of the reply, so the error propagates
+        for attempt in range(retries):
+            started = False
+            parts = []
+            try:
+                for delta in LLMClient._stream(messages, max_tokens, temperature):
+                    started = True
+                    parts.append(delta)
+                    yield delta
+
+                if started:
+                    if cache:
+                        response_cache.put(model, messages, max_tokens, temperature,
+                                           "".join(parts).strip(), ttl=cache_ttl)
+                    return
+                else:
+                    print(f"⚠️ Empty response on attempt {attempt + 1}")
+
+            except Exception as e:
+                if started:
+                    raise
+                print(f"❌ LLM Error (attempt {attempt + 1}/{retries}): {e}")
+                if not is_retryable(e):
+                    break
+
+            if attempt < retries - 1:
+                time.sleep(backoff_delay(attempt))
+
+    @staticmethod
+    def stream_llm(prompt: str, max_tokens: int = 500, temperature: float = 0.7, retries: int = 2,
+                   cache: bool = False, cache_ttl: int = None):
+        """
+        Streaming call_llm: yields text deltas as the model generates them
+        (yields nothing if every attempt fails before the first token)
+        """
+        messages = [{"role": "user", "content": prompt}]
+        return LLMClient._stream_with_retries(messages, max_tokens, temperature, retries, cache, cache_ttl)
+
+    @staticmethod
+    def stream_llm_with_context(system_prompt: str, user_message: str, max_tokens: int = 500, temperature: float = 0.7, retries: int = 1):
+        """Streaming call_llm_with_context"""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ]
+        return LLMClient._stream_with_retries(messages, max_tokens, temperature, retries)
+
+    @staticmethod
+    def run_sync(coro):
+        """Run a coroutine to completion from synchronous code (e.g. a Streamlit page)"""
+        return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+    @staticmethod
+    def call_many(prompts: list, max_tokens: int = 500, temperature: float = 0.7, retries: int = 2,
+                  cache: bool = False, cache_ttl: int = None) -> list:
+        """
+        Run several prompts concurrently (bounded by LLM_MAX_CONCURRENCY)
+        Returns: responses in the same order as prompts (None for failures)
+        """
+        async def _gather():
+            return await asyncio.gather(*(
+                LLMClient.acall_llm(prompt, max_tokens=max_tokens, temperature=temperature, retries=retries,
+                                    cache=cache, cache_ttl=cache_ttl)
+                for prompt in prompts
+            ))
+
+        return LLMClient.run_sync(_gather())
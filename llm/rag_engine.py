@@ -1,70 +1,123 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
 from database.models import UploadedResource
 from database.db_manager import SessionLocal
-import pickle
+from llm.vector_index import UserVectorIndex, vector_index_cache
+from llm.embedding_store import embedding_store
+from llm.keyword_index import keyword_index as global_keyword_index
+from llm.query_cache import LRUCache, normalize_query
+from llm.embedding_model import EmbeddingModel
+from llm.chunker import TokenCounter, iter_chunks
+from core.content_store import ContentStore
+from llm.fusion import reciprocal_rank_fusion, DEFAULT_RRF_K
+from concurrent.futures import ThreadPoolExecutor
 import os
 
+SEARCH_MODES = ('dense', 'keyword', 'hybrid')
+
 
 class RAGEngine:
     
-    def __init__(self):
-        # Load sentence transformer model
-        self. model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, index_backend: str = None, keyword_index=None):
+        # The sentence transformer model is loaded lazily (see EmbeddingModel)
         self.embeddings_dir = "data/embeddings"
+        self.index_backend = index_backend or os.getenv("RAG_INDEX_BACKEND", "numpy")
+        self.store = embedding_store
+        self.index_cache = vector_index_cache
+        self.keyword_index = keyword_index or global_keyword_index
+        self.query_embedding_cache = LRUCache(int(os.getenv("RAG_QUERY_CACHE_SIZE", "512")))
+        self.search_result_cache = LRUCache(int(os.getenv("RAG_RESULT_CACHE_SIZE", "512")))
+        self.search_mode = os.getenv("RAG_SEARCH_MODE", "hybrid")
+        self.dense_threshold = 0.15
+        self.rrf_k = int(os.getenv("RAG_RRF_K", str(DEFAULT_RRF_K)))
+        # Each retriever contributes top_k * factor candidates to the fusion
+        self.hybrid_candidates_factor = int(os.getenv("RAG_HYBRID_CANDIDATES", "4"))
+        self._retrieval_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-retrieval")
         self._ensure_embeddings_dir()
     
+    @property
+    def model(self):
+        """Shared sentence transformer, loaded on first encode"""
+        return EmbeddingModel.get()
+    
     def _ensure_embeddings_dir(self):
         """Create embeddings directory if it doesn't exist"""
         if not os. path.exists(self.embeddings_dir):
             os.makedirs(self.embeddings_dir)
     
-    def chunk_text(self, text: str, chunk_size: int = 500, overlap: int = 50):
-        """Split text into overlapping chunks"""
-        words = text.split()
-        chunks = []
-        
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk = ' '.join(words[i:i + chunk_size])
-            if chunk. strip():
-                chunks.append(chunk)
-        
-        return chunks
+    def iter_chunks(self, source, max_tokens: int = None, overlap_tokens: int = 32):
+        """
+        Lazily split text (a string or an iterable of page texts) into chunks that fit
+        the model's max sequence length, on sentence/paragraph boundaries
+        """
+        counter = TokenCounter(EmbeddingModel.tokenizer())
+        max_tokens = max_tokens or EmbeddingModel.max_tokens()
+        return iter_chunks(source, max_tokens=max_tokens, overlap_tokens=overlap_tokens, counter=counter)
+    
+    def chunk_text(self, text: str, max_tokens: int = None, overlap_tokens: int = 32):
+        """Split text into overlapping, token-bounded chunks"""
+        return list(self.iter_chunks(text, max_tokens=max_tokens, overlap_tokens=overlap_tokens))
+    
+    @staticmethod
+    def store_key(resource) -> str:
+        """Embedding-store key: the shared content hash, or the resource id for pre-dedup uploads"""
+        return resource.content_hash or resource.resource_id
+    
+    def content_key(self, key: str) -> str:
+        """Stored embeddings a resource's index rows come from: store key and live version"""
+        return f"{key}@{self.store.current_version(key)}"
     
     def generate_embeddings(self, resource_id: str):
-        """Generate embeddings for a PDF resource"""
+        """Generate embeddings for a PDF resource (synchronously)"""
         db = SessionLocal()
         try:
             resource = db.query(UploadedResource).filter(
                 UploadedResource.resource_id == resource_id
             ).first()
             
-            if not resource or not resource.extracted_text:
+            if not resource:
+                return False, "Resource not found or no text extracted"
+            
+            # Another upload of the same file was already embedded
+            if self.store.exists(self.store_key(resource)):
+                return self.link_embeddings(resource_id)
+            
+            source, num_chars = ContentStore.open_text(resource)
+            if not num_chars:
                 return False, "Resource not found or no text extracted"
             
-            # Chunk the text
-            chunks = self. chunk_text(resource.extracted_text)
+            # Chunk the text, page by page
+            chunks = list(self.iter_chunks(source))
             
             if not chunks:
                 return False, "No text chunks created"
             
             # Generate embeddings
             embeddings = self. model. encode(chunks)
+        
+        except Exception as e: 
+            return False, f"Error generating embeddings: {str(e)}"
+        finally:
+            db.close()
+        
+        return self.save_embeddings(resource_id, embeddings, chunks)
+    
+    def save_embeddings(self, resource_id: str, embeddings, chunks: list):
+        """Persist computed embeddings, flag every resource sharing them and update resident indexes"""
+        db = SessionLocal()
+        try:
+            resource = db.query(UploadedResource).filter(
+                UploadedResource.resource_id == resource_id
+            ).first()
             
-            # Save embeddings and chunks
-            embeddings_path = os.path. join(self.embeddings_dir, f"{resource_id}.pkl")
+            if not resource:
+                return False, "Resource not found"
             
-            with open(embeddings_path, 'wb') as f:
-                pickle.dump({
-                    'embeddings': embeddings,
-                    'chunks':  chunks,
-                    'resource_id': resource_id,
-                    'filename': resource.filename
-                }, f)
+            # Save embeddings and chunks
+            key = self.store_key(resource)
+            self.store.write(key, embeddings, chunks, resource.filename)
+            self.keyword_index.index_chunks(key, chunks)
             
-            # Update database
-            resource.embeddings_generated = True
-            db.commit()
+            self._mark_embedded(db, resource, embeddings)
             
             return True, f"Generated embeddings for {len(chunks)} chunks"
         
@@ -74,70 +127,257 @@ class RAGEngine:
         finally:
             db.close()
     
-    def search(self, user_id: str, query: str, top_k: int = 3):
+    def link_embeddings(self, resource_id: str):
+        """Point a resource at embeddings already computed for an identical upload"""
+        db = SessionLocal()
+        try:
+            resource = db.query(UploadedResource).filter(
+                UploadedResource.resource_id == resource_id
+            ).first()
+            
+            if not resource:
+                return False, "Resource not found"
+            
+            embeddings = self._load_resource_embeddings(self.store_key(resource))
+            if embeddings is None:
+                return False, "No stored embeddings to reuse"
+            
+            self._mark_embedded(db, resource, embeddings)
+            
+            return True, f"Reused embeddings for {len(embeddings)} chunks"
+        
+        except Exception as e: 
+            db.rollback()
+            return False, f"Error linking embeddings: {str(e)}"
+        finally:
+            db.close()
+    
+    def _mark_embedded(self, db, resource, embeddings):
+        """Flag the resource (and every upload of the same content) and sync resident indexes"""
+        if resource.content_hash:
+            resource.blob.embeddings_generated = True
+            siblings = db.query(UploadedResource).filter(
+                UploadedResource.content_hash == resource.content_hash
+            ).all()
+        else:
+            siblings = [resource]
+        
+        for sibling in siblings:
+            sibling.embeddings_generated = True
+        db.commit()
+        
+        # Keep loaded indexes in sync (no-op for users whose index isn't resident)
+        content_key = self.content_key(self.store_key(resource))
+        for sibling in siblings:
+            self.index_cache.add_resource(sibling.user_id, sibling.resource_id, sibling.filename, embeddings,
+                                          content_key)
+    
+    def _load_resource_embeddings(self, key: str):
+        """Memory-map a blob's embeddings, converting a legacy pickle on first use"""
+        if not self.store.exists(key):
+            if not self.store.has_legacy(key):
+                return None
+            self.store.migrate_pickle(key)
+            self.keyword_index.index_chunks(key, self.store.read_all_chunks(key))
+        
+        return self.store.open_embeddings(key)
+    
+    def _get_user_index(self, user_id: str, resources):
+        """
+        Return the user's resident index, building it lazily on first use
+        and reconciling it with the resources currently in the database
         """
-        Search across all user's PDFs using semantic similarity
+        index = self.index_cache.get(user_id)
+        if index is None:
+            index = UserVectorIndex(
+                user_id,
+                backend=self.index_backend,
+                persist_dir=self.index_cache.persist_dir(user_id)
+            )
+        
+        expected = {resource.resource_id: resource for resource in resources}
+        
+        # Drop resources that were deleted elsewhere
+        for resource_id in list(index.resource_ids):
+            if resource_id not in expected:
+                index.remove_resource(resource_id)
+        
+        # Load resources that are not resident yet
+        for resource_id, resource in expected.items():
+            if index.has_resource(resource_id):
+                continue
+            
+            key = self.store_key(resource)
+            embeddings = self._load_resource_embeddings(key)
+            if embeddings is None:
+                continue
+            
+            index.add_resource(resource_id, resource.filename, embeddings, self.content_key(key))
+        
+        self.index_cache.put(index)
+        return index
+    
+    def get_index_stats(self, user_id: str = None):
+        """Latency/recall stats for one user's index, or for every resident index"""
+        if user_id:
+            index = self.index_cache.get(user_id)
+            return index.stats.summary() if index else None
+        
+        return {
+            resident_user: index.stats.summary()
+            for resident_user, index in self.index_cache.items()
+        }
+    
+    def get_cache_stats(self):
+        """Hit/miss counters for the query-embedding and search-result caches"""
+        return {
+            "query_embeddings": self.query_embedding_cache.stats(),
+            "search_results": self.search_result_cache.stats()
+        }
+    
+    def _encode_query(self, query: str):
+        """Encode a query, reusing the embedding for repeated questions"""
+        key = normalize_query(query)
+        
+        query_embedding = self.query_embedding_cache.get(key)
+        if query_embedding is None:
+            query_embedding = self. model.encode([key])[0]
+            self.query_embedding_cache.put(key, query_embedding)
+        
+        return query_embedding
+    
+    def search(self, user_id: str, query: str, top_k: int = 3, mode: str = None):
+        """
+        Search across all user's PDFs
+        mode: 'dense' (semantic similarity), 'keyword' (BM25) or 'hybrid' (both, fused with RRF);
+        defaults to RAG_SEARCH_MODE
         Returns top_k most relevant chunks
         """
+        mode = mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+        
         db = SessionLocal()
         try:
-            # Get all user's resources with embeddings
-            resources = db.query(UploadedResource).filter(
+            # Get all user's resources with embeddings (metadata only)
+            resources = db.query(
+                UploadedResource.resource_id,
+                UploadedResource.filename,
+                UploadedResource.content_hash
+            ).filter(
                 UploadedResource.user_id == user_id,
                 UploadedResource.embeddings_generated == True
             ).all()
-            
-            if not resources: 
-                return []
-            
-            # Encode query
-            query_embedding = self. model.encode([query])[0]
-            
-            all_results = []
-            
-            # Search in each resource
-            for resource in resources: 
-                embeddings_path = os.path.join(self.embeddings_dir, f"{resource.resource_id}.pkl")
-                
-                if not os.path.exists(embeddings_path):
-                    continue
-                
-                # Load embeddings
-                with open(embeddings_path, 'rb') as f:
-                    data = pickle.load(f)
-                
-                embeddings = data['embeddings']
-                chunks = data['chunks']
-                
-                # Calculate cosine similarity
-                similarities = np. dot(embeddings, query_embedding) / (
-                    np.linalg. norm(embeddings, axis=1) * np.linalg.norm(query_embedding)
-                )
-                
-                # Get top results from this resource
-                top_indices = np.argsort(similarities)[::-1][:top_k]
-                
-                for idx in top_indices:
-                    if similarities[idx] > 0.15:  # Threshold for relevance
-                        all_results.append({
-                            'chunk': chunks[idx],
-                            'similarity': float(similarities[idx]),
-                            'filename': resource.filename,
-                            'resource_id':  resource.resource_id
-                        })
-            
-            # Sort all results by similarity
-            all_results.sort(key=lambda x: x['similarity'], reverse=True)
-            
-            return all_results[: top_k]
-        
         finally:
             db.close()
+        
+        if not resources: 
+            return []
+        
+        index = self._get_user_index(user_id, resources)
+        
+        if index.size == 0:
+            return []
+        
+        # Identical follow-ups and re-renders against unchanged dense and keyword indexes are memoized
+        result_key = (user_id, normalize_query(query), top_k, mode, index.version, self.keyword_index.generation)
+        cached = self.search_result_cache.get(result_key)
+        if cached is not None:
+            return [dict(hit) for hit in cached]
+        
+        keys = {resource.resource_id: self.store_key(resource) for resource in resources}
+        
+        if mode == 'dense':
+            hits = self._dense_search(index, keys, query, top_k)
+        elif mode == 'keyword':
+            hits = self._keyword_search(resources, keys, query, top_k)
+        else:
+            hits = self._hybrid_search(index, resources, keys, query, top_k)
+        
+        # Only the final hits ever read chunk text from disk
+        for hit in hits:
+            hit['chunk'] = self.store.read_chunks(hit.pop('key'), [hit.pop('chunk_index')])[0]
+        
+        self.search_result_cache.put(result_key, [dict(hit) for hit in hits])
+        
+        return hits
+    
+    def _dense_search(self, index, keys, query: str, limit: int):
+        """Cosine-similarity hits from the resident vector index"""
+        query_embedding = self._encode_query(query)
+        hits = index.search(query_embedding, top_k=limit, threshold=self.dense_threshold)
+        
+        for hit in hits:
+            hit['key'] = keys[hit['resource_id']]
+        
+        return hits
+    
+    def _keyword_search(self, resources, keys, query: str, limit: int):
+        """BM25 hits over the chunk text of the same resources"""
+        by_key = {}
+        for resource in resources:
+            by_key.setdefault(keys[resource.resource_id], resource)
+        
+        hits = self.keyword_index.search_keys(by_key.keys(), query, kind="chunk", limit=limit)
+        
+        return [
+            {
+                'key': hit['content_key'],
+                'chunk_index': hit['position'],
+                'keyword_score': hit['score'],
+                'filename': by_key[hit['content_key']].filename,
+                'resource_id': by_key[hit['content_key']].resource_id
+            }
+            for hit in hits
+        ]
+    
+    def _hybrid_search(self, index, resources, keys, query: str, top_k: int):
+        """
+        Keyword and vector retrieval run concurrently, then fused with Reciprocal Rank Fusion.
+        Nothing is returned unless some chunk passes the dense similarity threshold
+        """
+        candidates = max(top_k * self.hybrid_candidates_factor, top_k)
+        
+        # BM25 runs on a pool thread while this thread encodes the query and scans the index
+        keyword_future = self._retrieval_pool.submit(self._keyword_search, resources, keys, query, candidates)
+        dense_hits = self._dense_search(index, keys, query, candidates)
+        try:
+            keyword_hits = keyword_future.result()
+        except Exception as e:
+            print(f"⚠️ Keyword search failed, using dense results only: {e}")
+            keyword_hits = []
+        
+        # Keyword hits skip the similarity threshold, so they only re-rank a query that
+        # is about the documents at all; otherwise chat small talk would pull in context
+        if not dense_hits:
+            return []
+        
+        # The same chunk can reach a user through two uploads of one file; key it by content
+        merged = {}
+        for hit in dense_hits + keyword_hits:
+            merged.setdefault((hit['key'], hit['chunk_index']), {}).update(hit)
+        
+        fused = reciprocal_rank_fusion(
+            [
+                [(hit['key'], hit['chunk_index']) for hit in dense_hits],
+                [(hit['key'], hit['chunk_index']) for hit in keyword_hits]
+            ],
+            k=self.rrf_k,
+            limit=top_k
+        )
+        
+        hits = []
+        for item, score in fused:
+            hit = merged[item]
+            hit['rrf_score'] = score
+            hits.append(hit)
+        
+        return hits
     
-    def get_context_for_query(self, user_id: str, query: str):
-        """Get relevant context from PDFs for a query"""
+    def get_context_for_query(self, user_id: str, query: str, top_k: int = 3, mode: str = None):
+        """Get relevant context from PDFs for a query (mode: dense, keyword or hybrid)"""
         try:
-            results = self.search(user_id, query, top_k=3)
+            results = self.search(user_id, query, top_k=top_k, mode=mode)
             
             if not results:
                 print(f"  → Search returned 0 results")
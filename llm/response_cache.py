@@ -0,0 +1,230 @@
+"""
+Persistent cache for LLM completions, stored in the llm_cache table.
+
+Entries are keyed by a hash of (model, messages, max_tokens, temperature), so a
+prompt only hits the inference API again when its text or sampling parameters
+change. Each entry has an expiry (LLM_CACHE_TTL seconds by default, or a
+per-call ttl) and the table is capped at LLM_CACHE_MAX_ENTRIES rows. The least
+recently used rows are evicted first. Caching is opt-in per call
+(LLMClient.call_llm(..., cache=True)) and LLM_CACHE_ENABLED=0 turns it off
+everywhere.
+
+Maintenance from the project root:
+
+    python -m llm.response_cache stats|prune|clear
+"""
+from database.db_manager import SessionLocal
+from database.models import LLMCacheEntry
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+import threading
+import hashlib
+import json
+import os
+
+CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+DEFAULT_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+# Evict down to this fraction of the cap, so a full table isn't trimmed on every insert
+EVICT_TO_FRACTION = 0.9
+
+
+def _sha256(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed TTL + LRU cache of completions, with process-wide hit/miss counters"""
+
+    def __init__(self, enabled: bool = CACHE_ENABLED, default_ttl: int = DEFAULT_TTL_SECONDS,
+                 max_entries: int = MAX_ENTRIES):
+        self.enabled = enabled
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, messages: list, max_tokens: int, temperature: float):
+        """Returns (cache_key, prompt_hash, params)"""
+        prompt_hash = _sha256(messages)
+        params = {"max_tokens": max_tokens, "temperature": temperature}
+        return _sha256({"model": model, "prompt": prompt_hash, "params": params}), prompt_hash, params
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, model: str, messages: list, max_tokens: int, temperature: float):
+        """Cached response, or None on a miss (expired entries count as misses)"""
+        if not self.enabled:
+            return None
+
+        cache_key, _, _ = self.make_key(model, messages, max_tokens, temperature)
+        now = datetime.utcnow()
+
+        db = SessionLocal()
+        try:
+            entry = db.query(LLMCacheEntry).filter(LLMCacheEntry.cache_key == cache_key).first()
+
+            if not entry or (entry.expires_at and entry.expires_at <= now):
+                self._count(False)
+                return None
+
+            entry.hit_count = (entry.hit_count or 0) + 1
+            entry.last_accessed_at = now
+            response = entry.response
+            db.commit()
+
+            self._count(True)
+            return response
+
+        except Exception as e:
+            # The cache must never break a call; treat errors as misses
+            db.rollback()
+            print(f"⚠️ LLM cache read failed: {e}")
+            self._count(False)
+            return None
+        finally:
+            db.close()
+
+    def put(self, model: str, messages: list, max_tokens: int, temperature: float,
+            response: str, ttl: int = None):
+        """Store a response. ttl in seconds (None = default, 0 = never expires)"""
+        if not self.enabled or not response:
+            return
+
+        cache_key, prompt_hash, params = self.make_key(model, messages, max_tokens, temperature)
+        ttl = self.default_ttl if ttl is None else ttl
+        now = datetime.utcnow()
+
+        db = SessionLocal()
+        try:
+            db.merge(LLMCacheEntry(
+                cache_key=cache_key,
+                model=model,
+                prompt_hash=prompt_hash,
+                params=params,
+                response=response,
+                size_bytes=len(response.encode('utf-8')),
+                hit_count=0,
+                created_at=now,
+                expires_at=now + timedelta(seconds=ttl) if ttl else None,
+                last_accessed_at=now
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ LLM cache write failed: {e}")
+            return
+        finally:
+            db.close()
+
+        self.evict()
+
+    def discard(self, model: str, messages: list, max_tokens: int, temperature: float):
+        """Forget one response (e.g. a reply the caller couldn't parse)"""
+        cache_key, _, _ = self.make_key(model, messages, max_tokens, temperature)
+
+        db = SessionLocal()
+        try:
+            db.query(LLMCacheEntry).filter(LLMCacheEntry.cache_key == cache_key).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ LLM cache discard failed: {e}")
+        finally:
+            db.close()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones beyond the size cap"""
+        db = SessionLocal()
+        try:
+            removed = db.query(LLMCacheEntry).filter(
+                LLMCacheEntry.expires_at.isnot(None),
+                LLMCacheEntry.expires_at <= datetime.utcnow()
+            ).delete(synchronize_session=False)
+
+            count = db.query(func.count(LLMCacheEntry.cache_key)).scalar()
+            if count > self.max_entries:
+                keep = int(self.max_entries * EVICT_TO_FRACTION)
+                oldest = select(LLMCacheEntry.cache_key).order_by(
+                    LLMCacheEntry.last_accessed_at.asc()
+                ).limit(count - keep)
+                removed += db.query(LLMCacheEntry).filter(
+                    LLMCacheEntry.cache_key.in_(oldest)
+                ).delete(synchronize_session=False)
+
+            db.commit()
+            return removed
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ LLM cache eviction failed: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def clear(self) -> int:
+        db = SessionLocal()
+        try:
+            removed = db.query(LLMCacheEntry).delete(synchronize_session=False)
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        """This process's hit rate, plus what the table holds (hits stored across all processes)"""
+        db = SessionLocal()
+        try:
+            entries, size_bytes, stored_hits = db.query(
+                func.count(LLMCacheEntry.cache_key),
+                func.coalesce(func.sum(LLMCacheEntry.size_bytes), 0),
+                func.coalesce(func.sum(LLMCacheEntry.hit_count), 0)
+            ).one()
+        finally:
+            db.close()
+
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "size_bytes": size_bytes,
+            "stored_hits": stored_hits,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+# Initialize global response cache
+response_cache = ResponseCache()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="LLM response cache maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Show entry count, size and stored hit counts")
+    subparsers.add_parser("prune", help="Remove expired entries and enforce the size cap")
+    subparsers.add_parser("clear", help="Remove every cached response")
+
+    args = parser.parse_args()
+
+    from database.db_manager import ensure_migrated
+    ensure_migrated()
+
+    if args.command == "stats":
+        for name, value in response_cache.stats().items():
+            print(f"{name:>12}: {value}")
+    elif args.command == "prune":
+        print(f"🧹 Removed {response_cache.evict()} cache entries")
+    elif args.command == "clear":
+        print(f"🗑️ Removed {response_cache.clear()} cache entries")
@@ -0,0 +1,293 @@
+import numpy as np
+from collections import OrderedDict
+from llm.index_backends import create_backend, save_backend, load_backend, top_k_rows, SearchStats
+import itertools
+import threading
+import hashlib
+import shutil
+import time
+import os
+
+
+# Versions are unique across index instances, so a rebuilt index never reuses an old version
+_version_counter = itertools.count(1)
+
+
+class UserVectorIndex:
+    """
+    Resident embedding index for one user's resources.
+    Holds one contiguous, pre-normalized float32 matrix plus a row -> (resource, chunk) map.
+    Chunk text stays on disk and is only read for the final hits.
+    Searches go through a pluggable backend (see llm.index_backends)
+    """
+
+    # Compare every Nth approximate search against exact results to estimate recall
+    RECALL_SAMPLE_EVERY = int(os.getenv("RAG_RECALL_SAMPLE_EVERY", "20"))
+
+    def __init__(self, user_id: str, backend: str = "numpy", persist_dir: str = None):
+        self.user_id = user_id
+        self.backend_name = backend
+        self.persist_dir = persist_dir
+        self.backend = None
+        self.stats = SearchStats(backend)
+        self.matrix = None                                  # (n_chunks, dim) float32, L2-normalized
+        self.row_resource = np.zeros(0, dtype=np.int32)     # row -> position in self.resource_ids
+        self.row_chunk = np.zeros(0, dtype=np.int32)        # row -> chunk index within its resource
+        self.resource_ids = []
+        self.filenames = []
+        self.content_keys = []                              # what each resource's rows were loaded from
+        self.version = next(_version_counter)
+        self._lock = threading.RLock()
+
+    @property
+    def size(self) -> int:
+        """Number of chunks in the index"""
+        return len(self.row_resource)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate resident memory of the index"""
+        matrix_bytes = self.matrix.nbytes if self.matrix is not None else 0
+        backend_bytes = 0
+        if self.backend is not None and self.backend.name != "numpy":
+            backend_bytes = self.backend.num_rows * self.backend.dim * 4
+        return matrix_bytes + backend_bytes + self.row_resource.nbytes + self.row_chunk.nbytes
+
+    def has_resource(self, resource_id: str) -> bool:
+        return resource_id in self.resource_ids
+
+    @staticmethod
+    def _normalize(embeddings) -> np.ndarray:
+        """Return a float32 copy with unit-length rows"""
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def add_resource(self, resource_id: str, filename: str, embeddings, content_key: str = ""):
+        """
+        Append (or replace) a resource's embeddings. content_key names the stored
+        embeddings they came from (store key and version) for signature()
+        """
+        with self._lock:
+            if resource_id in self.resource_ids:
+                self.remove_resource(resource_id)
+
+            if len(embeddings) == 0:
+                return
+
+            normalized = self._normalize(embeddings)
+            num_rows = normalized.shape[0]
+            position = len(self.resource_ids)
+
+            self.resource_ids.append(resource_id)
+            self.filenames.append(filename)
+            self.content_keys.append(content_key)
+
+            if self.matrix is None or self.matrix.shape[0] == 0:
+                self.matrix = np.ascontiguousarray(normalized)
+            else:
+                self.matrix = np.vstack([self.matrix, normalized])
+
+            self.row_resource = np.concatenate([
+                self.row_resource,
+                np.full(num_rows, position, dtype=np.int32)
+            ])
+            self.row_chunk = np.concatenate([
+                self.row_chunk,
+                np.arange(num_rows, dtype=np.int32)
+            ])
+            self.version = next(_version_counter)
+
+            # Grow a built backend in place; otherwise it is (re)built on the next search
+            if self.backend is not None:
+                if self.backend.name == "numpy":
+                    self.backend.build(self.matrix)
+                else:
+                    self.backend.add(normalized)
+
+    def remove_resource(self, resource_id: str):
+        """Drop a resource's rows from the index"""
+        with self._lock:
+            if resource_id not in self.resource_ids:
+                return
+
+            position = self.resource_ids.index(resource_id)
+            keep = self.row_resource != position
+
+            self.matrix = np.ascontiguousarray(self.matrix[keep]) if self.matrix is not None else None
+            self.row_chunk = self.row_chunk[keep]
+
+            row_resource = self.row_resource[keep]
+            row_resource[row_resource > position] -= 1
+            self.row_resource = row_resource
+
+            del self.resource_ids[position]
+            del self.filenames[position]
+            del self.content_keys[position]
+            self.version = next(_version_counter)
+
+            # Graph/list indexes can't delete rows cheaply, rebuild on next search
+            self.backend = None
+
+    def signature(self) -> str:
+        """
+        Fingerprint of the rows in the index, used to validate persisted backends:
+        each resource's content key (a re-embedded resource gets a new store
+        version) and row count, in row order
+        """
+        counts = np.bincount(self.row_resource, minlength=len(self.resource_ids))
+        parts = [
+            f"{resource_id}={content_key}:{count}"
+            for resource_id, content_key, count in zip(self.resource_ids, self.content_keys, counts)
+        ]
+        dim = self.matrix.shape[1] if self.matrix is not None else 0
+        return hashlib.sha1(f"{dim}|{'|'.join(parts)}".encode('utf-8')).hexdigest()
+
+    def _ensure_backend(self):
+        """Build the search backend, reusing a persisted one when it matches the current rows"""
+        if self.backend is not None:
+            return
+
+        backend = create_backend(self.backend_name)
+        signature = self.signature()
+
+        if self.persist_dir and load_backend(backend, self.persist_dir, signature):
+            print(f"📂 Loaded persisted {backend.name} index for user {self.user_id}")
+        else:
+            backend.build(self.matrix)
+            if self.persist_dir:
+                save_backend(backend, self.persist_dir, signature)
+
+        self.backend = backend
+        self.stats.backend_name = backend.name
+
+    def _sample_recall(self, query: np.ndarray, rows: np.ndarray, k: int):
+        """Record recall@k of an approximate search against exact brute force"""
+        _, exact_rows = top_k_rows(self.matrix @ query, k)
+        if len(exact_rows) == 0:
+            return
+        recall = len(set(rows.tolist()) & set(exact_rows.tolist())) / len(exact_rows)
+        self.stats.record_recall(recall)
+
+    def search(self, query_embedding, top_k: int = 3, threshold: float = 0.15):
+        """
+        Cosine similarity search over every chunk through the configured backend.
+        Returns hits as dicts with resource_id, filename, chunk_index and similarity
+        """
+        with self._lock:
+            if self.size == 0:
+                return []
+
+            self._ensure_backend()
+            query = self._normalize(query_embedding)[0]
+
+            # The relevance threshold is applied as a mask inside the backend,
+            # so Python objects are only created for the surviving top-k rows
+            started = time.perf_counter()
+            scores, rows = self.backend.search(query, top_k, min_score=threshold)
+            self.stats.record_latency((time.perf_counter() - started) * 1000)
+
+            if not self.backend.exact and self.stats.queries % self.RECALL_SAMPLE_EVERY == 0:
+                _, unfiltered_rows = self.backend.search(query, top_k)
+                self._sample_recall(query, unfiltered_rows, top_k)
+
+            positions = self.row_resource[rows]
+            chunk_indices = self.row_chunk[rows]
+
+            return [
+                {
+                    'chunk_index': int(chunk_index),
+                    'similarity': float(score),
+                    'filename': self.filenames[position],
+                    'resource_id': self.resource_ids[position]
+                }
+                for score, position, chunk_index in zip(scores, positions, chunk_indices)
+            ]
+
+
+class VectorIndexCache:
+    """
+    Process-wide LRU of per-user indexes, bounded by a memory budget in MB.
+    Built backends are persisted under persist_root/<user_id>
+    """
+
+    def __init__(self, max_mb: float = 256, persist_root: str = "data/indexes"):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.persist_root = persist_root
+        self._indexes = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, user_id: str):
+        """Return the resident index for a user (or None) and mark it recently used"""
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                self._indexes.move_to_end(user_id)
+            return index
+
+    def put(self, index: UserVectorIndex):
+        """Insert or refresh an index, then evict down to the budget"""
+        with self._lock:
+            self._indexes[index.user_id] = index
+            self._indexes.move_to_end(index.user_id)
+            self._evict(keep=index.user_id)
+
+    def persist_dir(self, user_id: str) -> str:
+        return os.path.join(self.persist_root, user_id)
+
+    def add_resource(self, user_id: str, resource_id: str, filename: str, embeddings, content_key: str = ""):
+        """Incrementally update a resident index; non-resident users are built lazily on search"""
+        index = self.get(user_id)
+        if index is None:
+            return
+        index.add_resource(resource_id, filename, embeddings, content_key)
+        with self._lock:
+            self._evict(keep=user_id)
+
+    def drop_resource(self, user_id: str, resource_id: str):
+        """Remove a deleted resource from the user's resident index and its persisted backend"""
+        index = self.get(user_id)
+        if index is not None:
+            index.remove_resource(resource_id)
+        # Built from rows that no longer exist; the next search rebuilds and saves it
+        self._delete_persisted(user_id)
+
+    def drop_user(self, user_id: str):
+        """Forget a user's index entirely, on disk too"""
+        with self._lock:
+            self._indexes.pop(user_id, None)
+        self._delete_persisted(user_id)
+
+    def _delete_persisted(self, user_id: str):
+        persist_dir = self.persist_dir(user_id)
+        if os.path.exists(persist_dir):
+            shutil.rmtree(persist_dir, ignore_errors=True)
+
+    def items(self):
+        """Snapshot of (user_id, index) pairs without touching LRU order"""
+        with self._lock:
+            return list(self._indexes.items())
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(index.nbytes for index in self._indexes.values())
+
+    def _evict(self, keep: str = None):
+        """Evict least recently used indexes until the cache fits its budget"""
+        total = sum(index.nbytes for index in self._indexes.values())
+
+        for user_id in list(self._indexes.keys()):
+            if total <= self.max_bytes:
+                break
+            if user_id == keep:
+                continue
+            evicted = self._indexes.pop(user_id)
+            total -= evicted.nbytes
+            print(f"♻️ Evicted vector index for user {user_id} ({evicted.nbytes / 1024 / 1024:.1f} MB)")
+
+
+# Initialize global index cache
+vector_index_cache = VectorIndexCache(max_mb=float(os.getenv("RAG_INDEX_CACHE_MB", "256")))
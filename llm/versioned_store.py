@@ -0,0 +1,81 @@
+"""
+Versioned per-key directories with an atomically swapped CURRENT pointer.
+
+Shared by the embedding store and the page store:
+
+    <root>/<key>/CURRENT      name of the live version directory
+    <root>/<key>/<version>/   one complete write
+
+A write fills a fresh version directory and then os.replace()s CURRENT, so
+readers see either the old files or the new ones, never neither, even if the
+process dies midway. The previous version is kept until the next write so
+readers that already resolved it can finish. Keys written before versioning
+(files directly in <key>/) are still read.
+"""
+import shutil
+import time
+import os
+
+
+class VersionedStore:
+
+    POINTER_FILE = "CURRENT"
+
+    def __init__(self, root: str):
+        self.root = root
+        if not os.path.exists(self.root):
+            os.makedirs(self.root)
+
+    def _resource_dir(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def _data_dir(self, key: str) -> str:
+        """Directory holding the live files for a key"""
+        resource_dir = self._resource_dir(key)
+        try:
+            with open(os.path.join(resource_dir, self.POINTER_FILE), 'r', encoding='utf-8') as f:
+                return os.path.join(resource_dir, f.read().strip())
+        except FileNotFoundError:
+            # Unversioned layout from before CURRENT existed
+            return resource_dir
+
+    def _new_version(self, key: str):
+        """Create an empty version directory for a key. Returns (version, path)"""
+        version = f"v{time.time_ns()}-{os.getpid()}"
+        version_dir = os.path.join(self._resource_dir(key), version)
+        os.makedirs(version_dir)
+        return version, version_dir
+
+    def _publish(self, key: str, version: str):
+        """Repoint CURRENT at a fully written version and drop the ones before the previous"""
+        resource_dir = self._resource_dir(key)
+        previous = self._data_dir(key)
+
+        pointer_tmp = os.path.join(resource_dir, f"{self.POINTER_FILE}.{version}.tmp")
+        with open(pointer_tmp, 'w', encoding='utf-8') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer_tmp, os.path.join(resource_dir, self.POINTER_FILE))
+
+        self._prune(resource_dir, keep={version, os.path.basename(previous)})
+
+    def _prune(self, resource_dir: str, keep: set):
+        """Drop superseded versions (and files left in the old flat layout)"""
+        for name in os.listdir(resource_dir):
+            if name in keep or name == self.POINTER_FILE:
+                continue
+            path = os.path.join(resource_dir, name)
+            if os.path.isdir(path):
+                # A reader may still have it mapped (Windows); retried on the next write
+                shutil.rmtree(path, ignore_errors=True)
+            elif not name.endswith('.tmp'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def current_version(self, key: str) -> str:
+        """Name of the live version of a key ('' for the unversioned layout)"""
+        data_dir = self._data_dir(key)
+        return "" if data_dir == self._resource_dir(key) else os.path.basename(data_dir)
@@ -0,0 +1,75 @@
+"""
+Alembic environment.
+
+Migrations run against the connection handed over by
+database.migrations.upgrade_database (config.attributes["connection"]) when the
+app starts, or against DATABASE_URL when run from the alembic CLI.
+"""
+from logging.config import fileConfig
+from alembic import context
+from database.models import Base
+from database.connection import create_db_engine
+import os
+
+config = context.config
+
+if config.config_file_name and "connection" not in config.attributes:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def include_name(name, type_, parent_names):
+    """Only compare tables the models know about (skips the FTS5 index tables)"""
+    if type_ == "table":
+        return name in target_metadata.tables
+    return True
+
+
+def database_url() -> str:
+    return config.get_main_option("sqlalchemy.url") or os.getenv("DATABASE_URL", "sqlite:///database.db")
+
+
+def run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+        # SQLite can't ALTER most things in place; batch mode rebuilds the table instead
+        render_as_batch=connection.dialect.name == "sqlite",
+        compare_type=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_offline():
+    """alembic upgrade head --sql: print the DDL instead of running it"""
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        include_name=include_name,
+        literal_binds=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+
+    engine = create_db_engine(database_url())
+    try:
+        with engine.connect() as connection:
+            run_migrations(connection)
+    finally:
+        engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,258 @@
+"""Baseline schema: every table as of the switch to Alembic migrations
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 06:42:07.947370
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# JSON on SQLite, JSONB on PostgreSQL (database.models.JSONType)
+JSON_TYPE = sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+
+def upgrade():
+    op.create_table('content_blobs',
+    sa.Column('content_hash', sa.String(), nullable=False),
+    sa.Column('file_path', sa.String(), nullable=False),
+    sa.Column('file_type', sa.String(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=True),
+    sa.Column('extracted_text', sa.Text(), nullable=True),
+    sa.Column('text_chars', sa.Integer(), nullable=True),
+    sa.Column('num_pages', sa.Integer(), nullable=True),
+    sa.Column('embeddings_generated', sa.Boolean(), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('content_hash')
+    )
+    op.create_table('llm_cache',
+    sa.Column('cache_key', sa.String(), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('prompt_hash', sa.String(), nullable=False),
+    sa.Column('params', JSON_TYPE, nullable=True),
+    sa.Column('response', sa.Text(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=True),
+    sa.Column('hit_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('last_accessed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('cache_key')
+    )
+    op.create_index(op.f('ix_llm_cache_expires_at'), 'llm_cache', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_llm_cache_last_accessed_at'), 'llm_cache', ['last_accessed_at'], unique=False)
+    op.create_table('question_bank',
+    sa.Column('question_id', sa.String(), nullable=False),
+    sa.Column('topic_key', sa.String(), nullable=False),
+    sa.Column('topic', sa.String(), nullable=False),
+    sa.Column('difficulty', sa.String(), nullable=False),
+    sa.Column('quiz_type', sa.String(), nullable=False),
+    sa.Column('question', JSON_TYPE, nullable=False),
+    sa.Column('fingerprint', sa.String(), nullable=False),
+    sa.Column('times_served', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_served_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('question_id')
+    )
+    op.create_index('ix_question_bank_bucket_fingerprint', 'question_bank', ['topic_key', 'difficulty', 'quiz_type', 'fingerprint'], unique=True)
+    op.create_table('search_documents',
+    sa.Column('doc_id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('content_key', sa.String(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('doc_id')
+    )
+    op.create_index(op.f('ix_search_documents_content_key'), 'search_documents', ['content_key'], unique=False)
+    op.create_table('users',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('password_hash', sa.String(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=False),
+    sa.Column('age_group', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('last_login', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.create_table('chat_sessions',
+    sa.Column('session_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('ended_at', sa.DateTime(), nullable=True),
+    sa.Column('message_count', sa.Integer(), nullable=True),
+    sa.Column('context', JSON_TYPE, nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('session_id')
+    )
+    op.create_table('notifications',
+    sa.Column('notification_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('message', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('is_read', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('scheduled_for', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('notification_id')
+    )
+    op.create_table('progress_analytics',
+    sa.Column('analytics_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('topics_covered', JSON_TYPE, nullable=True),
+    sa.Column('quizzes_attempted', sa.Integer(), nullable=True),
+    sa.Column('avg_quiz_score', sa.Integer(), nullable=True),
+    sa.Column('hours_studied', sa.Integer(), nullable=True),
+    sa.Column('tasks_completed', sa.Integer(), nullable=True),
+    sa.Column('streak_maintained', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('analytics_id')
+    )
+    op.create_table('quizzes',
+    sa.Column('quiz_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('day_number', sa.Integer(), nullable=True),
+    sa.Column('topic', sa.String(), nullable=False),
+    sa.Column('quiz_type', sa.String(), nullable=False),
+    sa.Column('questions', JSON_TYPE, nullable=False),
+    sa.Column('score', sa.Integer(), nullable=True),
+    sa.Column('max_score', sa.Integer(), nullable=True),
+    sa.Column('time_taken_seconds', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('attempted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('quiz_id')
+    )
+    op.create_table('student_profiles',
+    sa.Column('profile_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('topics_to_learn', JSON_TYPE, nullable=True),
+    sa.Column('current_levels', JSON_TYPE, nullable=True),
+    sa.Column('hours_per_day', sa.Integer(), nullable=True),
+    sa.Column('target_date', sa.Date(), nullable=True),
+    sa.Column('target_completion_date', sa.Date(), nullable=True),
+    sa.Column('study_start_date', sa.Date(), nullable=True),
+    sa.Column('last_active_date', sa.Date(), nullable=True),
+    sa.Column('current_day_number', sa.Integer(), nullable=True),
+    sa.Column('total_planned_days', sa.Integer(), nullable=True),
+    sa.Column('days_remaining', sa.Integer(), nullable=True),
+    sa.Column('streak_count', sa.Integer(), nullable=True),
+    sa.Column('timezone', sa.String(), nullable=True),
+    sa.Column('onboarding_completed', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('profile_id')
+    )
+    op.create_table('study_plans',
+    sa.Column('plan_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('day_number', sa.Integer(), nullable=False),
+    sa.Column('plan_date', sa.Date(), nullable=True),
+    sa.Column('topic', sa.String(), nullable=False),
+    sa.Column('subtopics', JSON_TYPE, nullable=True),
+    sa.Column('tasks', JSON_TYPE, nullable=True),
+    sa.Column('estimated_hours', sa.Integer(), nullable=True),
+    sa.Column('actual_hours', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('plan_id')
+    )
+    op.create_table('uploaded_resources',
+    sa.Column('resource_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('filename', sa.String(), nullable=False),
+    sa.Column('file_path', sa.String(), nullable=False),
+    sa.Column('file_type', sa.String(), nullable=False),
+    sa.Column('topic', sa.String(), nullable=True),
+    sa.Column('content_hash', sa.String(), nullable=True),
+    sa.Column('extracted_text', sa.Text(), nullable=True),
+    sa.Column('text_chars', sa.Integer(), nullable=True),
+    sa.Column('processed', sa.Boolean(), nullable=True),
+    sa.Column('embeddings_generated', sa.Boolean(), nullable=True),
+    sa.Column('uploaded_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['content_hash'], ['content_blobs.content_hash'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('resource_id')
+    )
+    op.create_index(op.f('ix_uploaded_resources_content_hash'), 'uploaded_resources', ['content_hash'], unique=False)
+    op.create_table('chat_messages',
+    sa.Column('message_id', sa.String(), nullable=False),
+    sa.Column('session_id', sa.String(), nullable=False),
+    sa.Column('role', sa.String(), nullable=False),
+    sa.Column('content', sa.String(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('message_type', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['chat_sessions.session_id'], ),
+    sa.PrimaryKeyConstraint('message_id')
+    )
+    op.create_table('embedding_jobs',
+    sa.Column('job_id', sa.String(), nullable=False),
+    sa.Column('resource_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('chunks_total', sa.Integer(), nullable=True),
+    sa.Column('chunks_done', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['resource_id'], ['uploaded_resources.resource_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+    op.create_index(op.f('ix_embedding_jobs_resource_id'), 'embedding_jobs', ['resource_id'], unique=False)
+    op.create_index(op.f('ix_embedding_jobs_status'), 'embedding_jobs', ['status'], unique=False)
+    op.create_table('quiz_responses',
+    sa.Column('response_id', sa.String(), nullable=False),
+    sa.Column('quiz_id', sa.String(), nullable=False),
+    sa.Column('question_number', sa.Integer(), nullable=False),
+    sa.Column('question_text', sa.String(), nullable=False),
+    sa.Column('student_answer', sa.String(), nullable=True),
+    sa.Column('correct_answer', sa.String(), nullable=True),
+    sa.Column('is_correct', sa.Boolean(), nullable=True),
+    sa.Column('points_earned', sa.Integer(), nullable=True),
+    sa.Column('ai_feedback', sa.Text(), nullable=True),
+    sa.Column('submitted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.quiz_id'], ),
+    sa.PrimaryKeyConstraint('response_id')
+    )
+
+
+def downgrade():
+    op.drop_table('quiz_responses')
+    op.drop_index(op.f('ix_embedding_jobs_status'), table_name='embedding_jobs')
+    op.drop_index(op.f('ix_embedding_jobs_resource_id'), table_name='embedding_jobs')
+    op.drop_table('embedding_jobs')
+    op.drop_table('chat_messages')
+    op.drop_index(op.f('ix_uploaded_resources_content_hash'), table_name='uploaded_resources')
+    op.drop_table('uploaded_resources')
+    op.drop_table('study_plans')
+    op.drop_table('student_profiles')
+    op.drop_table('quizzes')
+    op.drop_table('progress_analytics')
+    op.drop_table('notifications')
+    op.drop_table('chat_sessions')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_search_documents_content_key'), table_name='search_documents')
+    op.drop_table('search_documents')
+    op.drop_index('ix_question_bank_bucket_fingerprint', table_name='question_bank')
+    op.drop_table('question_bank')
+    op.drop_index(op.f('ix_llm_cache_last_accessed_at'), table_name='llm_cache')
+    op.drop_index(op.f('ix_llm_cache_expires_at'), table_name='llm_cache')
+    op.drop_table('llm_cache')
+    op.drop_table('content_blobs')
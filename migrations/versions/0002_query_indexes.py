@@ -0,0 +1,43 @@
+"""Composite and partial indexes for the per-user queries every page runs
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:15:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+OPEN_SESSION = sa.text('ended_at IS NULL')
+
+# (name, table, columns); matches the __table_args__ in database/models.py
+INDEXES = [
+    ('ix_student_profiles_user_id', 'student_profiles', ['user_id']),
+    ('ix_study_plans_user_day', 'study_plans', ['user_id', 'day_number']),
+    ('ix_quizzes_user_status_created', 'quizzes', ['user_id', 'status', 'created_at']),
+    ('ix_quizzes_user_status_attempted', 'quizzes', ['user_id', 'status', 'attempted_at']),
+    ('ix_chat_sessions_user_started', 'chat_sessions', ['user_id', 'started_at']),
+    ('ix_chat_messages_session_timestamp', 'chat_messages', ['session_id', 'timestamp']),
+    ('ix_uploaded_resources_user_uploaded', 'uploaded_resources', ['user_id', 'uploaded_at']),
+    ('ix_progress_analytics_user_date', 'progress_analytics', ['user_id', 'date']),
+    ('ix_quiz_responses_quiz_number', 'quiz_responses', ['quiz_id', 'question_number']),
+]
+
+
+def upgrade():
+    # if_not_exists: tables created by the pre-migration create_all already have them
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+    op.create_index('ix_chat_sessions_user_open', 'chat_sessions', ['user_id'], unique=False, if_not_exists=True,
+                    sqlite_where=OPEN_SESSION, postgresql_where=OPEN_SESSION)
+
+
+def downgrade():
+    op.drop_index('ix_chat_sessions_user_open', table_name='chat_sessions')
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
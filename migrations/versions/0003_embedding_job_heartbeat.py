@@ -0,0 +1,25 @@
+"""Heartbeat on embedding jobs, so only jobs whose worker went quiet are reclaimed
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:40:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tables patched by the pre-migration create_all may already have it
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('embedding_jobs')}
+    if 'heartbeat_at' not in columns:
+        op.add_column('embedding_jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('embedding_jobs') as batch_op:
+        batch_op.drop_column('heartbeat_at')
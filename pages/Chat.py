@@ -4,6 +4,10 @@ from core.auth_manager import AuthManager
 from datetime import datetime
 from styles.design_system import DesignSystem as DS
 from styles.components import UIComponents
+from database.db_manager import ensure_migrated
+
+# Bring the schema up to date before anything queries it (once per process)
+ensure_migrated()
 
 st.set_page_config(page_title="Chat", page_icon="💬", layout="wide")
 
@@ -212,20 +216,13 @@ else:
                 user_input.strip()
             )
             
-            # Generate AI response
-            with st.spinner("🤔 Thinking..."):
-                ai_response = ChatEngine.generate_ai_response(
-                    user_id,
-                    user_input.strip(),
-                    st.session_state.current_chat_session_id
-                )
-            
-            # Add AI response
-            ChatEngine.add_message(
-                st.session_state.current_chat_session_id,
-                'ai',
-                ai_response
-            )
+            # Stream the AI response as it is generated (saved to the session once complete)
+            st.markdown(f"<strong style='color: {DS.ACCENT};'>🤖 AI Assistant:</strong>", unsafe_allow_html=True)
+            st.write_stream(ChatEngine.stream_ai_response(
+                user_id,
+                user_input.strip(),
+                st.session_state.current_chat_session_id
+            ))
             
             st.rerun()
 
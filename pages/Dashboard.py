@@ -1,11 +1,15 @@
 import streamlit as st
-from core.auth_manager import AuthManager
 from core.plan_generator import PlanGenerator
 from core.day_manager import DayManager
+from core.dashboard_service import DashboardService
 from database.models import StudentProfile, StudyPlan
-from database.db_manager import SessionLocal
+from database.db_manager import SessionLocal, ensure_migrated
+from database.unit_of_work import UnitOfWork
 from datetime import date, datetime
 
+# Bring the schema up to date before anything queries it (once per process)
+ensure_migrated()
+
 st.title("🏠 Dashboard")
 
 # Get user info
@@ -14,21 +18,25 @@ if not user_id:
     st.error("Please login first")
     st.stop()
 
-# ✅ CRITICAL: Check and update day automatically
-day_changed, new_day, message = DayManager.check_and_update_day(user_id)
+# Statements run while loading the page are counted (database/unit_of_work.py)
+with UnitOfWork("Dashboard") as load:
+    # ✅ CRITICAL: Check and update day automatically
+    day_changed, new_day, message = DayManager.check_and_update_day(user_id)
+    
+    # User, profile, today's plan and stats in one snapshot (see core/dashboard_service.py)
+    snapshot = DashboardService.get_snapshot(user_id)
 
 if day_changed and message:
     st.success(f"🌅 {message}")
     st.balloons()
 
-# Get user and profile
-user = AuthManager.get_user_by_id(user_id)
-profile = AuthManager.get_user_profile(user_id)
-
-if not profile:
+if not snapshot:
     st.error("Profile not found")
     st.stop()
 
+user = snapshot["user"]
+profile = snapshot["profile"]
+
 # Check if onboarding is complete
 if not profile.onboarding_completed:
     st.warning("⚠️ Please complete onboarding first!")
@@ -56,6 +64,7 @@ with st.expander("🔧 Debug Controls", expanded=False):
     
     with col3:
         st.metric("Streak", profile.streak_count)
+        st.caption(f"DB queries loading this page: {load.stats['queries']}")
     
     st.markdown("---")
     
@@ -124,7 +133,7 @@ with col3:
 st.markdown("---")
 
 # Get today's plan
-today_plan = PlanGenerator.get_today_plan(user_id)
+today_plan = snapshot["today_plan"]
 
 if not today_plan:
     st.error("📅 No plan for today.")
@@ -269,43 +278,21 @@ st.markdown("---")
 # Quick Stats
 st.markdown("### 📈 Quick Stats")
 
-# Calculate real stats from database
-db = SessionLocal()
-try:
-    # Completed plans count
-    completed_plans_count = db.query(StudyPlan).filter(
-        StudyPlan.user_id == user_id,
-        StudyPlan.status == 'completed'
-    ).count()
-    
-    # Quiz stats
-    from database.models import Quiz
-    quizzes = db.query(Quiz).filter(
-        Quiz.user_id == user_id,
-        Quiz.status == 'completed'
-    ).all()
-    
-    avg_score = 0
-    if quizzes:
-        valid_scores = []
-        for q in quizzes:
-            if q.score is not None and q.max_score is not None and q.max_score > 0:
-                valid_scores.append((q.score / q.max_score) * 100)
-        avg_score = sum(valid_scores) / len(valid_scores) if valid_scores else 0
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("Topics Covered", completed_plans_count)
-    with col2:
-        st.metric("Avg Quiz Score", f"{avg_score:.0f}%" if avg_score > 0 else "N/A")
-    with col3:
-        st.metric("Days Remaining", profile.days_remaining or "Self-paced")
-    with col4:
-        st.metric("Total Quizzes", len(quizzes))
+avg_score = snapshot["avg_quiz_score"] or 0
 
-finally:
-    db.close()
+col1, col2, col3, col4 = st.columns(4)
+
+with col1:
+    st.metric("Topics Covered", snapshot["plan_counts"]["completed"])
+with col2:
+    st.metric("Avg Quiz Score", f"{avg_score:.0f}%" if avg_score > 0 else "N/A")
+with col3:
+    st.metric("Days Remaining", profile.days_remaining or "Self-paced")
+with col4:
+    st.metric("Total Quizzes", snapshot["quiz_count"])
+
+if snapshot["provisional_quizzes"]:
+    st.caption(f"⏳ {snapshot['provisional_quizzes']} quiz(zes) still being graded; their scores are provisional")
 
 # Action Buttons
 st.markdown("---")
@@ -327,19 +314,11 @@ with col3:
 st.markdown("---")
 st.markdown("### 🎯 Upcoming")
 
-db = SessionLocal()
-try:
-    upcoming_plans = db.query(StudyPlan).filter(
-        StudyPlan.user_id == user_id,
-        StudyPlan.day_number > profile.current_day_number,
-        StudyPlan.status == 'pending'
-    ).order_by(StudyPlan.day_number).limit(3).all()
-    
-    if upcoming_plans:
-        for plan in upcoming_plans:
-            day_label = "Tomorrow" if plan.day_number == profile.current_day_number + 1 else f"Day {plan.day_number}"
-            st.info(f"📅 **{day_label}:** {plan.topic}")
-    else:
-        st.info("📅 **All caught up!** No upcoming plans yet.")
-finally:
-    db.close()
\ No newline at end of file
+upcoming_plans = snapshot["upcoming_plans"]
+
+if upcoming_plans:
+    for plan in upcoming_plans:
+        day_label = "Tomorrow" if plan.day_number == profile.current_day_number + 1 else f"Day {plan.day_number}"
+        st.info(f"📅 **{day_label}:** {plan.topic}")
+else:
+    st.info("📅 **All caught up!** No upcoming plans yet.")
\ No newline at end of file
@@ -3,6 +3,11 @@ from core.auth_manager import AuthManager
 from styles.design_system import DesignSystem as DS
 from styles.components import UIComponents
 from utils import UIHelpers
+from database.db_manager import ensure_migrated
+
+# Bring the schema up to date before anything queries it (once per process)
+ensure_migrated()
+
 st.set_page_config(page_title="Login", page_icon="🔐", layout="centered")
 
 # Inject CSS
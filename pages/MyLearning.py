@@ -1,13 +1,16 @@
 import streamlit as st
 from core.auth_manager import AuthManager
 from core.pdf_processor import PDFProcessor
-from llm.rag_engine import rag_engine
+from core.embedding_worker import EmbeddingWorker
 from database.models import StudyPlan
-from database.db_manager import SessionLocal
+from database.db_manager import SessionLocal, ensure_migrated
 from utils import Validators
 from styles.design_system import DesignSystem as DS
 from styles.components import UIComponents
 
+# Bring the schema up to date before anything queries it (once per process)
+ensure_migrated()
+
 st.set_page_config(page_title="My Learning", page_icon="📚", layout="wide")
 
 # Inject CSS
@@ -25,6 +28,9 @@ if not profile or not profile.onboarding_completed:
     st.warning("Please complete onboarding first!")
     st.stop()
 
+# Embeddings are generated by a background worker thread
+EmbeddingWorker.ensure_started()
+
 # Header
 st.markdown(f"""
 <div style="text-align: center; margin-bottom: {DS.SPACE_8};">
@@ -157,6 +163,15 @@ with tab2:
     if pdfs:
         st.info(f"📚 You have {len(pdfs)} uploaded document(s)")
         
+        # Poll while documents are still being processed in the background
+        if EmbeddingWorker.has_active_jobs(user_id):
+            try:
+                from streamlit_autorefresh import st_autorefresh
+                st_autorefresh(interval=3000, key="embedding_progress_refresh")
+            except ImportError:
+                if st.button("🔄 Refresh processing status"):
+                    st.rerun()
+        
         for pdf in pdfs:
             # Document card - SIMPLIFIED WITHOUT COMPLEX HTML
             st.markdown("---")
@@ -171,27 +186,34 @@ with tab2:
                 if pdf.topic:
                     metadata_parts.append(f"📌 {pdf.topic}")
                 metadata_parts.append(f"📅 {pdf.uploaded_at.strftime('%b %d, %Y')}")
-                metadata_parts.append(f"📏 {len(pdf.extracted_text) if pdf.extracted_text else 0:,} characters")
+                metadata_parts.append(f"📏 {pdf.text_chars or 0:,} characters")
                 
                 st.caption(" • ".join(metadata_parts))
                 
                 # Status
+                job = None if pdf.embeddings_generated else EmbeddingWorker.get_progress(pdf.resource_id)
+                
                 if pdf.embeddings_generated:
                     st.success("✅ Processed - Available for AI search")
+                elif job and job['status'] in ('pending', 'running'):
+                    if job['chunks_total']:
+                        st.progress(
+                            job['percentage'] / 100,
+                            text=f"🤖 Generating embeddings: {job['chunks_done']}/{job['chunks_total']} chunks"
+                        )
+                    else:
+                        st.info("⏳ Queued for AI search processing...")
+                elif job and job['status'] == 'failed':
+                    st.error(f"❌ Processing failed: {job['error']}")
                 else:
                     st.warning("⚠️ Not yet processed for AI search")
             
             with col2:
                 # Action buttons
-                if not pdf.embeddings_generated:
+                if not pdf.embeddings_generated and not (job and job['status'] in ('pending', 'running')):
                     if st.button("🔄 Process", key=f"process_{pdf.resource_id}", use_container_width=True):
-                        with st.spinner("Processing PDF..."):
-                            success, message = rag_engine.generate_embeddings(pdf.resource_id)
-                            if success:
-                                st.success(message)
-                                st.rerun()
-                            else:
-                                st.error(message)
+                        EmbeddingWorker.enqueue(pdf.resource_id)
+                        st.rerun()
                 
                 if st.button("🗑️ Delete", key=f"delete_{pdf.resource_id}", use_container_width=True, type="secondary"):
                     st.session_state[f'confirm_delete_{pdf.resource_id}'] = True
@@ -217,8 +239,11 @@ with tab2:
             
             # Preview expander
             with st.expander("👁️ Preview"):
-                if pdf.extracted_text:
-                    preview = pdf.extracted_text[:1000] + "..." if len(pdf.extracted_text) > 1000 else pdf.extracted_text
+                # Only the first page(s) are decompressed for the preview
+                preview = PDFProcessor.get_text(pdf, max_chars=1000)
+                if preview:
+                    if (pdf.text_chars or 0) > 1000:
+                        preview += "..."
                     st.text_area("Content Preview", preview, height=200, disabled=True, key=f"preview_{pdf.resource_id}", label_visibility="collapsed")
                 else:
                     st.info("No text extracted")
@@ -273,17 +298,14 @@ with tab3:
                         if success:
                             st.success(message)
                             
-                            # Generate embeddings
-                            with st.spinner("🤖 Generating embeddings for AI search..."):
-                                success_emb, message_emb = rag_engine.generate_embeddings(resource_id)
-                                
-                                if success_emb:
-                                    st.success(message_emb)
-                                    st.balloons()
-                                    st.info("✨ Your PDF is now ready! Go to Chat and ask questions about it!")
-                                    st.rerun()
-                                else:
-                                    st.warning(f"⚠️ PDF uploaded but embeddings failed: {message_emb}")
+                            # Generate embeddings in the background
+                            job_id = EmbeddingWorker.enqueue(resource_id)
+                            
+                            if job_id:
+                                st.balloons()
+                                st.info("🤖 Preparing your PDF for AI search in the background. Track progress in 📄 My Documents!")
+                            else:
+                                st.warning("⚠️ PDF uploaded but could not be queued for AI search")
                         else:
                             st.error(message)
             else:
@@ -1,13 +1,15 @@
 import streamlit as st
-from core.auth_manager import AuthManager
 from core.day_manager import DayManager
-from database.models import StudyPlan, Quiz, ProgressAnalytics
-from database.db_manager import SessionLocal
+from core.dashboard_service import DashboardService
 from utils import safe_percentage, safe_format, UIHelpers
 from styles.design_system import DesignSystem as DS
 from styles.components import UIComponents
 import pandas as pd
 from datetime import date, timedelta
+from database.db_manager import ensure_migrated
+
+# Bring the schema up to date before anything queries it (once per process)
+ensure_migrated()
 
 st.set_page_config(page_title="Progress", page_icon="📈", layout="wide")
 
@@ -20,8 +22,10 @@ if 'user_id' not in st.session_state:
     st.stop()
 
 user_id = st.session_state['user_id']
-user = AuthManager.get_user_by_id(user_id)
-profile = AuthManager.get_user_profile(user_id)
+
+# Profile, today's summary, plan and quiz aggregates in one snapshot (see core/dashboard_service.py)
+snapshot = DashboardService.get_snapshot(user_id)
+profile = snapshot["profile"] if snapshot else None
 
 if not profile or not profile.onboarding_completed:
     st.warning("⚠️ Please complete onboarding first!")
@@ -38,7 +42,7 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # Get summary
-summary = DayManager.get_today_summary(user_id)
+summary = snapshot["today"]
 
 # Header Stats
 col1, col2, col3, col4 = st.columns(4)
@@ -172,63 +176,59 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
-db = SessionLocal()
-try:
-    quizzes = db.query(Quiz).filter(
-        Quiz.user_id == user_id,
-        Quiz.status == 'completed'
-    ).order_by(Quiz.created_at.desc()).limit(10).all()
-
-    if quizzes:
-        # Create dataframe
-        quiz_data = []
-        for q in quizzes:
-            score = q.score if q.score is not None else 0
-            max_score = q.max_score if q.max_score is not None else 1
-            percentage = safe_percentage(score, max_score, 0)
-            
-            # Color based on score
-            if percentage >= 80:
-                badge = UIComponents.badge("Excellent", "success")
-            elif percentage >= 60:
-                badge = UIComponents.badge("Good", "primary")
-            else:
-                badge = UIComponents.badge("Practice", "warning")
-            
-            quiz_data.append({
-                "Topic": q.topic,
-                "Score": f"{score}/{max_score}",
-                "Percentage": f"{percentage:.0f}%",
-                "Date": q.attempted_at.strftime("%b %d") if q.attempted_at else "N/A"
-            })
-
-        df = pd.DataFrame(quiz_data)
-        st.dataframe(df, use_container_width=True, hide_index=True)
-
-        # Calculate average score safely
-        valid_scores = []
-        for q in quizzes:
-            if q.score is not None and q.max_score is not None and q.max_score > 0:
-                percentage = safe_percentage(q.score, q.max_score, 0)
-                valid_scores.append(percentage)
-        
-        avg_percentage = sum(valid_scores) / len(valid_scores) if valid_scores else 0
-
-        col1, col2 = st.columns(2)
-        with col1:
-            UIComponents.stat_card("Total Quizzes", len(quizzes), "📝")
-        with col2:
-            UIComponents.stat_card("Average Score", safe_format(avg_percentage, "{:.1f}%", "N/A"), "🎯")
-    else:
-        st.markdown(f"""
-        <div class="glass-card" style="text-align: center; padding: {DS.SPACE_10};">
-            <div style="font-size: 4rem; margin-bottom: {DS.SPACE_4};">📝</div>
-            <h3 style="color: {DS.PRIMARY};">No Quizzes Yet</h3>
-            <p style="color: {DS.TEXT_SECONDARY};">Take your first quiz to see your performance here!</p>
-        </div>
-        """, unsafe_allow_html=True)
-finally:
-    db.close()
+quizzes = snapshot["recent_quizzes"]
+
+if quizzes:
+    # Create dataframe
+    quiz_data = []
+    for q in quizzes:
+        score = q.score if q.score is not None else 0
+        max_score = q.max_score if q.max_score is not None else 1
+        percentage = safe_percentage(score, max_score, 0)
+
+        # Color based on score
+        if percentage >= 80:
+            badge = UIComponents.badge("Excellent", "success")
+        elif percentage >= 60:
+            badge = UIComponents.badge("Good", "primary")
+        else:
+            badge = UIComponents.badge("Practice", "warning")
+
+        quiz_data.append({
+            "Topic": q.topic,
+            "Score": f"{score}/{max_score}" + (" ⏳ provisional" if q.status == 'grading' else ""),
+            "Percentage": f"{percentage:.0f}%",
+            "Date": q.attempted_at.strftime("%b %d") if q.attempted_at else "N/A"
+        })
+
+    df = pd.DataFrame(quiz_data)
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+    if any(q.status == 'grading' for q in quizzes):
+        st.caption("⏳ Provisional scores count only the answers graded so far; the rest are being reviewed")
+
+    # Calculate average score safely
+    valid_scores = []
+    for q in quizzes:
+        if q.score is not None and q.max_score is not None and q.max_score > 0:
+            percentage = safe_percentage(q.score, q.max_score, 0)
+            valid_scores.append(percentage)
+
+    avg_percentage = sum(valid_scores) / len(valid_scores) if valid_scores else 0
+
+    col1, col2 = st.columns(2)
+    with col1:
+        UIComponents.stat_card("Total Quizzes", len(quizzes), "📝")
+    with col2:
+        UIComponents.stat_card("Average Score", safe_format(avg_percentage, "{:.1f}%", "N/A"), "🎯")
+else:
+    st.markdown(f"""
+    <div class="glass-card" style="text-align: center; padding: {DS.SPACE_10};">
+        <div style="font-size: 4rem; margin-bottom: {DS.SPACE_4};">📝</div>
+        <h3 style="color: {DS.PRIMARY};">No Quizzes Yet</h3>
+        <p style="color: {DS.TEXT_SECONDARY};">Take your first quiz to see your performance here!</p>
+    </div>
+    """, unsafe_allow_html=True)
 
 st.markdown(f"<div style='margin: {DS.SPACE_10} 0;'></div>", unsafe_allow_html=True)
 
@@ -239,63 +239,49 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
-db = SessionLocal()
-try:
-    all_plans = db.query(StudyPlan).filter(
-        StudyPlan.user_id == user_id
-    ).order_by(StudyPlan.day_number).all()
-
-    if all_plans:
-        completed = sum(1 for p in all_plans if p.status == 'completed')
-        in_progress = sum(1 for p in all_plans if p.status == 'in_progress')
-        pending = sum(1 for p in all_plans if p.status == 'pending')
-
-        col1, col2, col3 = st.columns(3)
-
-        with col1:
-            UIComponents.stat_card("Completed", completed, "✅")
-        with col2:
-            UIComponents.stat_card("In Progress", in_progress, "🔄")
-        with col3:
-            UIComponents.stat_card("Pending", pending, "⏳")
-
-        st.markdown(f"<div style='margin: {DS.SPACE_6} 0;'></div>", unsafe_allow_html=True)
-
-        # Topics breakdown
-        st.markdown(f"<h3 style='color: {DS.PRIMARY};'>Topics Covered</h3>", unsafe_allow_html=True)
-
-        completed_plans = [p for p in all_plans if p.status == 'completed']
-        if completed_plans:
-            topics = {}
-            for plan in completed_plans:
-                topic = plan.topic
-                if topic in topics:
-                    topics[topic] += 1
-                else:
-                    topics[topic] = 1
-
-            for topic, count in topics.items():
-                st.markdown(f"""
-                <div style="background: {DS.SURFACE}; padding: {DS.SPACE_3}; border-radius: {DS.RADIUS_MD}; 
-                            margin-bottom: {DS.SPACE_2}; border-left: 4px solid {DS.ACCENT};">
-                    <strong style="color: {DS.TEXT_PRIMARY};">✅ {topic}</strong>
-                    <span style="color: {DS.TEXT_MUTED}; margin-left: {DS.SPACE_2};">
-                        ({count} day{'s' if count > 1 else ''})
-                    </span>
-                </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.info("No topics completed yet. Keep going!")
+plan_counts = snapshot["plan_counts"]
+
+if snapshot["total_plans"]:
+    completed = plan_counts['completed']
+    in_progress = plan_counts['in_progress']
+    pending = plan_counts['pending']
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        UIComponents.stat_card("Completed", completed, "✅")
+    with col2:
+        UIComponents.stat_card("In Progress", in_progress, "🔄")
+    with col3:
+        UIComponents.stat_card("Pending", pending, "⏳")
+
+    st.markdown(f"<div style='margin: {DS.SPACE_6} 0;'></div>", unsafe_allow_html=True)
+
+    # Topics breakdown
+    st.markdown(f"<h3 style='color: {DS.PRIMARY};'>Topics Covered</h3>", unsafe_allow_html=True)
+
+    topics_completed = snapshot["topics_completed"]
+    if topics_completed:
+        for topic, count in topics_completed:
+            st.markdown(f"""
+            <div style="background: {DS.SURFACE}; padding: {DS.SPACE_3}; border-radius: {DS.RADIUS_MD}; 
+                        margin-bottom: {DS.SPACE_2}; border-left: 4px solid {DS.ACCENT};">
+                <strong style="color: {DS.TEXT_PRIMARY};">✅ {topic}</strong>
+                <span style="color: {DS.TEXT_MUTED}; margin-left: {DS.SPACE_2};">
+                    ({count} day{'s' if count > 1 else ''})
+                </span>
+            </div>
+            """, unsafe_allow_html=True)
     else:
-        st.markdown(f"""
-        <div class="glass-card" style="text-align: center; padding: {DS.SPACE_10};">
-            <div style="font-size: 4rem; margin-bottom: {DS.SPACE_4};">📚</div>
-            <h3 style="color: {DS.PRIMARY};">No Study Plan Yet</h3>
-            <p style="color: {DS.TEXT_SECONDARY};">Complete onboarding to generate your personalized study plan!</p>
-        </div>
-        """, unsafe_allow_html=True)
-finally:
-    db.close()
+        st.info("No topics completed yet. Keep going!")
+else:
+    st.markdown(f"""
+    <div class="glass-card" style="text-align: center; padding: {DS.SPACE_10};">
+        <div style="font-size: 4rem; margin-bottom: {DS.SPACE_4};">📚</div>
+        <h3 style="color: {DS.PRIMARY};">No Study Plan Yet</h3>
+        <p style="color: {DS.TEXT_SECONDARY};">Complete onboarding to generate your personalized study plan!</p>
+    </div>
+    """, unsafe_allow_html=True)
 
 st.markdown(f"<div style='margin: {DS.SPACE_10} 0;'></div>", unsafe_allow_html=True)
 
@@ -313,30 +299,18 @@ if profile.streak_count >= 7:
 elif profile.streak_count >= 3:
     achievements.append(("⭐ Consistency Champion", f"{profile.streak_count}-day streak!"))
 
-db = SessionLocal()
-try:
-    total_quizzes = db.query(Quiz).filter(
-        Quiz.user_id == user_id,
-        Quiz.status == 'completed'
-    ).count()
-
-    if total_quizzes >= 10:
-        achievements.append(("🎓 Quiz Master", f"Completed {total_quizzes} quizzes!"))
-    elif total_quizzes >= 5:
-        achievements.append(("📝 Quiz Enthusiast", f"Completed {total_quizzes} quizzes!"))
-
-    # Perfect scores
-    perfect_quizzes = db.query(Quiz).filter(
-        Quiz.user_id == user_id,
-        Quiz.status == 'completed',
-        Quiz.score == Quiz.max_score
-    ).count()
-
-    if perfect_quizzes > 0:
-        achievements.append(("💯 Perfect Score", f"Achieved perfection {perfect_quizzes} time{'s' if perfect_quizzes > 1 else ''}!"))
-
-finally:
-    db.close()
+total_quizzes = snapshot["quiz_count"]
+
+if total_quizzes >= 10:
+    achievements.append(("🎓 Quiz Master", f"Completed {total_quizzes} quizzes!"))
+elif total_quizzes >= 5:
+    achievements.append(("📝 Quiz Enthusiast", f"Completed {total_quizzes} quizzes!"))
+
+# Perfect scores
+perfect_quizzes = snapshot["perfect_quizzes"]
+
+if perfect_quizzes > 0:
+    achievements.append(("💯 Perfect Score", f"Achieved perfection {perfect_quizzes} time{'s' if perfect_quizzes > 1 else ''}!"))
 
 if achievements:
     cols = st.columns(min(3, len(achievements)))
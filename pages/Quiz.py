@@ -1,11 +1,16 @@
 import streamlit as st
 from core.quiz_engine import QuizEngine
+from core.question_bank import QuestionBank
 from database.models import StudentProfile, StudyPlan, Quiz, QuizResponse
-from database.db_manager import SessionLocal
+from database.db_manager import SessionLocal, ensure_migrated
+from database.unit_of_work import UnitOfWork, fetch_one
 from datetime import datetime
 from styles.design_system import DesignSystem as DS
 from styles.components import UIComponents
 
+# Bring the schema up to date before anything queries it (once per process)
+ensure_migrated()
+
 st.set_page_config(page_title="Quiz", page_icon="📝", layout="wide")
 
 # Inject CSS
@@ -18,6 +23,9 @@ if 'user_id' not in st.session_state:
 
 user_id = st.session_state['user_id']
 
+QuestionBank.ensure_started()
+QuizEngine.ensure_regrade_sweeper()
+
 # Initialize session state
 if 'current_quiz' not in st.session_state:
     st.session_state.current_quiz = None
@@ -33,17 +41,11 @@ if 'selected_quiz_id' not in st.session_state:
     st.session_state.selected_quiz_id = None
 
 # Get user's current topic
-db = SessionLocal()
-try:
-    profile = db.query(StudentProfile).filter(StudentProfile.user_id == user_id).first()
-    today_plan = db.query(StudyPlan).filter(
-        StudyPlan.user_id == user_id,
-        StudyPlan.day_number == profile.current_day_number
-    ).first() if profile else None
+with UnitOfWork("Quiz") as uow:
+    profile = fetch_one(uow.session, StudentProfile, user_id=user_id)
+    today_plan = fetch_one(uow.session, StudyPlan, user_id=user_id, day_number=profile.current_day_number) if profile else None
     
     current_topic = today_plan.topic if today_plan else None
-finally:
-    db.close()
 
 # Header
 st.markdown(f"""
@@ -115,12 +117,23 @@ if st.session_state.view_mode == 'home':
                 st.error("❌ Please enter a topic")
             else:
                 with st.spinner(f"🤖 Generating {num_questions} {quiz_type.upper()} questions about {topic}..."):
+                    # Questions appear here as the model finishes each one
+                    progress_bar = st.progress(0.0)
+                    ready_list = st.empty()
+                    ready = []
+                    
+                    def show_question(question, count):
+                        ready.append(question.get('question', ''))
+                        progress_bar.progress(min(count / num_questions, 1.0), text=f"{count}/{num_questions} questions ready")
+                        ready_list.markdown("\n".join(f"{i}. {text}" for i, text in enumerate(ready, 1)))
+                    
                     quiz, error = QuizEngine.generate_quiz(
                         user_id=user_id,
                         topic=topic,
                         quiz_type=quiz_type,
                         difficulty=difficulty,
-                        num_questions=num_questions
+                        num_questions=num_questions,
+                        on_question=show_question
                     )
                     
                     if quiz:
@@ -274,7 +287,7 @@ elif st.session_state.view_mode == 'quiz_list':
     try:
         quizzes = db.query(Quiz).filter(
             Quiz.user_id == user_id,
-            Quiz.status == 'completed'
+            Quiz.status.in_(Quiz.SUBMITTED_STATUSES)
         ).order_by(Quiz.attempted_at.desc()).all()
     finally:
         db.close()
@@ -314,7 +327,10 @@ elif st.session_state.view_mode == 'quiz_list':
             with col1:
                 st.caption(f"🏷️ {quiz.quiz_type.upper()}")
             with col2:
-                st.caption(f"🎯 {quiz.score}/{quiz.max_score} points")
+                if quiz.status == 'grading':
+                    st.caption(f"⏳ {quiz.score}/{quiz.max_score} so far, grading")
+                else:
+                    st.caption(f"🎯 {quiz.score}/{quiz.max_score} points")
             with col3:
                 st.caption(f"📅 {quiz.attempted_at.strftime('%b %d, %Y') if quiz.attempted_at else 'N/A'}")
             with col4:
@@ -351,6 +367,11 @@ elif st.session_state.view_mode == 'analysis':
     
     st.markdown(f"<div style='margin: {DS.SPACE_6} 0;'></div>", unsafe_allow_html=True)
     
+    if quiz.status == 'grading':
+        # Also restarts re-grading after an app restart
+        QuizEngine.schedule_regrade(quiz.quiz_id)
+        st.info("⏳ Some answers are still waiting for their AI review. The score below counts graded answers only; check back in a minute.")
+    
     # Score card
     percentage = round((quiz.score / quiz.max_score) * 100, 1) if quiz.max_score > 0 else 0
     
@@ -382,7 +403,7 @@ elif st.session_state.view_mode == 'analysis':
     
     # Summary stats
     correct_count = sum(1 for r in responses if r.is_correct)
-    wrong_count = len(responses) - correct_count
+    wrong_count = sum(1 for r in responses if r.is_correct is not None) - correct_count
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -399,8 +420,8 @@ elif st.session_state.view_mode == 'analysis':
     
     for response in responses:
         is_correct = response.is_correct
-        status_icon = "✅" if is_correct else "❌"
-        border_color = DS.ACCENT if is_correct else DS.ACCENT_ERROR
+        status_icon = "✅" if is_correct else "⏳" if is_correct is None else "❌"
+        border_color = DS.ACCENT if is_correct else DS.ACCENT_WARNING if is_correct is None else DS.ACCENT_ERROR
         
         st.markdown(f"""
         <div class="modern-card" style="border-left: 4px solid {border_color};">
@@ -1,11 +1,17 @@
 import streamlit as st
 from core.auth_manager import AuthManager
 from database.models import User, StudentProfile, StudyPlan, Quiz, ChatSession, UploadedResource
-from database.db_manager import SessionLocal
+from database.db_manager import SessionLocal, ensure_migrated
+from sqlalchemy import func, case
+from llm.vector_index import vector_index_cache
+from core.content_store import ContentStore
 from datetime import datetime
 from styles.design_system import DesignSystem as DS
 from styles.components import UIComponents
 
+# Bring the schema up to date before anything queries it (once per process)
+ensure_migrated()
+
 st.set_page_config(page_title="Settings", page_icon="⚙️", layout="wide")
 
 # Inject CSS
@@ -95,8 +101,11 @@ with tab1:
     try:
         total_plans = db.query(StudyPlan).filter(StudyPlan.user_id == user_id).count()
         completed_plans = db.query(StudyPlan).filter(StudyPlan.user_id == user_id, StudyPlan.status == 'completed').count()
-        total_quizzes = db.query(Quiz).filter(Quiz.user_id == user_id, Quiz.status == 'completed').count()
-        total_pdfs = db.query(UploadedResource).filter(UploadedResource.user_id == user_id).count()
+        total_quizzes, grading_quizzes = db.query(
+            func.count(),
+            func.coalesce(func.sum(case((Quiz.status == 'grading', 1), else_=0)), 0)
+        ).filter(Quiz.user_id == user_id, Quiz.status.in_(Quiz.SUBMITTED_STATUSES)).one()
+        total_pdfs = db.query(func.count(UploadedResource.resource_id)).filter(UploadedResource.user_id == user_id).scalar()
         
         col1, col2, col3, col4 = st.columns(4)
         
@@ -108,6 +117,8 @@ with tab1:
         
         with col3:
             UIComponents.stat_card("Quizzes Taken", total_quizzes, "📝")
+            if grading_quizzes:
+                st.caption(f"⏳ {grading_quizzes} still being graded")
         
         with col4:
             UIComponents.stat_card("PDFs Uploaded", total_pdfs, "📄")
@@ -360,16 +371,11 @@ with tab4:
                     db.query(Quiz).filter(Quiz.user_id == user_id).delete()
                     db.query(ChatSession).filter(ChatSession.user_id == user_id).delete()
                     
-                    import os
+                    # Shared PDFs stay on disk while other users still reference them
                     resources = db.query(UploadedResource).filter(UploadedResource.user_id == user_id).all()
-                    for resource in resources:
-                        if os.path.exists(resource.file_path):
-                            os.remove(resource.file_path)
-                        embeddings_path = f"data/embeddings/{resource.resource_id}.pkl"
-                        if os.path.exists(embeddings_path):
-                            os.remove(embeddings_path)
+                    cleanups = [ContentStore.release(db, resource, commit=False) for resource in resources]
                     
-                    db.query(UploadedResource).filter(UploadedResource.user_id == user_id).delete()
+                    vector_index_cache.drop_user(user_id)
                     
                     db_profile = db.query(StudentProfile).filter(StudentProfile.user_id == user_id).first()
                     if db_profile:
@@ -378,6 +384,7 @@ with tab4:
                         db_profile.streak_count = 0
                     
                     db.commit()
+                    ContentStore.remove_files(cleanups)
                     
                     st.success("✅ All data deleted successfully!")
                     st.info("Please complete onboarding again to continue.")
@@ -413,20 +420,16 @@ with tab4:
                     db.query(Quiz).filter(Quiz.user_id == user_id).delete()
                     db.query(ChatSession).filter(ChatSession.user_id == user_id).delete()
                     
-                    import os
+                    # Shared PDFs stay on disk while other users still reference them
                     resources = db.query(UploadedResource).filter(UploadedResource.user_id == user_id).all()
-                    for resource in resources:
-                        if os.path.exists(resource.file_path):
-                            os.remove(resource.file_path)
-                        embeddings_path = f"data/embeddings/{resource.resource_id}.pkl"
-                        if os.path.exists(embeddings_path):
-                            os.remove(embeddings_path)
+                    cleanups = [ContentStore.release(db, resource, commit=False) for resource in resources]
                     
-                    db.query(UploadedResource).filter(UploadedResource.user_id == user_id).delete()
+                    vector_index_cache.drop_user(user_id)
                     db.query(StudentProfile).filter(StudentProfile.user_id == user_id).delete()
                     db.query(User).filter(User.user_id == user_id).delete()
                     
                     db.commit()
+                    ContentStore.remove_files(cleanups)
                     
                     # Logout
                     st.session_state.authenticated = False
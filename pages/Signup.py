@@ -3,6 +3,10 @@ from core.auth_manager import AuthManager
 from utils import Validators
 from styles.design_system import DesignSystem as DS
 from styles.components import UIComponents
+from database.db_manager import ensure_migrated
+
+# Bring the schema up to date before anything queries it (once per process)
+ensure_migrated()
 
 st.set_page_config(page_title="Sign Up", page_icon="✨", layout="centered")
 
@@ -1,7 +1,11 @@
 import streamlit as st
 from core.auth_manager import AuthManager
+from database.db_manager import ensure_migrated
 import re
 
+# Bring the schema up to date before anything queries it (once per process)
+ensure_migrated()
+
 # Custom CSS for auth page
 st.markdown("""
 <style>
@@ -3,6 +3,10 @@ from core.onboarding import OnboardingManager
 from core.plan_generator import PlanGenerator
 from datetime import datetime, timedelta
 from utils import Validators, UIHelpers
+from database.db_manager import ensure_migrated
+
+# Bring the schema up to date before anything queries it (once per process)
+ensure_migrated()
 
 st.set_page_config(page_title="Onboarding", page_icon="🎓", layout="centered")
 
@@ -0,0 +1,60 @@
+"""
+Shared test setup: a scratch SQLite database and working directory (the stores
+under data/ use relative paths) and the offline fake LLM backend, all in place
+before any app module is imported.
+"""
+import tempfile
+import shutil
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix="studyplanner-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORKDIR, 'test.db')}"
+os.environ["LLM_BACKEND"] = "fake"
+os.environ["LLM_FAKE_LATENCY"] = "0"
+os.environ["LLM_FAKE_TOKENS_PER_SEC"] = "0"
+os.environ["EMBEDDING_WARMUP"] = "0"
+os.chdir(WORKDIR)
+
+import pytest
+from database.connection import SQLITE_PRAGMAS
+
+# Enforce foreign keys like PostgreSQL does (the app's SQLite connections don't)
+SQLITE_PRAGMAS["foreign_keys"] = "ON"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Migrate the scratch database once; it is removed with the working directory"""
+    from database.db_manager import engine, migrate
+    migrate()
+    yield engine
+    engine.dispose()
+    os.chdir(ROOT)
+    shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+@pytest.fixture
+def db(database):
+    """A session on the scratch database; every table is emptied afterwards"""
+    from database.db_manager import SessionLocal
+    from database.models import Base
+
+    session = SessionLocal()
+    yield session
+    session.rollback()
+    session.close()
+
+    with database.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+    # The FTS5 tables aren't in the metadata; their rowids follow search_documents
+    from llm.keyword_index import keyword_index, KINDS
+    if keyword_index.available:
+        with database.begin() as conn:
+            for table in KINDS.values():
+                conn.exec_driver_sql(f"DELETE FROM {table}")
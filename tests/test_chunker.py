@@ -0,0 +1,56 @@
+from llm.chunker import TokenCounter, iter_sentences, iter_chunks, estimate_chunk_count
+
+
+def _sentence(n: int, words: int = 10) -> str:
+    return " ".join(f"w{n}x{i}" for i in range(words - 1)) + f" end{n}."
+
+
+def test_sentences_split_on_ends_and_blank_lines():
+    text = "First one.  Second   one!\n\nA heading\n\nThird? tail"
+    assert list(iter_sentences(text)) == ["First one.", "Second one!", "A heading", "Third?", "tail"]
+
+
+def test_a_sentence_continues_across_pages():
+    assert list(iter_sentences(["The cell", "membrane is thin. Next."])) == ["The cell membrane is thin.", "Next."]
+
+
+def test_text_without_boundaries_is_cut_at_max_chars():
+    sentences = list(iter_sentences(["word " * 100], max_chars=50))
+    assert all(len(sentence) <= 50 for sentence in sentences)
+    assert " ".join(sentences).split() == ["word"] * 100
+
+
+def test_chunks_respect_max_tokens_and_overlap():
+    counter = TokenCounter()
+    text = " ".join(_sentence(n) for n in range(20))
+    chunks = list(iter_chunks(text, max_tokens=40, overlap_tokens=14, counter=counter))
+
+    assert len(chunks) > 1
+    assert all(sum(counter.count(sentence) for sentence in iter_sentences(chunk)) <= 40 for chunk in chunks)
+    # Consecutive chunks share their boundary sentence
+    for previous, current in zip(chunks, chunks[1:]):
+        last_sentence = previous.rsplit(". ", 1)[-1]
+        assert current.startswith(last_sentence)
+
+
+def test_every_sentence_lands_in_a_chunk_in_order():
+    sentences = [_sentence(n) for n in range(15)]
+    chunks = list(iter_chunks(sentences, max_tokens=30, overlap_tokens=0))
+
+    assert " ".join(chunks).split() == " ".join(sentences).split()
+
+
+def test_over_long_sentences_are_split():
+    chunks = list(iter_chunks("word " * 500, max_tokens=50, overlap_tokens=0))
+    assert len(chunks) >= 10
+    assert all(len(chunk.split()) <= 50 for chunk in chunks)
+
+
+def test_empty_input_has_no_chunks():
+    assert list(iter_chunks("")) == []
+    assert list(iter_chunks(["", None, "  "])) == []
+
+
+def test_estimate_chunk_count():
+    assert estimate_chunk_count(0) == 1
+    assert estimate_chunk_count(10_000, max_tokens=254, overlap_tokens=32) == -(-10_000 // (222 * 4))
@@ -0,0 +1,116 @@
+import hashlib
+import os
+
+import pytest
+
+from core.content_store import ContentStore
+from core.page_store import page_store
+from core.pdf_processor import PDFProcessor
+from core.embedding_worker import EmbeddingWorker
+from database.db_manager import SessionLocal
+from database.models import User, ContentBlob, UploadedResource, EmbeddingJob
+
+FILE_BYTES = b"%PDF-1.4 not really a pdf"
+CONTENT_HASH = hashlib.sha256(FILE_BYTES).hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def upload_dir():
+    os.makedirs(ContentStore.UPLOAD_DIR, exist_ok=True)
+
+
+def _extract(file_path, key):
+    return page_store.write_text(key, "Photosynthesis turns light into chemical energy.")
+
+
+def _user(db, user_id="u1"):
+    db.add(User(user_id=user_id, username=user_id, email=f"{user_id}@example.com",
+                password_hash="-", full_name=user_id))
+    db.commit()
+    return user_id
+
+
+def _upload(db, user_id):
+    """What PDFProcessor.upload_pdf does once the bytes are read: share or store the blob"""
+    blob = ContentStore.acquire(db, CONTENT_HASH, FILE_BYTES)
+    created = False
+    if not blob:
+        blob, error, created = ContentStore.create(db, CONTENT_HASH, FILE_BYTES, 'pdf', _extract)
+        assert error is None
+
+    resource = UploadedResource(user_id=user_id, filename="notes.pdf", file_path=blob.file_path, file_type='pdf',
+                                content_hash=CONTENT_HASH, text_chars=blob.text_chars, processed=True)
+    db.add(resource)
+    db.commit()
+    return resource, created
+
+
+def _ref_count(db):
+    db.expire_all()
+    blob = db.get(ContentBlob, CONTENT_HASH)
+    return blob.ref_count if blob else None
+
+
+def test_identical_uploads_share_one_blob(db):
+    first, created_first = _upload(db, _user(db, "u1"))
+    second, created_second = _upload(db, _user(db, "u2"))
+
+    assert (created_first, created_second) == (True, False)
+    assert first.file_path == second.file_path
+    assert _ref_count(db) == 2
+    assert db.query(ContentBlob).count() == 1
+
+
+def test_blob_is_freed_with_its_last_reference(db):
+    first, _ = _upload(db, _user(db, "u1"))
+    second, _ = _upload(db, _user(db, "u2"))
+    file_path = first.file_path
+
+    ContentStore.release(db, first)
+    assert _ref_count(db) == 1
+    assert os.path.exists(file_path) and page_store.exists(CONTENT_HASH)
+
+    ContentStore.release(db, second)
+    assert _ref_count(db) is None
+    assert not os.path.exists(file_path)
+    assert not page_store.exists(CONTENT_HASH)
+
+
+def test_deferred_release_leaves_files_until_remove_files(db):
+    resource, _ = _upload(db, _user(db))
+
+    cleanup = ContentStore.release(db, resource, commit=False)
+    db.rollback()
+    assert _ref_count(db) == 1 and os.path.exists(cleanup["file_path"])
+
+    resource = db.query(UploadedResource).one()
+    cleanup = ContentStore.release(db, resource, commit=False)
+    db.commit()
+    ContentStore.remove_files([cleanup])
+    assert not os.path.exists(cleanup["file_path"])
+
+
+def test_concurrent_create_takes_a_reference_on_the_stored_blob(db):
+    _upload(db, _user(db))
+
+    other = SessionLocal()
+    try:
+        blob, error, created = ContentStore.create(other, CONTENT_HASH, FILE_BYTES, 'pdf', _extract)
+        other.commit()
+    finally:
+        other.close()
+
+    assert blob is not None and error is None and created is False
+    assert _ref_count(db) == 2
+
+
+def test_deleting_a_queued_pdf_removes_its_jobs(db):
+    resource, _ = _upload(db, _user(db))
+    assert EmbeddingWorker.enqueue(resource.resource_id)
+
+    # Foreign keys are enforced in the test database, as on PostgreSQL
+    success, message = PDFProcessor.delete_pdf(resource.resource_id)
+
+    assert success, message
+    assert db.query(EmbeddingJob).count() == 0
+    assert db.query(UploadedResource).count() == 0
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.dashboard_service import DashboardService
+from database.models import User, StudentProfile, StudyPlan, Quiz
+from database.unit_of_work import UnitOfWork
+
+PLANS = [
+    (1, "Cells", "completed"),
+    (2, "Cells", "completed"),
+    (3, "Genetics", "in_progress"),
+    (4, "Genetics", "pending"),
+    (5, "Evolution", "pending"),
+    (6, "Ecology", "pending"),
+    (7, "Ecology", "pending"),
+]
+
+
+@pytest.fixture
+def student(db):
+    db.add(User(user_id="u1", username="u1", email="u1@example.com", password_hash="-", full_name="Ada"))
+    db.commit()
+    db.add(StudentProfile(user_id="u1", current_day_number=3, streak_count=2, onboarding_completed=True))
+    for day, topic, status in PLANS:
+        tasks = [{"completed": True}, {"completed": False}] if day == 3 else []
+        db.add(StudyPlan(user_id="u1", day_number=day, topic=topic, status=status, tasks=tasks))
+
+    started = datetime(2026, 1, 1)
+    for n, (score, status) in enumerate([(50, "completed"), (25, "completed"), (10, "grading"), (None, "pending")]):
+        db.add(Quiz(user_id="u1", topic="Cells", quiz_type="mcq", questions=[], score=score, max_score=50,
+                    status=status, created_at=started + timedelta(hours=n)))
+    db.commit()
+    return "u1"
+
+
+def test_snapshot_aggregates(student):
+    snapshot = DashboardService.get_snapshot(student)
+
+    assert snapshot["user"].full_name == "Ada"
+    assert snapshot["today_plan"].day_number == 3
+    assert snapshot["today"]["tasks_completed"] == 1 and snapshot["today"]["total_tasks"] == 2
+    assert [plan.day_number for plan in snapshot["upcoming_plans"]] == [4, 5, 6]
+    assert snapshot["plan_counts"] == {"completed": 2, "in_progress": 1, "pending": 4}
+    assert snapshot["total_plans"] == 7
+    assert snapshot["topics_completed"] == [("Cells", 2)]
+
+
+def test_snapshot_quiz_stats_skip_unsubmitted_quizzes(student):
+    snapshot = DashboardService.get_snapshot(student)
+
+    assert snapshot["quiz_count"] == 3
+    assert snapshot["avg_quiz_score"] == pytest.approx((100 + 50 + 20) / 3)
+    assert snapshot["perfect_quizzes"] == 1
+    assert snapshot["provisional_quizzes"] == 1
+    assert [quiz.score for quiz in snapshot["recent_quizzes"]] == [10, 25, 50]
+
+
+def test_snapshot_query_count_does_not_grow_with_rows(student, db):
+    with UnitOfWork("snapshot") as uow:
+        DashboardService.get_snapshot(student)
+    small = uow.stats["queries"]
+
+    for n in range(30):
+        db.add(Quiz(user_id=student, topic="Cells", quiz_type="mcq", questions=[], score=n, max_score=50,
+                    status="completed"))
+        db.add(StudyPlan(user_id=student, day_number=100 + n, topic=f"Topic {n}", status="completed"))
+    db.commit()
+
+    with UnitOfWork("snapshot") as uow:
+        DashboardService.get_snapshot(student)
+    assert uow.stats["queries"] == small
+
+
+def test_no_snapshot_without_a_profile(db):
+    db.add(User(user_id="u2", username="u2", email="u2@example.com", password_hash="-", full_name="u2"))
+    db.commit()
+    assert DashboardService.get_snapshot("u2") is None
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+import hashlib
+import os
+
+import numpy as np
+import pytest
+
+from core.content_store import ContentStore
+from core.embedding_worker import EmbeddingWorker
+from core.page_store import page_store
+from database.models import User, UploadedResource, EmbeddingJob
+from llm.embedding_model import EmbeddingModel
+from llm.rag_engine import rag_engine
+
+TEXT = "Mitochondria produce ATP. " * 200
+
+
+class _Model:
+    """Small deterministic stand-in for the sentence transformer"""
+    max_seq_length = 64
+    tokenizer = None
+
+    def encode(self, texts, batch_size=None, **kwargs):
+        vectors = np.stack([np.random.default_rng(len(text)).normal(size=8) for text in texts]).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture(autouse=True)
+def model(monkeypatch):
+    monkeypatch.setattr(EmbeddingModel, "_model", _Model())
+
+
+@pytest.fixture
+def resource(db):
+    os.makedirs(ContentStore.UPLOAD_DIR, exist_ok=True)
+    db.add(User(user_id="u1", username="u1", email="u1@example.com", password_hash="-", full_name="U"))
+    file_bytes = os.urandom(32)
+    content_hash = hashlib.sha256(file_bytes).hexdigest()
+    blob, error, _ = ContentStore.create(db, content_hash, file_bytes, 'pdf',
+                                         lambda path, key: page_store.write_text(key, TEXT))
+    resource = UploadedResource(user_id="u1", filename="bio.pdf", file_path=blob.file_path, file_type='pdf',
+                                content_hash=content_hash, text_chars=blob.text_chars, processed=True)
+    db.add(resource)
+    db.commit()
+    return resource
+
+
+def _job(db, job_id):
+    db.expire_all()
+    return db.get(EmbeddingJob, job_id)
+
+
+def test_enqueue_reuses_the_active_job(db, resource):
+    first = EmbeddingWorker.enqueue(resource.resource_id)
+    assert EmbeddingWorker.enqueue(resource.resource_id) == first
+    assert EmbeddingWorker.enqueue("no-such-resource") is None
+
+
+def test_a_job_is_claimed_once(db, resource):
+    job_id = EmbeddingWorker.enqueue(resource.resource_id)
+
+    assert EmbeddingWorker._claim_job(db, job_id) is True
+    assert EmbeddingWorker._claim_job(db, job_id) is False
+
+    job = _job(db, job_id)
+    assert job.status == 'running' and job.heartbeat_at is not None
+
+
+def test_a_round_embeds_and_completes_the_job(db, resource):
+    job_id = EmbeddingWorker.enqueue(resource.resource_id)
+
+    assert EmbeddingWorker._process_round() is True
+
+    job = _job(db, job_id)
+    assert job.status == 'completed', job.error
+    assert job.chunks_done == job.chunks_total > 0
+    assert db.get(UploadedResource, resource.resource_id).embeddings_generated
+    assert rag_engine.store.exists(resource.content_hash)
+    assert EmbeddingWorker._process_round() is False
+
+
+def test_a_crashed_round_fails_the_jobs_it_claimed(db, resource, monkeypatch):
+    job_id = EmbeddingWorker.enqueue(resource.resource_id)
+
+    def broken(resource):
+        raise RuntimeError("disk on fire")
+    monkeypatch.setattr(ContentStore, "open_text", staticmethod(broken))
+
+    with pytest.raises(RuntimeError):
+        EmbeddingWorker._process_round()
+
+    job = _job(db, job_id)
+    assert job.status == 'failed' and "disk on fire" in job.error
+
+
+def test_recovery_only_requeues_jobs_with_an_expired_lease(db, resource):
+    live = EmbeddingWorker.enqueue(resource.resource_id)
+    EmbeddingWorker._claim_job(db, live)
+
+    stale_at = datetime.utcnow() - timedelta(seconds=EmbeddingWorker.JOB_LEASE_SECONDS * 2)
+    stale = EmbeddingJob(resource_id=resource.resource_id, user_id="u1", status='running',
+                         started_at=stale_at, heartbeat_at=stale_at, chunks_done=5)
+    legacy = EmbeddingJob(resource_id=resource.resource_id, user_id="u1", status='running', started_at=stale_at)
+    db.add_all([stale, legacy])
+    db.commit()
+
+    assert EmbeddingWorker._recover_interrupted_jobs() == 2
+
+    assert _job(db, live).status == 'running'
+    assert _job(db, stale.job_id).status == 'pending' and _job(db, stale.job_id).chunks_done == 0
+    assert _job(db, legacy.job_id).status == 'pending'
@@ -0,0 +1,30 @@
+import pytest
+
+from llm.fusion import reciprocal_rank_fusion, DEFAULT_RRF_K
+
+
+def test_items_in_both_rankings_rise_to_the_top():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d", "a"]])
+    assert [item for item, _ in fused] == ["a", "c", "b", "d"]
+
+
+def test_scores_follow_the_rrf_formula():
+    fused = dict(reciprocal_rank_fusion([["a", "b"], ["b"]], k=10))
+    assert fused["a"] == pytest.approx(1 / 11)
+    assert fused["b"] == pytest.approx(1 / 12 + 1 / 11)
+
+
+def test_weights_scale_each_ranking():
+    fused = reciprocal_rank_fusion([["a"], ["b"]], weights=[1.0, 2.0])
+    assert [item for item, _ in fused] == ["b", "a"]
+    assert fused[0][1] == pytest.approx(2 / (DEFAULT_RRF_K + 1))
+
+
+def test_a_duplicate_only_counts_at_its_best_rank():
+    fused = dict(reciprocal_rank_fusion([["a", "b", "a"]], k=0))
+    assert fused == {"a": 1.0, "b": 0.5}
+
+
+def test_limit_and_empty_rankings():
+    assert len(reciprocal_rank_fusion([["a", "b", "c"]], limit=2)) == 2
+    assert reciprocal_rank_fusion([[], []]) == []
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from llm.index_backends import top_k_rows, NumpyBackend, FaissFlatBackend, faiss
+
+
+SIMILARITIES = np.array([0.1, 0.9, 0.4, 0.7, 0.2], dtype=np.float32)
+
+
+def test_top_k_rows_best_first():
+    scores, rows = top_k_rows(SIMILARITIES, 3)
+    assert rows.tolist() == [1, 3, 2]
+    assert scores.tolist() == pytest.approx([0.9, 0.7, 0.4])
+
+
+def test_top_k_rows_min_score_is_exclusive():
+    _, rows = top_k_rows(SIMILARITIES, 5, min_score=0.4)
+    assert rows.tolist() == [1, 3]
+
+
+def test_top_k_rows_k_larger_than_candidates():
+    _, rows = top_k_rows(SIMILARITIES, 10)
+    assert rows.tolist() == [1, 3, 2, 4, 0]
+
+
+@pytest.mark.parametrize("k", [0, -1])
+def test_top_k_rows_non_positive_k_selects_nothing(k):
+    scores, rows = top_k_rows(SIMILARITIES, k)
+    assert len(scores) == 0 and len(rows) == 0
+
+
+def _unit_rows(n: int, dim: int = 8, seed: int = 3) -> np.ndarray:
+    matrix = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def test_numpy_backend_matches_brute_force():
+    matrix = _unit_rows(50)
+    backend = NumpyBackend()
+    backend.build(matrix)
+
+    _, rows = backend.search(matrix[7], 5)
+    assert rows[0] == 7
+    assert rows.tolist() == np.argsort(matrix @ matrix[7])[::-1][:5].tolist()
+    assert len(backend.search(matrix[7], 0)[1]) == 0
+
+
+@pytest.mark.skipif(faiss is None, reason="faiss not installed")
+def test_faiss_flat_agrees_with_numpy():
+    matrix = _unit_rows(50)
+    exact, flat = NumpyBackend(), FaissFlatBackend()
+    exact.build(matrix)
+    flat.build(matrix)
+
+    assert flat.search(matrix[3], 5)[1].tolist() == exact.search(matrix[3], 5)[1].tolist()
+    assert len(flat.search(matrix[3], 0)[1]) == 0
@@ -0,0 +1,52 @@
+from llm.json_stream import JSONObjectStream, parse_json_objects
+
+
+def test_objects_in_an_array_with_prose_and_fences():
+    reply = 'Here you go:\n```json\n[{"a": 1}, {"b": "x, y"}]\n```'
+    assert parse_json_objects(reply) == [{"a": 1}, {"b": "x, y"}]
+
+
+def test_trailing_commas_and_raw_newlines_are_tolerated():
+    assert parse_json_objects('[{"a": "line\nbreak", "b": [1, 2,],},]') == [{"a": "line\nbreak", "b": [1, 2]}]
+
+
+def test_malformed_item_is_skipped_not_the_batch():
+    stream = JSONObjectStream()
+    assert stream.feed('[{"a": 1}, {"b": oops}, {"c": 3}]') == [{"a": 1}, {"c": 3}]
+    assert stream.skipped == 1
+
+
+def test_truncated_tail_never_completes():
+    assert parse_json_objects('[{"a": 1}, {"b": 2, "c": "unfinis') == [{"a": 1}]
+
+
+def test_single_key_wrapper_yields_its_items():
+    reply = '{"questions": [{"question": 1, "score": 7}, {"question": 2, "score": 3}]}'
+    assert parse_json_objects(reply) == [{"question": 1, "score": 7}, {"question": 2, "score": 3}]
+
+
+def test_truncated_wrapper_keeps_its_complete_items():
+    reply = '{"grades": [{"question": 0, "score": 8}, {"question": 1, "sco'
+    assert parse_json_objects(reply) == [{"question": 0, "score": 8}]
+
+
+def test_object_with_more_keys_is_not_unwrapped():
+    mcq = '{"options": [{"t": "A"}, {"t": "B"}], "question": "Q"}'
+    assert parse_json_objects(mcq) == [{"options": [{"t": "A"}, {"t": "B"}], "question": "Q"}]
+
+
+def test_single_key_object_without_object_items_is_kept_whole():
+    assert parse_json_objects('{"keywords": ["a", "b"]}') == [{"keywords": ["a", "b"]}]
+    assert parse_json_objects('{"questions": []}') == [{"questions": []}]
+
+
+def test_array_elements_are_never_unwrapped():
+    reply = '[{"test_cases": [{"input": 1}]}, {"a": 1}]'
+    assert parse_json_objects(reply) == [{"test_cases": [{"input": 1}]}, {"a": 1}]
+
+
+def test_streamed_deltas_match_the_whole_reply():
+    reply = '```json\n{"questions": [{"q": "a {b}"}, {"q": "c\\"d"}]}\n```\n[{"e": 1}]'
+    stream = JSONObjectStream()
+    streamed = list(stream.iter_objects(reply[i:i + 3] for i in range(0, len(reply), 3)))
+    assert streamed == parse_json_objects(reply) == [{"q": "a {b}"}, {"q": 'c"d'}, {"e": 1}]
@@ -0,0 +1,78 @@
+import pytest
+
+from core.question_bank import QuestionBank, fingerprint, topic_key
+from database.models import User, Quiz, BankQuestion
+
+
+def _questions(prefix: str, count: int) -> list:
+    return [{"question": f"{prefix} question {n}?", "options": ["a", "b"], "correct_answer": "a"} for n in range(count)]
+
+
+@pytest.fixture
+def user(db):
+    db.add(User(user_id="u1", username="u1", email="u1@example.com", password_hash="-", full_name="u1"))
+    db.commit()
+    return "u1"
+
+
+def test_topic_keys_and_fingerprints_ignore_cosmetic_differences():
+    assert topic_key("  Cell   Biology ") == topic_key("cell biology")
+    assert fingerprint({"question": "What is DNA?"}) == fingerprint({"question": "what is  dna"})
+    assert fingerprint({"question": "What is DNA?"}) != fingerprint({"question": "What is RNA?"})
+
+
+def test_duplicates_are_not_added_twice(db):
+    questions = _questions("Cells", 3)
+    assert QuestionBank.add_questions("Cells", "easy", "mcq", questions) == 3
+    assert QuestionBank.add_questions("cells ", "easy", "mcq", questions + [{"question": "CELLS question 0"}]) == 0
+    # Other buckets are independent
+    assert QuestionBank.add_questions("Cells", "hard", "mcq", questions) == 3
+
+    assert QuestionBank.stock("Cells", "easy", "mcq") == 3
+
+
+def test_sample_needs_enough_stock(user):
+    QuestionBank.add_questions("Cells", "easy", "mcq", _questions("Cells", 2))
+    assert QuestionBank.sample(user, "Cells", "easy", "mcq", 3) is None
+
+
+def test_sample_prefers_unseen_then_least_served(user, db):
+    bank = _questions("Cells", 6)
+    QuestionBank.add_questions("Cells", "easy", "mcq", bank)
+    db.add(Quiz(user_id=user, topic="Cells", quiz_type="mcq", questions=bank[:3], status="completed"))
+    db.commit()
+
+    first = QuestionBank.sample(user, "Cells", "easy", "mcq", 3)
+    assert {q["question"] for q in first} == {q["question"] for q in bank[3:]}
+
+    # Everything is seen now; the three never served come first
+    db.add(Quiz(user_id=user, topic="Cells", quiz_type="mcq", questions=first, status="completed"))
+    db.commit()
+    second = QuestionBank.sample(user, "Cells", "easy", "mcq", 3)
+    assert {q["question"] for q in second} == {q["question"] for q in bank[:3]}
+
+    served = {row.question["question"]: row.times_served for row in db.query(BankQuestion)}
+    assert set(served.values()) == {1}
+
+
+def test_refill_tops_up_to_target_and_gives_up_on_no_progress(db, monkeypatch):
+    from core.quiz_engine import QuizEngine
+
+    batches = iter([_questions("A", 4), _questions("B", 4), [], []])
+    monkeypatch.setattr(QuizEngine, "_generate_questions", staticmethod(lambda *args, **kwargs: next(batches)))
+    monkeypatch.setattr(QuestionBank, "MIN_STOCK", 5)
+    monkeypatch.setattr(QuestionBank, "TARGET_STOCK", 20)
+
+    assert QuestionBank._refill("Cells", "easy", "mcq") == 8
+    assert QuestionBank.stock("Cells", "easy", "mcq") == 8
+    # At MIN_STOCK or above a bucket is left alone
+    assert QuestionBank._refill("Cells", "easy", "mcq") == 0
+
+
+def test_refill_requests_are_queued_once():
+    QuestionBank.request_refill("Cells", "easy", "mcq")
+    QuestionBank.request_refill(" cells", "easy", "mcq")
+    QuestionBank.request_refill("", "easy", "mcq")
+
+    assert QuestionBank._next_bucket() == ("Cells", "easy", "mcq")
+    assert QuestionBank._next_bucket() is None
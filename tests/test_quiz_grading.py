@@ -0,0 +1,75 @@
+import pytest
+
+from core.dashboard_service import DashboardService
+from core.quiz_engine import QuizEngine
+from database.models import User, StudentProfile, Quiz, QuizResponse
+from llm.llm_client import LLMClient
+
+QUESTIONS = [
+    {"question": "Explain osmosis.", "key_points": ["membrane", "concentration"], "sample_answer": "..."},
+    {"question": "Explain diffusion.", "key_points": ["gradient"], "sample_answer": "..."},
+]
+ANSWERS = {"0": "Water moves across a membrane towards higher solute concentration.",
+           "1": "Particles spread from high to low concentration."}
+
+
+@pytest.fixture
+def quiz(db, monkeypatch):
+    monkeypatch.setattr(QuizEngine, "GRADING_MODE", "parallel")
+    monkeypatch.setattr(QuizEngine, "schedule_regrade", staticmethod(lambda quiz_id: None))
+
+    db.add(User(user_id="u1", username="u1", email="u1@example.com", password_hash="-", full_name="u1"))
+    db.commit()
+    db.add(StudentProfile(user_id="u1", onboarding_completed=True))
+    db.add(Quiz(quiz_id="q1", user_id="u1", topic="Biology", quiz_type="descriptive",
+                questions=QUESTIONS, max_score=20, status="pending"))
+    db.commit()
+    return "q1"
+
+
+def _ai_unavailable(monkeypatch):
+    async def no_reply(*args, **kwargs):
+        return None
+    monkeypatch.setattr(LLMClient, "acall_llm", staticmethod(no_reply))
+
+
+def test_grading_prompts_keep_their_wording():
+    coding = QuizEngine._ai_grading('coding')['prompt']({"question": "Sum a list", "requirements": ["Use a loop"]}, "x")
+    descriptive = QuizEngine._ai_grading('descriptive')['prompt'](QUESTIONS[0], ANSWERS["0"])
+
+    assert coding.startswith("Review this student's code:")
+    assert "Feedback: [Brief feedback on correctness, quality, and improvements]" in coding
+    assert descriptive.startswith("Grade this student's answer:")
+    assert descriptive.endswith("Award partial credit for partially correct answers.")
+
+
+def test_ungraded_answers_keep_the_quiz_grading(quiz, monkeypatch):
+    _ai_unavailable(monkeypatch)
+    ok, result = QuizEngine.submit_quiz(quiz, ANSWERS)
+
+    assert ok and result["ungraded"] == 2 and result["score"] == 0
+
+
+def test_grading_quizzes_count_as_provisional(quiz, monkeypatch):
+    _ai_unavailable(monkeypatch)
+    QuizEngine.submit_quiz(quiz, ANSWERS)
+
+    snapshot = DashboardService.get_snapshot("u1")
+    assert snapshot["quiz_count"] == 1
+    assert snapshot["provisional_quizzes"] == 1
+    assert [q.quiz_id for q in snapshot["recent_quizzes"]] == [quiz]
+
+
+def test_sweep_finishes_grading_without_a_page_visit(quiz, monkeypatch, db):
+    with monkeypatch.context() as patch:
+        _ai_unavailable(patch)
+        QuizEngine.submit_quiz(quiz, ANSWERS)
+
+    assert QuizEngine.regrade_all() == 0
+
+    graded = db.get(Quiz, quiz)
+    responses = db.query(QuizResponse).filter(QuizResponse.quiz_id == quiz).all()
+    assert graded.status == "completed"
+    assert all(r.is_correct is not None for r in responses)
+    assert graded.score == sum(r.points_earned for r in responses) > 0
+    assert DashboardService.get_snapshot("u1")["provisional_quizzes"] == 0
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from database.models import User, UploadedResource
+from llm.embedding_store import EmbeddingStore
+from llm.keyword_index import keyword_index
+from llm.rag_engine import RAGEngine
+from llm.vector_index import vector_index_cache
+
+CHUNKS = ["Mitochondria produce energy for the cell.", "Ribosomes assemble proteins."]
+
+
+@pytest.fixture
+def engine(db, tmp_path, monkeypatch):
+    if not keyword_index.available:
+        pytest.skip("SQLite FTS5 not available")
+
+    db.add(User(user_id="u1", username="u1", email="u1@example.com", password_hash="-", full_name="u1"))
+    db.commit()
+    db.add(UploadedResource(resource_id="r-rag", user_id="u1", filename="cells.pdf", file_path="-",
+                            file_type="pdf", embeddings_generated=True))
+    db.commit()
+
+    rag = RAGEngine()
+    monkeypatch.setattr(rag, "store", EmbeddingStore(str(tmp_path / "embeddings")))
+    rag.store.write("r-rag", np.eye(2, dtype=np.float32), CHUNKS)
+    keyword_index.index_chunks("r-rag", CHUNKS)
+
+    yield rag
+    keyword_index.remove("r-rag")
+    vector_index_cache.drop_user("u1")
+
+
+def test_keyword_results_are_memoized(engine):
+    first = engine.search("u1", "mitochondria energy", mode="keyword")
+    generation = keyword_index.generation
+
+    assert [hit["chunk"] for hit in first] == CHUNKS[:1]
+    assert engine.search("u1", "mitochondria energy", mode="keyword") == first
+    assert keyword_index.generation == generation
+
+
+def test_keyword_index_writes_invalidate_memoized_results(engine):
+    assert engine.search("u1", "ribosomes", mode="keyword")
+
+    # Same content key and resident vector index, but the keyword entries are gone
+    keyword_index.remove("r-rag")
+    assert engine.search("u1", "ribosomes", mode="keyword") == []
+
+    keyword_index.index_chunks("r-rag", ["Ribosomes assemble proteins."])
+    assert engine.search("u1", "ribosomes", mode="keyword")
@@ -0,0 +1,74 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.models import LLMCacheEntry
+from llm.llm_backends import FakeBackend, ReplayBackend, MODEL_NAME
+from llm.llm_client import LLMClient
+from llm.response_cache import ResponseCache, response_cache
+
+MESSAGES = [{"role": "user", "content": "What is osmosis?"}]
+
+
+@pytest.fixture
+def cache(db):
+    return ResponseCache(enabled=True, default_ttl=60, max_entries=10)
+
+
+def test_put_then_get_counts_a_hit(cache):
+    assert cache.get(MODEL_NAME, MESSAGES, 100, 0.7) is None
+    cache.put(MODEL_NAME, MESSAGES, 100, 0.7, "Water crossing a membrane.")
+
+    assert cache.get(MODEL_NAME, MESSAGES, 100, 0.7) == "Water crossing a membrane."
+    assert cache.get(MODEL_NAME, MESSAGES, 100, 0.2) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_expired_entries_miss_and_are_evicted(cache, db):
+    cache.put(MODEL_NAME, MESSAGES, 100, 0.7, "stale")
+    db.query(LLMCacheEntry).update({LLMCacheEntry.expires_at: datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+
+    assert cache.get(MODEL_NAME, MESSAGES, 100, 0.7) is None
+    assert cache.evict() == 1
+
+
+def test_evicts_least_recently_used_beyond_the_cap(cache):
+    for n in range(12):
+        cache.put(MODEL_NAME, [{"role": "user", "content": f"q{n}"}], 100, 0.7, f"a{n}")
+
+    assert cache.stats()["entries"] <= cache.max_entries
+    assert cache.get(MODEL_NAME, [{"role": "user", "content": "q11"}], 100, 0.7) == "a11"
+    assert cache.get(MODEL_NAME, [{"role": "user", "content": "q0"}], 100, 0.7) is None
+
+
+def test_discard(cache):
+    cache.put(MODEL_NAME, MESSAGES, 100, 0.7, "unparseable")
+    cache.discard(MODEL_NAME, MESSAGES, 100, 0.7)
+    assert cache.get(MODEL_NAME, MESSAGES, 100, 0.7) is None
+
+
+@pytest.fixture
+def replay(db, tmp_path, monkeypatch):
+    recorded = ReplayBackend(path=str(tmp_path / "recordings.jsonl"), speed=0)
+    key = recorded._key([{"role": "user", "content": "recorded prompt"}], 100, 0.7)
+    with open(recorded.path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"key": key, "model": MODEL_NAME, "response": "from the recording", "latency": 0}) + "\n")
+
+    monkeypatch.setattr(response_cache, "enabled", True)
+    previous = LLMClient.backend()
+    LLMClient.use_backend(recorded)
+    yield recorded
+    LLMClient.use_backend(previous)
+
+
+def test_replay_fallbacks_are_cached_under_the_fake_model(replay, db):
+    fallback = LLMClient.call_llm("never recorded", max_tokens=100, cache=True)
+    replayed = LLMClient.call_llm("recorded prompt", max_tokens=100, cache=True)
+
+    assert replayed == "from the recording"
+    assert fallback
+
+    models = {entry.model: entry.response for entry in db.query(LLMCacheEntry)}
+    assert models == {FakeBackend.model: fallback, MODEL_NAME: "from the recording"}
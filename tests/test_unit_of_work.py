@@ -0,0 +1,75 @@
+import pytest
+
+from database.models import User, StudentProfile
+from database.unit_of_work import UnitOfWork, fetch_one
+
+
+@pytest.fixture
+def user(db):
+    db.add(User(user_id="u1", username="u1", email="u1@example.com", password_hash="-", full_name="u1"))
+    db.commit()
+    db.add(StudentProfile(user_id="u1", current_day_number=3))
+    db.commit()
+    return "u1"
+
+
+def test_repeated_lookups_are_served_from_the_cache(user):
+    with UnitOfWork("test") as uow:
+        first = fetch_one(uow.session, StudentProfile, user_id=user)
+        queries = uow.stats["queries"]
+        again = fetch_one(uow.session, StudentProfile, user_id=user)
+
+        assert again is first
+        assert uow.stats["queries"] == queries
+        assert uow.stats["cache_hits"] == 1
+
+
+def test_primary_key_lookups_use_the_identity_map(user):
+    with UnitOfWork("test") as uow:
+        first = fetch_one(uow.session, User, user_id=user)
+        queries = uow.stats["queries"]
+
+        assert fetch_one(uow.session, User, user_id=user) is first
+        assert uow.stats["queries"] == queries
+        assert uow.stats["cache_hits"] == 1
+
+
+def test_misses_are_cached_too(user):
+    with UnitOfWork("test") as uow:
+        assert fetch_one(uow.session, StudentProfile, user_id="nobody") is None
+        assert fetch_one(uow.session, StudentProfile, user_id="nobody") is None
+        assert uow.stats["cache_hits"] == 1
+
+
+def test_orm_and_bulk_writes_invalidate_the_model(user):
+    with UnitOfWork("test") as uow:
+        profile = fetch_one(uow.session, StudentProfile, user_id=user)
+        profile.current_day_number = 4
+        uow.session.commit()
+        assert not uow.entities
+
+        fetch_one(uow.session, StudentProfile, user_id=user)
+        uow.session.query(StudentProfile).filter_by(user_id=user).update({"current_day_number": 5})
+        assert fetch_one(uow.session, StudentProfile, user_id=user).current_day_number == 5
+
+
+def test_queries_on_other_sessions_are_counted(user, db):
+    with UnitOfWork("test") as uow:
+        db.query(User).all()
+        assert uow.stats["queries"] == 1
+
+
+def test_the_block_rolls_back_on_error_and_closes(user, db):
+    with pytest.raises(RuntimeError):
+        with UnitOfWork("test") as uow:
+            fetch_one(uow.session, StudentProfile, user_id=user).current_day_number = 9
+            uow.session.flush()
+            raise RuntimeError("render failed")
+
+    assert UnitOfWork.current() is None
+    assert not uow.entities
+    assert db.query(StudentProfile).filter_by(user_id=user).one().current_day_number == 3
+
+
+def test_outside_a_unit_fetch_one_is_a_plain_query(user, db):
+    assert fetch_one(db, StudentProfile, user_id=user).current_day_number == 3
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+
+from llm.embedding_store import EmbeddingStore
+from llm.rag_engine import RAGEngine
+from llm.vector_index import UserVectorIndex, VectorIndexCache
+
+
+def _index(content_key: str) -> UserVectorIndex:
+    index = UserVectorIndex("u1")
+    index.add_resource("r1", "a.pdf", np.eye(3, dtype=np.float32), content_key)
+    return index
+
+
+def test_signature_follows_the_stored_content_not_just_row_counts():
+    assert _index("hash@v1").signature() == _index("hash@v1").signature()
+    # Same resource and row count, re-embedded into a new store version
+    assert _index("hash@v1").signature() != _index("hash@v2").signature()
+
+
+def test_signature_changes_when_a_resource_is_removed():
+    index = _index("hash@v1")
+    before = index.signature()
+    index.add_resource("r2", "b.pdf", np.eye(3, dtype=np.float32), "other@v1")
+    index.remove_resource("r2")
+
+    assert index.signature() == before
+    assert index.content_keys == ["hash@v1"]
+
+
+def test_content_key_moves_with_each_write(tmp_path, monkeypatch):
+    engine = RAGEngine()
+    monkeypatch.setattr(engine, "store", EmbeddingStore(str(tmp_path / "embeddings")))
+
+    engine.store.write("hash", np.eye(2, dtype=np.float32), ["a", "b"])
+    first = engine.content_key("hash")
+    engine.store.write("hash", np.eye(2, dtype=np.float32), ["a", "b"])
+
+    assert first.startswith("hash@v")
+    assert engine.content_key("hash") != first
+
+
+def _persisted(cache: VectorIndexCache, user_id: str) -> str:
+    persist_dir = cache.persist_dir(user_id)
+    os.makedirs(persist_dir)
+    with open(os.path.join(persist_dir, "hnsw.json"), 'w', encoding='utf-8') as f:
+        f.write("{}")
+    return persist_dir
+
+
+def test_dropping_a_user_deletes_their_persisted_index(tmp_path):
+    cache = VectorIndexCache(persist_root=str(tmp_path / "indexes"))
+    persist_dir = _persisted(cache, "u1")
+    cache.put(_index("hash@v1"))
+
+    cache.drop_user("u1")
+
+    assert cache.get("u1") is None
+    assert not os.path.exists(persist_dir)
+
+
+def test_dropping_a_resource_deletes_the_stale_persisted_index(tmp_path):
+    cache = VectorIndexCache(persist_root=str(tmp_path / "indexes"))
+    persist_dir = _persisted(cache, "u1")
+    cache.put(_index("hash@v1"))
+
+    cache.drop_resource("u1", "r1")
+
+    assert cache.get("u1").size == 0
+    assert not os.path.exists(persist_dir)
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+
+from core.page_store import PageStore
+from llm.embedding_store import EmbeddingStore
+
+
+def _versions(store, key):
+    return sorted(name for name in os.listdir(store._resource_dir(key)) if name != store.POINTER_FILE)
+
+
+def test_pages_are_published_through_current(tmp_path):
+    store = PageStore(str(tmp_path / "pages"))
+    with store.writer("k") as writer:
+        writer.append("page one")
+        writer.append("page two")
+
+    assert store.current_version("k") == _versions(store, "k")[0]
+    assert list(store.iter_pages("k")) == ["page one", "page two"]
+
+
+def test_a_failed_page_write_leaves_the_live_version(tmp_path):
+    store = PageStore(str(tmp_path / "pages"))
+    store.write_text("k", "old")
+
+    try:
+        with store.writer("k") as writer:
+            writer.append("half")
+            raise RuntimeError("extraction died")
+    except RuntimeError:
+        pass
+
+    assert store.read_text("k") == "old"
+    assert _versions(store, "k") == [store.current_version("k")]
+
+
+def test_rewrites_keep_only_the_live_and_previous_version(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "embeddings"))
+    written = []
+    for n in range(3):
+        store.write("k", np.eye(2, dtype=np.float32), [f"a{n}", f"b{n}"])
+        written.append(store.current_version("k"))
+
+    assert _versions(store, "k") == sorted(written[1:])
+    assert store.read_all_chunks("k") == ["a2", "b2"]
+
+
+def test_unversioned_layout_is_read_then_replaced(tmp_path):
+    store = PageStore(str(tmp_path / "pages"))
+    legacy_dir = store._resource_dir("k")
+    os.makedirs(legacy_dir)
+    np.save(os.path.join(legacy_dir, store.OFFSETS_FILE), np.asarray([0, 6], dtype=np.int64))
+    with open(os.path.join(legacy_dir, store.PAGES_FILE), 'wb') as f:
+        f.write(b"legacy")
+    with open(os.path.join(legacy_dir, store.MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        f.write('{"num_pages": 1}')
+
+    assert store.current_version("k") == ""
+    assert store.read_text("k") == "legacy"
+
+    store.write_text("k", "fresh")
+    assert store.read_text("k") == "fresh"
+    assert _versions(store, "k") == [store.current_version("k")]